@@ -0,0 +1,58 @@
+"""Task keyset pagination indexes
+
+Adds composite (filter, updated_at, id) indexes so GET /api/tasks can
+seek by cursor instead of scanning with OFFSET, plus a GIN index for
+tag containment filters.
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TASK_INDEXES = [
+    ('idx_tasks_updated_at_id', ['updated_at', 'id']),
+    ('idx_tasks_tenant_updated_at_id', ['tenant_id', 'updated_at', 'id']),
+    ('idx_tasks_assigned_to_updated_at_id', ['assigned_to', 'updated_at', 'id']),
+    ('idx_tasks_team_updated_at_id', ['team_id', 'updated_at', 'id']),
+    ('idx_tasks_priority_updated_at_id', ['priority', 'updated_at', 'id']),
+    ('idx_tasks_status_updated_at_id', ['status', 'updated_at', 'id']),
+    ('idx_tasks_due_date', ['due_date']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset ordering needs a non-null sort key on every row
+    op.execute(
+        "UPDATE tasks SET updated_at = COALESCE(created_at, NOW()) "
+        "WHERE updated_at IS NULL"
+    )
+
+    for name, columns in TASK_INDEXES:
+        op.create_index(name, 'tasks', columns, if_not_exists=True)
+
+    op.create_index(
+        'idx_tasks_tags', 'tasks', ['tags'],
+        postgresql_using='gin', if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_tasks_tags', table_name='tasks', if_exists=True)
+
+    for name, _ in reversed(TASK_INDEXES):
+        op.drop_index(name, table_name='tasks', if_exists=True)
@@ -0,0 +1,31 @@
+"""Index users.line_manager for the org chart
+
+The org chart endpoint walks the reporting hierarchy with a recursive
+query that looks up the direct reports of each manager.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_users_line_manager', 'users', ['line_manager'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_users_line_manager', table_name='users', if_exists=True)
@@ -0,0 +1,35 @@
+"""Diagram version counter
+
+Adds diagrams.version, bumped on every save, so delta saves
+(PATCH /api/diagrams/{id}) can detect that they were computed against
+an outdated copy.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'diagrams',
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('diagrams', 'version')
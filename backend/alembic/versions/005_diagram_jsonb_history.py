@@ -0,0 +1,79 @@
+"""Diagram JSONB storage and version history
+
+Converts diagrams.diagram_data from TEXT to JSONB and adds the
+diagram_versions table of reverse JSON Patches, so earlier revisions can
+be rebuilt without storing full copies. On PostgreSQL 14+ built with
+lz4, both JSON columns are switched to lz4 TOAST compression.
+
+For a backed-up, step-by-step run use migrate_diagrams_jsonb.py instead;
+this revision skips the conversion if it has already been done.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _column_type(table: str, column: str) -> str:
+    return op.get_bind().execute(sa.text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = :table AND column_name = :column"
+    ), {"table": table, "column": column}).scalar()
+
+
+def _try_lz4(table: str, column: str) -> None:
+    """Use lz4 TOAST compression where the server supports it"""
+    bind = op.get_bind()
+    if bind.dialect.server_version_info < (14,):
+        return
+    savepoint = bind.begin_nested()
+    try:
+        bind.execute(sa.text(f"ALTER TABLE {table} ALTER COLUMN {column} SET COMPRESSION lz4"))
+        savepoint.commit()
+    except sa.exc.DBAPIError:
+        savepoint.rollback()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _column_type('diagrams', 'diagram_data') != 'jsonb':
+        op.execute(
+            "ALTER TABLE diagrams ALTER COLUMN diagram_data TYPE JSONB "
+            "USING diagram_data::jsonb"
+        )
+    _try_lz4('diagrams', 'diagram_data')
+
+    op.create_table(
+        'diagram_versions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('diagram_id', sa.Integer(), sa.ForeignKey('diagrams.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('patch', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('diagram_id', 'version', name='unique_diagram_version'),
+        if_not_exists=True
+    )
+    op.create_index('ix_diagram_versions_id', 'diagram_versions', ['id'], if_not_exists=True)
+    _try_lz4('diagram_versions', 'patch')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('diagram_versions', if_exists=True)
+    op.execute(
+        "ALTER TABLE diagrams ALTER COLUMN diagram_data TYPE TEXT "
+        "USING diagram_data::text"
+    )
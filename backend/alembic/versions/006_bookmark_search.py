@@ -0,0 +1,59 @@
+"""Bookmark full-text search
+
+Adds bookmarks.search_vector, a generated tsvector over title, tags,
+description and URL, with a GIN index for /api/bookmarks/search, plus a
+jsonb_path_ops GIN index for tag containment (tags @> '["x"]') and a
+(user_id, created_at) index for per-user listings.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in sync with app.models.bookmark.BOOKMARK_SEARCH_VECTOR
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('simple', coalesce(tags, '[]'::jsonb), '[\"string\"]'), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('simple', regexp_replace(coalesce(url, ''), '[^[:alnum:]]+', ' ', 'g')), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filling the generated column rewrites the table once
+    op.execute(
+        f"ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+    )
+    op.create_index(
+        'idx_bookmarks_search_vector', 'bookmarks', ['search_vector'],
+        postgresql_using='gin', if_not_exists=True
+    )
+    op.create_index(
+        'idx_bookmarks_tags', 'bookmarks', ['tags'],
+        postgresql_using='gin', postgresql_ops={'tags': 'jsonb_path_ops'}, if_not_exists=True
+    )
+    op.create_index(
+        'idx_bookmarks_user_created_at', 'bookmarks', ['user_id', 'created_at'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_bookmarks_user_created_at', table_name='bookmarks', if_exists=True)
+    op.drop_index('idx_bookmarks_tags', table_name='bookmarks', if_exists=True)
+    op.drop_index('idx_bookmarks_search_vector', table_name='bookmarks', if_exists=True)
+    op.execute("ALTER TABLE bookmarks DROP COLUMN IF EXISTS search_vector")
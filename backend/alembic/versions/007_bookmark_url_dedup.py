@@ -0,0 +1,53 @@
+"""Unique bookmark URL per user and category
+
+Adds idx_bookmarks_user_category_url, a unique index on (user_id,
+category, md5(url)) with NULLS NOT DISTINCT (PostgreSQL 15+), used as the
+ON CONFLICT target of /api/bookmarks/import. The same URL may still be
+saved to several categories (collections).
+
+Existing bookmarks are never removed: if the same URL is already saved
+twice in one category, the upgrade stops and lists how to find them so
+they can be merged by hand.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DUPLICATES_SQL = """
+    SELECT user_id, category, url, count(*) AS copies
+    FROM bookmarks
+    GROUP BY user_id, category, url
+    HAVING count(*) > 1
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    duplicates = op.get_bind().execute(sa.text(f"SELECT count(*) FROM ({DUPLICATES_SQL}) d")).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} bookmark URLs are saved more than once in the same category; "
+            f"merge them before upgrading. List them with:{DUPLICATES_SQL}"
+        )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_bookmarks_user_category_url "
+        "ON bookmarks (user_id, category, md5(url)) NULLS NOT DISTINCT"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_bookmarks_user_category_url', table_name='bookmarks', if_exists=True)
@@ -0,0 +1,66 @@
+"""Leave ledger
+
+Adds the append-only leave_ledger table. leave_balances.annual_used and
+sick_used become NUMERIC(6,1) so half days are kept exactly, and each
+non-zero counter is carried into the ledger as an "opening" entry so
+balances equal the sum of the ledger from the start.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'leave_ledger',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('leave_request_id', sa.Integer(),
+                  sa.ForeignKey('leave_requests.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('leave_type', sa.String(50), nullable=False),
+        sa.Column('days', sa.Numeric(6, 1), nullable=False),
+        sa.Column('reason', sa.String(50), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        if_not_exists=True
+    )
+    op.create_index('ix_leave_ledger_id', 'leave_ledger', ['id'], if_not_exists=True)
+    op.create_index('idx_leave_ledger_user_type', 'leave_ledger', ['user_id', 'leave_type'], if_not_exists=True)
+
+    for column in ('annual_used', 'sick_used'):
+        op.alter_column(
+            'leave_balances', column,
+            type_=sa.Numeric(6, 1), existing_type=sa.Integer(),
+            postgresql_using=f'{column}::numeric(6,1)'
+        )
+
+    op.execute("""
+        INSERT INTO leave_ledger (user_id, leave_type, days, reason, created_at)
+        SELECT user_id, 'annual', annual_used, 'opening', now() FROM leave_balances WHERE annual_used <> 0
+        UNION ALL
+        SELECT user_id, 'sick', sick_used, 'opening', now() FROM leave_balances WHERE sick_used <> 0
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ('annual_used', 'sick_used'):
+        op.alter_column(
+            'leave_balances', column,
+            type_=sa.Integer(), existing_type=sa.Numeric(6, 1),
+            postgresql_using=f'round({column})::integer'
+        )
+    op.drop_table('leave_ledger', if_exists=True)
@@ -0,0 +1,50 @@
+"""Leave request date ranges
+
+Adds leave_requests.period, the daterange of days a request covers, with
+a GiST index so calendar views can select requests overlapping a date
+range. Existing rows are backfilled from their `dates` list (ISO date
+strings) or, when it is empty, from start_date / end_date.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('leave_requests', sa.Column('period', postgresql.DATERANGE(), nullable=True))
+    op.execute(r"""
+        UPDATE leave_requests r
+        SET period = coalesce(
+            (SELECT daterange(min(day), max(day), '[]')
+             FROM (SELECT to_date(left(x, 10), 'YYYY-MM-DD') AS day
+                   FROM unnest(r.dates) AS x
+                   WHERE x ~ '^\d{4}-\d{2}-\d{2}') AS days
+             HAVING count(*) > 0),
+            daterange(least(r.start_date, r.end_date)::date, greatest(r.start_date, r.end_date)::date, '[]')
+        )
+    """)
+    op.create_index(
+        'idx_leave_requests_period', 'leave_requests', ['period'],
+        postgresql_using='gist', if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_leave_requests_period', table_name='leave_requests', if_exists=True)
+    op.drop_column('leave_requests', 'period')
@@ -0,0 +1,50 @@
+"""Email outbox
+
+Adds email_outbox, the queue of outbound emails sent by the background
+email dispatcher, with a partial index over the pending messages it
+polls for.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('recipient', sa.String(255), nullable=False),
+        sa.Column('subject', sa.String(500), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        if_not_exists=True
+    )
+    op.create_index('ix_email_outbox_id', 'email_outbox', ['id'], if_not_exists=True)
+    op.create_index(
+        'idx_email_outbox_due', 'email_outbox', ['next_attempt_at'],
+        postgresql_where=sa.text("status = 'pending'"), if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('email_outbox', if_exists=True)
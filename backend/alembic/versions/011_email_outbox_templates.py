@@ -0,0 +1,54 @@
+"""Email outbox templates
+
+Template emails are queued as a template name, locale and placeholder
+values (context) and rendered when sent, so body becomes nullable. The
+columns are added only if missing, since create_all at app startup may
+already have created them.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        ALTER TABLE email_outbox
+            ADD COLUMN IF NOT EXISTS template VARCHAR(100),
+            ADD COLUMN IF NOT EXISTS locale VARCHAR(20),
+            ADD COLUMN IF NOT EXISTS context JSONB
+    """)
+    op.alter_column('email_outbox', 'body', existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Template emails have no stored body and can't be sent without the
+    # template columns; keep them, failing the ones still queued
+    op.execute("""
+        UPDATE email_outbox
+        SET status = CASE WHEN status = 'pending' THEN 'failed' ELSE status END,
+            last_error = CASE WHEN status = 'pending' THEN 'Template email dropped by downgrade' ELSE last_error END,
+            body = ''
+        WHERE body IS NULL
+    """)
+    op.alter_column('email_outbox', 'body', existing_type=sa.Text(), nullable=False)
+    op.execute("""
+        ALTER TABLE email_outbox
+            DROP COLUMN IF EXISTS context,
+            DROP COLUMN IF EXISTS locale,
+            DROP COLUMN IF EXISTS template
+    """)
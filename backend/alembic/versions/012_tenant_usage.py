@@ -0,0 +1,231 @@
+"""Tenant usage counters
+
+Adds tenant_usage, one row per tenant with its user, task and team counts
+and storage bytes, kept current by triggers so the billing page reads a
+single row instead of counting each table:
+
+- users, tasks and teams: statement-level INSERT/DELETE triggers with
+  transition tables, so a bulk insert makes one counter update per tenant
+  rather than one per row, plus a row-level trigger for the rare move to
+  another tenant.
+- diagrams: the stored (compressed) size of diagram_data, charged to the
+  tenant of the diagram's creator (diagrams have no tenant_id of their
+  own; if the creator moves tenant, reconciliation moves the bytes).
+  pg_column_size reads it from the stored value, so a save never
+  serializes the document.
+- attachments: file_size, when the table exists (databases created from
+  init-db.sql).
+
+Counters only ever move by deltas, so concurrent writers don't overwrite
+each other; the nightly reconciliation job corrects any drift.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTED_TABLES = (('users', 'users_count'), ('tasks', 'tasks_count'), ('teams', 'teams_count'))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'tenant_usage',
+        sa.Column('tenant_id', sa.Integer(), sa.ForeignKey('tenants.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('users_count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('tasks_count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('teams_count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('storage_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('reconciled_at', sa.DateTime(), nullable=True),
+        if_not_exists=True
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tenant_usage_add(p_tenant_id integer, p_counter text, p_delta bigint)
+        RETURNS void AS $$
+        BEGIN
+            IF p_tenant_id IS NULL OR p_delta IS NULL OR p_delta = 0 THEN
+                RETURN;
+            END IF;
+            EXECUTE format(
+                'INSERT INTO tenant_usage AS u (tenant_id, %1$I, updated_at)
+                 SELECT id, $2, now() FROM tenants WHERE id = $1
+                 ON CONFLICT (tenant_id) DO UPDATE SET %1$I = u.%1$I + EXCLUDED.%1$I, updated_at = now()',
+                p_counter
+            ) USING p_tenant_id, p_delta;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Counters are only kept for tenants that still exist: deleting a
+    # tenant cascades to its rows after the tenant itself is gone.
+    # TG_ARGV[0] is the counter column. INSERT/DELETE fire once per
+    # statement and read the transition table; UPDATE fires per row, only
+    # when tenant_id actually changed. Tenants are locked in id order so
+    # concurrent multi-tenant statements can't deadlock.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tenant_usage_count() RETURNS trigger AS $$
+        DECLARE
+            counted text;
+        BEGIN
+            IF TG_LEVEL = 'ROW' THEN
+                PERFORM tenant_usage_add(OLD.tenant_id, TG_ARGV[0], -1);
+                PERFORM tenant_usage_add(NEW.tenant_id, TG_ARGV[0], 1);
+                RETURN NULL;
+            END IF;
+            counted := CASE TG_OP
+                WHEN 'INSERT' THEN 'SELECT tenant_id, count(*) AS n FROM new_rows'
+                ELSE 'SELECT tenant_id, -count(*) AS n FROM old_rows'
+            END;
+            EXECUTE format(
+                'INSERT INTO tenant_usage AS u (tenant_id, %1$I, updated_at)
+                 SELECT d.tenant_id, d.n, now()
+                 FROM (%2$s WHERE tenant_id IS NOT NULL GROUP BY tenant_id) d
+                 JOIN tenants t ON t.id = d.tenant_id
+                 ORDER BY d.tenant_id
+                 ON CONFLICT (tenant_id) DO UPDATE SET %1$I = u.%1$I + EXCLUDED.%1$I, updated_at = now()',
+                TG_ARGV[0], counted
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table, counter in COUNTED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_usage_insert AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION tenant_usage_count('{counter}')
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_usage_delete AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION tenant_usage_count('{counter}')
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_usage_move AFTER UPDATE OF tenant_id ON {table}
+            FOR EACH ROW WHEN (OLD.tenant_id IS DISTINCT FROM NEW.tenant_id)
+            EXECUTE FUNCTION tenant_usage_count('{counter}')
+        """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tenant_usage_diagram_storage() RETURNS trigger AS $$
+        DECLARE
+            old_tenant integer;
+            new_tenant integer;
+            old_bytes bigint := 0;
+            new_bytes bigint := 0;
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                SELECT tenant_id INTO old_tenant FROM users WHERE id = OLD.created_by;
+                old_bytes := coalesce(pg_column_size(OLD.diagram_data), 0);
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                IF TG_OP = 'UPDATE' AND NEW.created_by IS NOT DISTINCT FROM OLD.created_by THEN
+                    new_tenant := old_tenant;
+                ELSE
+                    SELECT tenant_id INTO new_tenant FROM users WHERE id = NEW.created_by;
+                END IF;
+                new_bytes := coalesce(pg_column_size(NEW.diagram_data), 0);
+            END IF;
+            IF old_tenant IS NOT DISTINCT FROM new_tenant THEN
+                PERFORM tenant_usage_add(new_tenant, 'storage_bytes', new_bytes - old_bytes);
+            ELSE
+                PERFORM tenant_usage_add(old_tenant, 'storage_bytes', -old_bytes);
+                PERFORM tenant_usage_add(new_tenant, 'storage_bytes', new_bytes);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER diagrams_usage_storage
+        AFTER INSERT OR DELETE OR UPDATE OF diagram_data, created_by ON diagrams
+        FOR EACH ROW EXECUTE FUNCTION tenant_usage_diagram_storage()
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tenant_usage_attachment_storage() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                PERFORM tenant_usage_add(OLD.tenant_id, 'storage_bytes', -coalesce(OLD.file_size, 0));
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                PERFORM tenant_usage_add(NEW.tenant_id, 'storage_bytes', coalesce(NEW.file_size, 0));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('attachments') IS NOT NULL THEN
+                CREATE TRIGGER attachments_usage_storage
+                AFTER INSERT OR DELETE OR UPDATE OF file_size, tenant_id ON attachments
+                FOR EACH ROW EXECUTE FUNCTION tenant_usage_attachment_storage();
+            END IF;
+        END;
+        $$
+    """)
+
+    # Seed the counters; later drift is corrected by the reconciliation job
+    op.execute("""
+        INSERT INTO tenant_usage (tenant_id, users_count, tasks_count, teams_count, storage_bytes, reconciled_at)
+        SELECT t.id,
+               (SELECT count(*) FROM users WHERE tenant_id = t.id),
+               (SELECT count(*) FROM tasks WHERE tenant_id = t.id),
+               (SELECT count(*) FROM teams WHERE tenant_id = t.id),
+               (SELECT coalesce(sum(pg_column_size(d.diagram_data)), 0)
+                FROM diagrams d JOIN users u ON u.id = d.created_by WHERE u.tenant_id = t.id),
+               now()
+        FROM tenants t
+        ON CONFLICT (tenant_id) DO NOTHING
+    """)
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('attachments') IS NOT NULL THEN
+                UPDATE tenant_usage u
+                SET storage_bytes = u.storage_bytes + a.bytes
+                FROM (SELECT tenant_id, sum(file_size) AS bytes FROM attachments GROUP BY tenant_id) a
+                WHERE a.tenant_id = u.tenant_id;
+            END IF;
+        END;
+        $$
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS diagrams_usage_storage ON diagrams")
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('attachments') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS attachments_usage_storage ON attachments;
+            END IF;
+        END;
+        $$
+    """)
+    for table, _ in COUNTED_TABLES:
+        for suffix in ('insert', 'delete', 'move'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_usage_{suffix} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS tenant_usage_attachment_storage()")
+    op.execute("DROP FUNCTION IF EXISTS tenant_usage_diagram_storage()")
+    op.execute("DROP FUNCTION IF EXISTS tenant_usage_count()")
+    op.execute("DROP FUNCTION IF EXISTS tenant_usage_add(integer, text, bigint)")
+    op.drop_table('tenant_usage', if_exists=True)
@@ -9,11 +9,14 @@ from app.models.team import Team, TeamMember
 from app.models.other import (
     Setting,
     Diagram,
+    DiagramVersion,
     DraftHeadcount,
     LeaveRequest,
-    LeaveBalance
+    LeaveBalance,
+    LeaveLedgerEntry,
+    OutboundEmail
 )
-from app.models.subscription import Plan, Tenant, AIProviderKey
+from app.models.subscription import Plan, Tenant, TenantUsage, AIProviderKey
 from app.models.guest import GuestTrial, GuestTranslationLog
 
 __all__ = [
@@ -27,11 +30,15 @@ __all__ = [
     'TeamMember',
     'Setting',
     'Diagram',
+    'DiagramVersion',
     'DraftHeadcount',
     'LeaveRequest',
     'LeaveBalance',
+    'LeaveLedgerEntry',
+    'OutboundEmail',
     'Plan',
     'Tenant',
+    'TenantUsage',
     'AIProviderKey',
     'GuestTrial',
     'GuestTranslationLog',
@@ -2,9 +2,20 @@
 Bookmark model
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ARRAY, ForeignKey
+from sqlalchemy import Column, Computed, Integer, func, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred
 from app.utils.database import Base
 
+# Weighted search document: title and tags (A), description (B) and the
+# URL split into words (C). 'simple' keeps mixed-language text unstemmed.
+BOOKMARK_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('simple', coalesce(tags, '[]'::jsonb), '[\"string\"]'), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('simple', regexp_replace(coalesce(url, ''), '[^[:alnum:]]+', ' ', 'g')), 'C')"
+)
+
 
 class Bookmark(Base):
     """Bookmark model"""
@@ -16,7 +27,18 @@ class Bookmark(Base):
     favicon = Column(Text, nullable=True)
     description = Column(Text, nullable=True)
     category = Column(String(255), nullable=True, default='Uncategorized')
-    tags = Column(ARRAY(Text), nullable=True)
+    tags = Column(JSONB, nullable=True, default=list)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Maintained by Postgres; deferred so normal loads don't fetch it
+    search_vector = deferred(Column(TSVECTOR, Computed(BOOKMARK_SEARCH_VECTOR, persisted=True)))
+
+    __table_args__ = (
+        Index('idx_bookmarks_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('idx_bookmarks_tags', 'tags', postgresql_using='gin', postgresql_ops={'tags': 'jsonb_path_ops'}),
+        Index('idx_bookmarks_user_created_at', 'user_id', 'created_at'),
+        # One bookmark per URL, user and category; md5 keeps long URLs within btree limits
+        Index('idx_bookmarks_user_category_url', 'user_id', 'category', func.md5(url), unique=True,
+              postgresql_nulls_not_distinct=True),
+    )
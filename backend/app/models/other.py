@@ -1,8 +1,9 @@
 """
-Other models (Settings, Diagram, Headcount, Leave)
+Other models (Settings, Diagram, Headcount, Leave, Email outbox)
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, ARRAY, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, ARRAY, Float, Index, Numeric, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import DATERANGE, JSONB
 from app.utils.database import Base
 
 
@@ -24,10 +25,26 @@ class Diagram(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    diagram_data = Column(Text, nullable=False)  # JSON string containing shapes, connections, etc.
+    diagram_data = Column(JSONB, nullable=False)  # shapes, connections, etc.
     created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default='1')  # bumped on every save
+
+
+class DiagramVersion(Base):
+    """Reverse delta restoring an earlier diagram version"""
+    __tablename__ = "diagram_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    diagram_id = Column(Integer, ForeignKey("diagrams.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)  # version this patch restores
+    patch = Column(JSONB, nullable=False)  # JSON Patch from version + 1 back to version
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('diagram_id', 'version', name='unique_diagram_version'),
+    )
 
 
 class DraftHeadcount(Base):
@@ -64,9 +81,14 @@ class LeaveRequest(Base):
     reviewed_by = Column(String(255), nullable=True)
     reviewed_date = Column(DateTime, nullable=True)
     dates = Column(ARRAY(Text), nullable=True)  # Array of all leave dates (ISO format strings)
+    period = Column(DATERANGE, nullable=True)  # Days covered, see app.services.leave_calendar.leave_period
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index('idx_leave_requests_period', 'period', postgresql_using='gist'),
+    )
+
 
 class LeaveBalance(Base):
     """Leave balance model"""
@@ -76,8 +98,50 @@ class LeaveBalance(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
     user_name = Column(String(255), nullable=False)
     annual_total = Column(Integer, default=15)
-    annual_used = Column(Integer, default=0)
+    # Totals of leave_ledger; only changed through app.services.leave_ledger
+    annual_used = Column(Numeric(6, 1), default=0)
     sick_total = Column(Integer, default=10)
-    sick_used = Column(Integer, default=0)
+    sick_used = Column(Numeric(6, 1), default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LeaveLedgerEntry(Base):
+    """Append-only leave ledger entry"""
+    __tablename__ = "leave_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Kept when the request is deleted so the history stays complete
+    leave_request_id = Column(Integer, ForeignKey("leave_requests.id", ondelete="SET NULL"), nullable=True)
+    leave_type = Column(String(50), nullable=False)
+    days = Column(Numeric(6, 1), nullable=False)  # signed: + taken, - returned
+    reason = Column(String(50), nullable=False)  # approved, revoked, changed, deleted, reconcile, opening
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_leave_ledger_user_type', 'user_id', 'leave_type'),
+    )
+
+
+class OutboundEmail(Base):
+    """Queued outbound email, sent by app.services.email_outbox"""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    body = Column(Text)  # NULL for template emails, rendered when sent
+    template = Column(String(100))
+    locale = Column(String(20))
+    context = Column(JSONB)  # template placeholder values
+    status = Column(String(20), nullable=False, default="pending")  # pending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('idx_email_outbox_due', 'next_attempt_at', postgresql_where=text("status = 'pending'")),
+    )
@@ -2,7 +2,7 @@
 Subscription and AI Provider models
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Numeric, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Boolean, Numeric, JSON
 from app.utils.database import Base
 
 
@@ -61,6 +61,25 @@ class Tenant(Base):
     deleted_at = Column(DateTime)
 
 
+class TenantUsage(Base):
+    """
+    Per-tenant usage counters
+
+    Maintained by database triggers (migration 012) and corrected nightly
+    by app.services.tenant_usage.reconcile_tenant_usage; never written by
+    the application directly.
+    """
+    __tablename__ = "tenant_usage"
+
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    users_count = Column(BigInteger, nullable=False, default=0)
+    tasks_count = Column(BigInteger, nullable=False, default=0)
+    teams_count = Column(BigInteger, nullable=False, default=0)
+    storage_bytes = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    reconciled_at = Column(DateTime)
+
+
 class AIProviderKey(Base):
     """AI Provider API key model"""
     __tablename__ = "ai_provider_keys"
@@ -2,7 +2,7 @@
 Task model
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ARRAY, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ARRAY, Numeric, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from app.utils.database import Base
 
@@ -27,3 +27,15 @@ class Task(Base):
     estimate_hours = Column(Numeric(10, 2))
     readiness_checklist = Column(JSONB)
     size = Column(String(10))
+
+    # Composite indexes backing keyset pagination on (updated_at, id)
+    __table_args__ = (
+        Index('idx_tasks_updated_at_id', 'updated_at', 'id'),
+        Index('idx_tasks_tenant_updated_at_id', 'tenant_id', 'updated_at', 'id'),
+        Index('idx_tasks_assigned_to_updated_at_id', 'assigned_to', 'updated_at', 'id'),
+        Index('idx_tasks_team_updated_at_id', 'team_id', 'updated_at', 'id'),
+        Index('idx_tasks_priority_updated_at_id', 'priority', 'updated_at', 'id'),
+        Index('idx_tasks_status_updated_at_id', 'status', 'updated_at', 'id'),
+        Index('idx_tasks_due_date', 'due_date'),
+        Index('idx_tasks_tags', 'tags', postgresql_using='gin'),
+    )
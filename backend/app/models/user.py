@@ -2,7 +2,7 @@
 User model
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from app.utils.database import Base
 
 
@@ -32,6 +32,11 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
+    # Backs the recursive org chart walk (children of a manager)
+    __table_args__ = (
+        Index('idx_users_line_manager', 'line_manager'),
+    )
+
 
 class PasswordResetToken(Base):
     """Password reset token model"""
@@ -7,11 +7,10 @@ import hashlib
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import List
 from cryptography.fernet import Fernet
 
-from app.models import Plan, Tenant, AIProviderKey, User, Task, Team
+from app.models import Plan, Tenant, TenantUsage, AIProviderKey
 from app.schemas.subscription import (
     PlanResponse,
     TenantResponse,
@@ -24,6 +23,7 @@ from app.schemas.subscription import (
     AIProviderTestRequest,
     AIProviderTestResponse
 )
+from app.services.tenant_usage import current_usage, usage_summary
 from app.utils.database import get_db
 
 router = APIRouter(prefix="/api/subscription", tags=["subscription"])
@@ -90,26 +90,22 @@ def get_plan(plan_id: int, db: Session = Depends(get_db)):
 @router.get("/info", response_model=SubscriptionInfo)
 def get_subscription_info(tenant_id: int = 1, db: Session = Depends(get_db)):
     """Get current subscription info for a tenant"""
-    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
-    if not tenant:
+    row = (
+        db.query(Tenant, Plan, TenantUsage)
+        .outerjoin(Plan, Plan.id == Tenant.plan_id)
+        .outerjoin(TenantUsage, TenantUsage.tenant_id == Tenant.id)
+        .filter(Tenant.id == tenant_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(status_code=404, detail="Tenant not found")
 
-    plan = db.query(Plan).filter(Plan.id == tenant.plan_id).first()
+    tenant, plan, tenant_usage = row
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    # Get usage statistics
-    users_count = db.query(func.count(User.id)).filter(User.tenant_id == tenant_id).scalar()
-    tasks_count = db.query(func.count(Task.id)).filter(Task.tenant_id == tenant_id).scalar()
-    teams_count = db.query(func.count(Team.id)).filter(Team.tenant_id == tenant_id).scalar()
-
-    usage = {
-        "users": {"current": users_count, "limit": plan.max_users},
-        "tasks": {"current": tasks_count, "limit": plan.max_tasks},
-        "teams": {"current": teams_count, "limit": plan.max_teams},
-        "storage_mb": {"current": 0, "limit": plan.max_storage_mb},  # TODO: Calculate actual storage
-        "projects": {"current": 0, "limit": plan.max_projects}
-    }
+    # Counters are kept current by triggers, see app.services.tenant_usage
+    usage = usage_summary(plan, current_usage(db, tenant_id, tenant_usage))
 
     return SubscriptionInfo(
         tenant=TenantResponse.model_validate(tenant),
@@ -0,0 +1,400 @@
+"""
+Bookmark favicon and page metadata fetching
+
+A small pool of asyncio workers fetches each new bookmark's page, reads
+its <title>, description and icon links, downloads the icon into the
+content-addressed favicon cache and fills in whatever the client left
+empty. The bookmark's favicon then points at /api/favicons/<name>, so
+browsers load it from this backend instead of a third-party service.
+
+Fetching goes through a fetcher object (HttpFetcher by default), so
+tests and other deployments can substitute their own. HttpFetcher only
+connects to public addresses unless allow_private_networks is set,
+since bookmark URLs are user supplied: each request's host is resolved
+once and the connection is made to the address that was checked, so a
+host can't pass the check and then resolve somewhere else.
+"""
+import asyncio
+import ipaddress
+import logging
+import os
+import re
+import socket
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Set
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from sqlalchemy import case, func, or_, select, update
+
+from app.utils.favicon_cache import FAVICON_MAX_BYTES, FaviconCache
+
+logger = logging.getLogger(__name__)
+
+BOOKMARK_METADATA_FETCH = os.getenv("BOOKMARK_METADATA_FETCH", "true").lower() in ("1", "true", "yes", "on")
+BOOKMARK_METADATA_WORKERS = int(os.getenv("BOOKMARK_METADATA_WORKERS", "4"))
+BOOKMARK_METADATA_QUEUE_SIZE = int(os.getenv("BOOKMARK_METADATA_QUEUE_SIZE", "10000"))
+BOOKMARK_METADATA_TIMEOUT = float(os.getenv("BOOKMARK_METADATA_TIMEOUT", "5"))
+
+# Only the start of a page is parsed; <head> is nearly always within it
+MAX_PAGE_BYTES = 256 * 1024
+MAX_REDIRECTS = 5
+# Declared icons tried before falling back to /favicon.ico
+MAX_ICON_CANDIDATES = 3
+MAX_TITLE_LENGTH = 500
+MAX_DESCRIPTION_LENGTH = 1000
+
+FAVICON_ROUTE = "/api/favicons/"
+USER_AGENT = "PlanningToolBookmarkFetcher/1.0"
+
+
+class FetchResponse:
+    """Result of one fetch: final URL, status, content type and (capped) body"""
+
+    def __init__(self, url: str, status_code: int, content_type: str, content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.content_type = content_type
+        self.content = content
+
+
+class FetchError(Exception):
+    """The URL could not or must not be fetched"""
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address)
+    return ip.is_global and not ip.is_multicast
+
+
+async def _resolve(host: str, port: int) -> List[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+class PublicAddressTransport(httpx.AsyncBaseTransport):
+    """
+    Transport that only connects to public addresses
+
+    The host is resolved here and the request sent to the checked address
+    itself, keeping the original Host header and TLS server name, so the
+    connection can't go to a different (rebound) address than the one
+    checked.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, resolver=None):
+        self._transport = transport
+        self._resolver = resolver or _resolve
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        try:
+            addresses = await self._resolver(host, request.url.port or (443 if request.url.scheme == "https" else 80))
+        except socket.gaierror as e:
+            raise FetchError(f"Cannot resolve {host}: {e}")
+        if not addresses or not all(_is_public_address(address) for address in addresses):
+            raise FetchError(f"Refusing to fetch non-public address for {host}")
+        # A copy, so the response still reports the URL that was asked for
+        pinned = httpx.Request(
+            request.method, request.url.copy_with(host=addresses[0]), headers=request.headers,
+            stream=request.stream, extensions={**request.extensions, "sni_hostname": host},
+        )
+        return await self._transport.handle_async_request(pinned)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class HttpFetcher:
+    """
+    httpx-based fetcher with a size cap, timeouts and checked redirects
+
+    Any object with the same async fetch(url, max_bytes) and aclose()
+    methods can replace it.
+    """
+
+    def __init__(self, timeout: float = BOOKMARK_METADATA_TIMEOUT, allow_private_networks: bool = False,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        transport = transport or httpx.AsyncHTTPTransport(trust_env=False)
+        if not allow_private_networks:
+            transport = PublicAddressTransport(transport)
+        # trust_env=False: an environment proxy would connect on our behalf
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=False,
+            headers={"User-Agent": USER_AGENT},
+            transport=transport,
+            trust_env=False,
+        )
+
+    @staticmethod
+    def _check_url(url: str):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise FetchError(f"Unsupported URL: {url}")
+
+    async def fetch(self, url: str, max_bytes: int) -> FetchResponse:
+        """GET a URL, following redirects, reading at most max_bytes"""
+        for _ in range(MAX_REDIRECTS + 1):
+            self._check_url(url)
+            async with self._client.stream("GET", url) as response:
+                if response.is_redirect and "location" in response.headers:
+                    url = urljoin(url, response.headers["location"])
+                    continue
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= max_bytes:
+                        break
+                return FetchResponse(
+                    str(response.url), response.status_code,
+                    response.headers.get("content-type", ""), bytes(body[:max_bytes]),
+                )
+        raise FetchError(f"Too many redirects: {url}")
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class PageMetadata:
+    """Title, description and icon candidates read from a page's <head>"""
+
+    def __init__(self, title: Optional[str] = None, description: Optional[str] = None,
+                 icon_urls: Optional[List[str]] = None):
+        self.title = title
+        self.description = description
+        self.icon_urls = icon_urls or []
+
+
+class _HeadParser(HTMLParser):
+    # rel value -> preference (lower is better); apple-touch icons are large
+    ICON_RELS = {"icon": 0, "shortcut icon": 0, "apple-touch-icon": 1, "apple-touch-icon-precomposed": 1}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title_parts: List[str] = []
+        self.in_title = False
+        self.title_done = False
+        self.description: Optional[str] = None
+        self.og_description: Optional[str] = None
+        self.icons: List[tuple] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: (value or "") for name, value in attrs}
+        if tag == "title" and not self.title_done:
+            self.in_title = True
+        elif tag == "meta":
+            name = (attrs.get("name") or attrs.get("property") or "").lower()
+            if name == "description" and self.description is None:
+                self.description = attrs.get("content")
+            elif name == "og:description" and self.og_description is None:
+                self.og_description = attrs.get("content")
+        elif tag == "link" and attrs.get("href"):
+            rel = " ".join(attrs.get("rel", "").lower().split())
+            if rel in self.ICON_RELS:
+                self.icons.append((self.ICON_RELS[rel], len(self.icons), attrs["href"]))
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self.in_title:
+            self.in_title = False
+            self.title_done = True
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+
+
+def _clean_text(value: Optional[str], limit: int) -> Optional[str]:
+    if not value:
+        return None
+    value = re.sub(r"\s+", " ", value).strip()
+    return value[:limit] or None
+
+
+def _charset(content_type: str) -> str:
+    match = re.search(r"charset=([\w.-]+)", content_type, re.IGNORECASE)
+    return match.group(1) if match else "utf-8"
+
+
+def parse_page_metadata(html: str, page_url: str) -> PageMetadata:
+    """
+    Read title, description and icon URLs from HTML
+
+    Icon candidates are absolute URLs in preference order, always ending
+    with the site's /favicon.ico.
+    """
+    parser = _HeadParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:  # malformed markup; keep whatever was parsed
+        pass
+
+    icon_urls = [urljoin(page_url, href.strip()) for _, _, href in sorted(parser.icons)]
+    icon_urls = [url for url in icon_urls if url.startswith(("http://", "https://"))][:MAX_ICON_CANDIDATES]
+    fallback = urljoin(page_url, "/favicon.ico")
+    if fallback not in icon_urls:
+        icon_urls.append(fallback)
+
+    return PageMetadata(
+        title=_clean_text("".join(parser.title_parts), MAX_TITLE_LENGTH),
+        description=_clean_text(parser.description or parser.og_description, MAX_DESCRIPTION_LENGTH),
+        icon_urls=icon_urls,
+    )
+
+
+async def fetch_bookmark_metadata(fetcher, cache: FaviconCache, url: str) -> dict:
+    """
+    Fetch a page and its icon
+
+    Returns:
+        dict: title, description and favicon (a /api/favicons/ path), each
+              None when unavailable
+    """
+    metadata = PageMetadata(icon_urls=[urljoin(url, "/favicon.ico")])
+    try:
+        page = await fetcher.fetch(url, MAX_PAGE_BYTES)
+        if page.status_code == 200 and "html" in page.content_type.lower():
+            html = page.content.decode(_charset(page.content_type), errors="replace")
+            metadata = parse_page_metadata(html, page.url)
+    except (FetchError, httpx.HTTPError, LookupError) as e:
+        logger.debug("Page fetch failed for %s: %s", url, e)
+
+    favicon = None
+    for icon_url in metadata.icon_urls:
+        try:
+            icon = await fetcher.fetch(icon_url, FAVICON_MAX_BYTES + 1)
+        except (FetchError, httpx.HTTPError) as e:
+            logger.debug("Icon fetch failed for %s: %s", icon_url, e)
+            continue
+        if icon.status_code != 200:
+            continue
+        name = await asyncio.to_thread(cache.store, icon.content)
+        if name is not None:
+            favicon = FAVICON_ROUTE + name
+            break
+
+    return {"title": metadata.title, "description": metadata.description, "favicon": favicon}
+
+
+def referenced_favicons(session_factory, model):
+    """
+    FaviconCache.referenced_names callback: cache names some bookmark shows
+
+    Args:
+        session_factory: Sync session factory (eviction runs in a worker thread)
+        model: Bookmark model
+    """
+    def referenced_names(names: Iterable[str]) -> Set[str]:
+        paths = [FAVICON_ROUTE + name for name in names]
+        if not paths:
+            return set()
+        with session_factory() as session:
+            used = session.execute(select(model.favicon).where(model.favicon.in_(paths)).distinct()).scalars()
+            return {path[len(FAVICON_ROUTE):] for path in used}
+
+    return referenced_names
+
+
+class MetadataWorkerPool:
+    """
+    Bounded queue of bookmarks drained by a fixed number of asyncio workers
+
+    submit() is thread-safe so sync (threadpool) endpoints can enqueue
+    work; when the queue is full new bookmarks are skipped rather than
+    slowing down the request.
+    """
+
+    def __init__(self, session_factory, model, cache: FaviconCache, fetcher=None,
+                 workers: int = BOOKMARK_METADATA_WORKERS, queue_size: int = BOOKMARK_METADATA_QUEUE_SIZE):
+        self.session_factory = session_factory
+        self.model = model
+        self.cache = cache
+        self.fetcher = fetcher
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Start the workers on the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.fetcher is None:
+            self.fetcher = HttpFetcher()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers and close the fetcher; queued bookmarks are dropped"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        if self.fetcher is not None:
+            await self.fetcher.aclose()
+
+    async def join(self):
+        """Wait until every submitted bookmark has been processed"""
+        await self._queue.join()
+
+    def submit(self, bookmark_id: int, url: str) -> bool:
+        """Queue a bookmark for metadata fetching; False if not running or full"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return self._enqueue(bookmark_id, url)
+        loop.call_soon_threadsafe(self._enqueue, bookmark_id, url)
+        return True
+
+    def _enqueue(self, bookmark_id: int, url: str) -> bool:
+        try:
+            self._queue.put_nowait((bookmark_id, url))
+            return True
+        except asyncio.QueueFull:
+            logger.warning("Bookmark metadata queue full; skipping bookmark %s", bookmark_id)
+            return False
+
+    async def _worker(self):
+        while True:
+            bookmark_id, url = await self._queue.get()
+            try:
+                metadata = await fetch_bookmark_metadata(self.fetcher, self.cache, url)
+                await self.apply(bookmark_id, metadata)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Fetching metadata for bookmark %s failed", bookmark_id)
+            finally:
+                self._queue.task_done()
+
+    async def apply(self, bookmark_id: int, metadata: dict):
+        """
+        Fill in fetched values without overwriting what users entered
+
+        The title is replaced only while it is empty or just the URL, the
+        description only while empty; a fetched icon replaces the client's
+        (usually third-party) favicon URL.
+        """
+        model = self.model
+        values = {}
+        if metadata["favicon"]:
+            values["favicon"] = metadata["favicon"]
+        if metadata["title"]:
+            values["title"] = case(
+                (or_(func.coalesce(model.title, "") == "", model.title == model.url), metadata["title"]),
+                else_=model.title,
+            )
+        if metadata["description"]:
+            values["description"] = func.coalesce(func.nullif(model.description, ""), metadata["description"])
+        if not values:
+            return
+        async with self.session_factory() as session:
+            await session.execute(update(model).where(model.id == bookmark_id).values(**values))
+            await session.commit()
@@ -0,0 +1,58 @@
+"""
+Bookmark full-text search
+
+Queries the generated bookmarks.search_vector column (GIN indexed) with
+prefix matching so partially typed words match, ranks hits with
+ts_rank_cd and filters by tag containment on the JSONB tags array
+(GIN jsonb_path_ops index).
+"""
+import re
+from typing import List, Optional
+
+from sqlalchemy import Select, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Longer queries add little precision but make the tsquery expensive
+MAX_QUERY_TERMS = 8
+
+
+def to_prefix_tsquery(q: Optional[str]) -> Optional[str]:
+    """
+    Turn free text into a to_tsquery() string matching every word as a prefix
+
+    "react hoo" -> "react:* & hoo:*". Punctuation is dropped so user input
+    can never produce tsquery syntax errors.
+    """
+    if not q:
+        return None
+    terms = [term.lower() for term in re.findall(r"\w+", q)][:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def build_search_query(model, q: Optional[str] = None, tags: Optional[List[str]] = None,
+                       category: Optional[str] = None, user_id: Optional[int] = None) -> Select:
+    """
+    Select bookmarks plus a "rank" column, best matches first
+
+    Without a text query every matching bookmark gets rank 0 and results
+    are newest first.
+    """
+    tsquery_text = to_prefix_tsquery(q)
+    if tsquery_text is not None:
+        tsquery = func.to_tsquery("simple", tsquery_text)
+        rank = func.ts_rank_cd(model.search_vector, tsquery)
+        query = select(model, rank.label("rank")).where(model.search_vector.op("@@")(tsquery))
+        order = [rank.desc(), model.created_at.desc(), model.id.desc()]
+    else:
+        query = select(model, literal(0.0).label("rank"))
+        order = [model.created_at.desc(), model.id.desc()]
+
+    if tags:
+        query = query.where(model.tags.op("@>")(cast(list(tags), JSONB)))
+    if category:
+        query = query.where(model.category == category)
+    if user_id is not None:
+        query = query.where(model.user_id == user_id)
+    return query.order_by(*order)
@@ -0,0 +1,172 @@
+"""
+Bookmark import / export as NDJSON
+
+Imports read one JSON bookmark per line from the request body as it
+arrives and insert them in chunks with a single multi-row
+INSERT ... ON CONFLICT per chunk. A duplicate is a URL the user already
+has in the same category (user_id, category, url); the same URL in
+another category is a separate bookmark.
+Exports stream rows from a server-side cursor (yield_per) so memory use
+does not grow with the number of bookmarks.
+"""
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+IMPORT_CHUNK_SIZE = int(os.getenv("BOOKMARK_IMPORT_CHUNK_SIZE", "500"))
+EXPORT_BATCH_SIZE = int(os.getenv("BOOKMARK_EXPORT_BATCH_SIZE", "1000"))
+
+# Report at most this many bad lines; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Columns written by an import; anything else in a line is ignored
+IMPORT_COLUMNS = ("title", "url", "favicon", "description", "category", "tags")
+# Refreshed from the import when on_duplicate="update"
+UPDATE_COLUMNS = ("title", "favicon", "description", "tags")
+
+EXPORT_COLUMNS = ("id", "title", "url", "favicon", "description", "category", "tags",
+                  "user_id", "created_at", "updated_at")
+
+
+def dedup_conflict_target(model) -> list:
+    """ON CONFLICT target matching the idx_bookmarks_user_category_url unique index"""
+    return [model.user_id, model.category, func.md5(model.url)]
+
+
+def commit_bookmark(db: Session):
+    """
+    Commit a created or edited bookmark
+
+    Raises:
+        HTTPException: 409 if the URL is already saved in that category
+    """
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="This URL is already saved in this category")
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Yield (line number, line) from a byte stream, skipping blank lines"""
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+class ImportResult:
+    """Counters for one import request"""
+
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def add_error(self, line: int, detail: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "detail": detail})
+
+    def to_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+async def insert_chunk(db: AsyncSession, model, rows: List[dict], result: ImportResult,
+                       on_duplicate: str = "skip") -> List[Tuple[int, str]]:
+    """
+    Insert one chunk of bookmarks with a single statement
+
+    Rows repeating a URL in the same category within the chunk are
+    collapsed first (the last one wins), since one INSERT ... ON CONFLICT
+    cannot touch a row twice.
+
+    Args:
+        db: Session to execute on (the caller commits)
+        model: Bookmark model
+        rows: Column dicts with IMPORT_COLUMNS and user_id
+        result: Counters to update
+        on_duplicate: For a URL the user already has in the row's category,
+            "skip" keeps the existing bookmark and "update" refreshes its
+            UPDATE_COLUMNS
+
+    Returns:
+        list: (id, url) of the newly inserted bookmarks
+    """
+    unique: Dict[Tuple[Optional[int], Optional[str], str], dict] = {}
+    for row in rows:
+        unique[(row["user_id"], row["category"], row["url"])] = row
+    result.skipped += len(rows) - len(unique)
+
+    now = datetime.utcnow()
+    values = [{**row, "created_at": now, "updated_at": now} for row in unique.values()]
+    stmt = pg_insert(model).values(values)
+    if on_duplicate == "update":
+        stmt = stmt.on_conflict_do_update(
+            index_elements=dedup_conflict_target(model),
+            set_={**{column: stmt.excluded[column] for column in UPDATE_COLUMNS}, "updated_at": now},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=dedup_conflict_target(model))
+    # xmax is 0 for freshly inserted rows and non-zero for updated ones
+    returned = (await db.execute(
+        stmt.returning(model.id, model.url, literal_column("xmax = 0").label("inserted"))
+    )).all()
+
+    inserted = [(row.id, row.url) for row in returned if row.inserted]
+    result.inserted += len(inserted)
+    result.updated += len(returned) - len(inserted)
+    result.skipped += len(unique) - len(returned)
+    return inserted
+
+
+def _export_line(row) -> str:
+    values = {}
+    for column, value in zip(EXPORT_COLUMNS, row):
+        values[column] = value.isoformat() if isinstance(value, datetime) else value
+    return json.dumps(values, ensure_ascii=False) + "\n"
+
+
+async def stream_export(session_factory, model, user_id: Optional[int] = None,
+                        category: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Yield bookmarks as NDJSON, one batch of lines at a time
+
+    Opens its own session because the generator outlives the request
+    handler; the server-side cursor stays open until the last batch.
+    """
+    query = select(*(getattr(model, column) for column in EXPORT_COLUMNS)).order_by(model.id)
+    if user_id is not None:
+        query = query.where(model.user_id == user_id)
+    if category:
+        query = query.where(model.category == category)
+
+    async with session_factory() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield "".join(_export_line(row) for row in partition)
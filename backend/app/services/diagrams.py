@@ -0,0 +1,67 @@
+"""
+Diagram delta saves
+
+The diagram editor stores documents shaped like
+{"shapes": [{"id": ..., ...}, ...], "connections": [...]}, where
+connections reference shapes by index. Autosaves can send either an
+RFC 6902 JSON Patch or a shape-level delta:
+
+    {"upsert": [shape, ...], "delete": [shape_id, ...], "connections": [...]}
+
+Shape deltas are translated into JSON Patch operations so both formats
+share one code path.
+"""
+from typing import Any, Dict, List, Optional
+
+
+def shape_delta_to_patch(document: dict, upsert: List[dict], delete: List[Any],
+                         connections: Optional[List[dict]] = None) -> List[dict]:
+    """
+    Translate a shape-level delta into JSON Patch operations
+
+    Upserted shapes replace the shape with the same id or are appended;
+    deleted ids are removed (highest index first so earlier indices stay
+    valid). Because connections use shape indices, clients that delete
+    shapes should send the new connections list, which replaces the old.
+
+    Args:
+        document: Current diagram document
+        upsert: Shapes to add or replace, matched on "id"
+        delete: Ids of shapes to remove (unknown ids are ignored)
+        connections: Replacement connections list, if any
+
+    Returns:
+        list: JSON Patch operations
+
+    Raises:
+        ValueError: If the document is not an object or its shapes are not a list
+    """
+    if not isinstance(document, dict):
+        raise ValueError("diagram document is not an object")
+    shapes = document.get("shapes")
+    if shapes is not None and not isinstance(shapes, list):
+        raise ValueError("diagram shapes are not a list")
+
+    index_of: Dict[Any, int] = {}
+    for index, shape in enumerate(shapes or []):
+        if isinstance(shape, dict) and "id" in shape:
+            index_of.setdefault(shape["id"], index)
+
+    patch: List[dict] = []
+    if shapes is None:
+        # Missing or null: start an empty list ("add" replaces a null member)
+        patch.append({"op": "add", "path": "/shapes", "value": []})
+
+    for shape in upsert:
+        index = index_of.get(shape.get("id"))
+        if index is None:
+            patch.append({"op": "add", "path": "/shapes/-", "value": shape})
+        else:
+            patch.append({"op": "replace", "path": f"/shapes/{index}", "value": shape})
+
+    for index in sorted({index_of[shape_id] for shape_id in delete if shape_id in index_of}, reverse=True):
+        patch.append({"op": "remove", "path": f"/shapes/{index}"})
+
+    if connections is not None:
+        patch.append({"op": "add", "path": "/connections", "value": connections})
+    return patch
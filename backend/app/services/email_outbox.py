@@ -0,0 +1,244 @@
+"""
+Outbound email queue
+
+enqueue_email() inserts a message into email_outbox within the caller's
+transaction, so it is only sent if that transaction commits and is not
+lost if the worker restarts before sending. EmailDispatcher, a
+background thread per worker, claims due messages in batches with
+FOR UPDATE SKIP LOCKED (workers never claim the same row), sends them
+over one reused SMTP connection and reschedules failures with
+exponential backoff until EMAIL_MAX_ATTEMPTS. When the SMTP server can't
+be reached, the batch is rescheduled without counting the attempt, so an
+outage never makes messages give up.
+
+enqueue_template_email() stores only a template name, locale and the
+placeholder values; the message is rendered from the precompiled
+template (app.utils.email_templates) when it is sent.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.utils.email import build_message, create_transport, is_connection_failure, is_permanent_failure
+from app.utils.email_templates import email_templates
+from app.utils.metrics import EMAILS_DISPATCHED
+
+logger = logging.getLogger(__name__)
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", "5"))
+# A claimed message not marked sent/failed by then (worker died) is claimed again
+EMAIL_CLAIM_SECONDS = 300
+
+ENQUEUE_SQL = """
+INSERT INTO email_outbox
+    (recipient, subject, body, template, locale, context, status, attempts, next_attempt_at, created_at)
+VALUES
+    (:recipient, :subject, :body, :template, :locale, CAST(:context AS JSONB), 'pending', 0, now(), now())
+"""
+
+# Claiming pushes next_attempt_at past the send so a crashed worker's
+# messages come due again, and counts the attempt up front.
+CLAIM_SQL = """
+UPDATE email_outbox
+SET attempts = attempts + 1,
+    next_attempt_at = now() + make_interval(secs => :claim_seconds)
+WHERE id IN (
+    SELECT id FROM email_outbox
+    WHERE status = 'pending' AND next_attempt_at <= now()
+    ORDER BY next_attempt_at, id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING id, recipient, subject, body, template, locale, context, attempts
+"""
+
+MARK_SENT_SQL = """
+UPDATE email_outbox SET status = 'sent', sent_at = now(), last_error = NULL
+WHERE id = ANY(:ids)
+"""
+
+# refund is 1 for messages that were never handed to the server (its
+# connection failed), taking back the attempt CLAIM_SQL counted
+MARK_FAILED_SQL = """
+UPDATE email_outbox
+SET status = :status,
+    attempts = attempts - :refund,
+    last_error = :error,
+    next_attempt_at = now() + make_interval(secs => :delay)
+WHERE id = :id
+"""
+
+
+def enqueue_email(db: Session, to_email: str, subject: str, body: str):
+    """Queue an HTML email; it is sent after the caller commits"""
+    db.execute(text(ENQUEUE_SQL), {"recipient": to_email, "subject": subject, "body": body,
+                                   "template": None, "locale": None, "context": None})
+
+
+def enqueue_template_email(db: Session, to_email: str, template: str, values: dict,
+                           locale: Optional[str] = None):
+    """
+    Queue an email rendered from a template when it is sent
+
+    Args:
+        db: Session (the caller commits)
+        to_email: Recipient address
+        template: Template name, e.g. "password_reset"
+        values: Placeholder values (JSON-serializable)
+        locale: Preferred locale; falls back to the language, then the default
+
+    Raises:
+        KeyError: If the template does not exist or a placeholder has no value
+    """
+    compiled = email_templates.get(template, locale)
+    missing = set(compiled.placeholders) - set(values)
+    if missing:
+        raise KeyError(f"Missing values for email template {template!r}: {sorted(missing)}")
+    db.execute(text(ENQUEUE_SQL), {"recipient": to_email, "subject": compiled.subject, "body": None,
+                                   "template": template, "locale": compiled.locale,
+                                   "context": json.dumps(values)})
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next try of a message that failed attempts times"""
+    return min(EMAIL_RETRY_MAX_SECONDS, EMAIL_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+class EmailDispatcher(threading.Thread):
+    """Background thread sending queued emails"""
+
+    def __init__(self, session_factory: Callable[[], Session], transport_factory: Callable = create_transport,
+                 batch_size: int = EMAIL_BATCH_SIZE, poll_interval: float = EMAIL_POLL_SECONDS,
+                 max_attempts: int = EMAIL_MAX_ATTEMPTS):
+        super().__init__(name="email-dispatcher", daemon=True)
+        self.session_factory = session_factory
+        self.transport_factory = transport_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.server_unreachable = False
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def wake(self):
+        """Check the queue now instead of at the next poll"""
+        self._wake_event.set()
+
+    def stop(self):
+        """Ask the dispatcher to exit after its current batch"""
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        transport = self.transport_factory()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    claimed = self.dispatch_batch(transport)
+                except Exception:
+                    logger.exception("Email dispatch failed")
+                    claimed = 0
+                # Poll again right away only while full batches are going out
+                if claimed < self.batch_size or self.server_unreachable:
+                    transport.close_if_idle()
+                    self._wake_event.wait(self.poll_interval)
+                    self._wake_event.clear()
+        finally:
+            transport.close()
+
+    def dispatch_batch(self, transport) -> int:
+        """
+        Claim and send one batch of due messages
+
+        Returns:
+            int: Number of messages claimed
+        """
+        with self.session_factory() as db:
+            rows = db.execute(
+                text(CLAIM_SQL), {"limit": self.batch_size, "claim_seconds": EMAIL_CLAIM_SECONDS}
+            ).mappings().all()
+            db.commit()
+            if not rows:
+                return 0
+
+            sent_ids, failures = [], []
+            connection_error = None
+            for row in rows:
+                try:
+                    # Once the server is unreachable, the rest of the batch waits for the retry
+                    if connection_error is not None:
+                        raise connection_error
+                    self._send(transport, row)
+                except Exception as e:
+                    if is_connection_failure(e):
+                        connection_error = e
+                    # Not delivered to the server, so the attempt doesn't count
+                    not_sent = connection_error is not None
+                    attempts = row["attempts"] - 1 if not_sent else row["attempts"]
+                    give_up = not not_sent and (is_permanent_failure(e) or attempts >= self.max_attempts)
+                    failures.append({
+                        "id": row["id"],
+                        "status": "failed" if give_up else "pending",
+                        "refund": 1 if not_sent else 0,
+                        "error": str(e)[:1000],
+                        "delay": retry_delay(max(1, attempts)),
+                    })
+                    EMAILS_DISPATCHED.labels(outcome="failed" if give_up else "retry").inc()
+                    outcome = ", not counted" if not_sent else ", giving up" if give_up else ""
+                    logger.warning("Email %s to %s failed (attempt %s%s): %s", row["id"], row["recipient"],
+                                   row["attempts"], outcome, e)
+                else:
+                    sent_ids.append(row["id"])
+                    EMAILS_DISPATCHED.labels(outcome="sent").inc()
+
+            self.server_unreachable = connection_error is not None
+            if sent_ids:
+                db.execute(text(MARK_SENT_SQL), {"ids": sent_ids})
+            if failures:
+                db.execute(text(MARK_FAILED_SQL), failures)
+            db.commit()
+            return len(rows)
+
+    @staticmethod
+    def _send(transport, row):
+        if row.get("template"):
+            template = email_templates.get(row["template"], row["locale"])
+            data = template.render_message(row["recipient"], **row["context"])
+            transport.send_raw(template.sender, row["recipient"], data)
+        else:
+            transport.send(build_message(row["recipient"], row["subject"], row["body"]))
+
+
+_dispatcher: Optional[EmailDispatcher] = None
+
+
+def start_email_dispatcher(session_factory: Callable[[], Session]):
+    """Start this worker's email dispatcher"""
+    global _dispatcher
+    if _dispatcher is not None:
+        return
+    _dispatcher = EmailDispatcher(session_factory)
+    _dispatcher.start()
+
+
+def stop_email_dispatcher():
+    """Stop the email dispatcher if it is running"""
+    global _dispatcher
+    if _dispatcher is not None:
+        _dispatcher.stop()
+        _dispatcher = None
+
+
+def wake_email_dispatcher():
+    """Send newly committed emails now rather than at the next poll"""
+    if _dispatcher is not None:
+        _dispatcher.wake()
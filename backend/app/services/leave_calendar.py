@@ -0,0 +1,81 @@
+"""
+Team leave calendar
+
+Each leave request stores the dates it spans as a daterange (period)
+with a GiST index, so calendar views find the requests overlapping a
+month with `period && daterange(:start, :end, '[]')` instead of loading
+the whole history. The calendar query then expands the matching
+requests into one row per day someone is out.
+
+period comes from the request's `dates` list (local calendar days chosen
+in the UI) when present, otherwise from start_date / end_date.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import Range
+
+# Longest range one calendar request may cover
+MAX_CALENDAR_DAYS = 366
+
+# Days a request covers: its `dates` entries if it has any, else every
+# day of its period. Entries that are not ISO dates are ignored.
+LEAVE_CALENDAR_SQL = """
+SELECT d.day, r.id AS leave_request_id, r.user_id, r.user_name, r.leave_type, r.status, r.half_day_type
+FROM leave_requests r
+CROSS JOIN LATERAL (
+    SELECT to_date(left(x, 10), 'YYYY-MM-DD') AS day
+    FROM unnest(r.dates) AS x
+    WHERE x ~ '^\\d{{4}}-\\d{{2}}-\\d{{2}}'
+    UNION
+    SELECT g::date
+    FROM generate_series(lower(r.period), upper(r.period) - 1, interval '1 day') AS g
+    WHERE coalesce(cardinality(r.dates), 0) = 0
+) d
+WHERE r.period && daterange(:start, :end, '[]')
+  AND r.status = ANY(:statuses)
+  AND d.day BETWEEN :start AND :end
+  {team_filter}
+ORDER BY d.day, r.user_name, r.id
+"""
+
+TEAM_FILTER = "AND r.user_id IN (SELECT user_id FROM team_members WHERE team_id = :team_id)"
+
+
+def leave_period(dates: Optional[Iterable[str]], start_date: datetime, end_date: datetime) -> Range:
+    """Inclusive date range covered by a leave request"""
+    days = []
+    for value in dates or []:
+        try:
+            days.append(date.fromisoformat(value[:10]))
+        except (TypeError, ValueError):
+            continue
+    if not days:
+        days = [start_date.date(), end_date.date()]
+    return Range(min(days), max(days), bounds="[]")
+
+
+def build_calendar(rows: Iterable[dict], start: date, end: date) -> List[dict]:
+    """One entry per day of the range listing who is out, including empty days"""
+    out: Dict[date, List[dict]] = {}
+    for row in rows:
+        entry = {key: value for key, value in row.items() if key != "day"}
+        out.setdefault(row["day"], []).append(entry)
+    days = []
+    day = start
+    while day <= end:
+        days.append({"date": day, "out": out.get(day, [])})
+        day += timedelta(days=1)
+    return days
+
+
+async def get_leave_calendar(db, start: date, end: date, team_id: Optional[int] = None,
+                             statuses: Iterable[str] = ("approved",)) -> List[dict]:
+    """Who is out on each day from start to end (inclusive), optionally for one team"""
+    sql = LEAVE_CALENDAR_SQL.format(team_filter=TEAM_FILTER if team_id is not None else "")
+    params = {"start": start, "end": end, "statuses": list(statuses)}
+    if team_id is not None:
+        params["team_id"] = team_id
+    result = await db.execute(text(sql), params)
+    return build_calendar(result.mappings(), start, end)
@@ -0,0 +1,138 @@
+"""
+Leave ledger
+
+Every change to the leave a user has taken is appended to leave_ledger
+as a signed number of days. leave_balances.annual_used / sick_used are
+the per-user totals of that ledger, maintained in the same transaction
+with atomic `used = used + :days` upserts, so concurrent approvals
+cannot overwrite each other the way read-modify-write in Python could.
+
+reconcile_leave_balances() recomputes the totals from approved leave
+requests in one statement and books any drift as "reconcile" entries.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Leave types with a used counter in leave_balances
+BALANCE_COLUMNS = {"annual": "annual_used", "sick": "sick_used"}
+
+DEFAULT_ANNUAL_TOTAL = 15
+DEFAULT_SICK_TOTAL = 10
+
+
+def counted_leave(status: Optional[str], leave_type: str, days: float) -> Optional[Tuple[str, float]]:
+    """(leave type, days) a request in this state counts against its balance, if any"""
+    if status != "approved" or not days:
+        return None
+    return leave_type, days
+
+
+def post_leave_change(db: Session, user_id: int, user_name: str, before: Optional[Tuple[str, float]],
+                      after: Optional[Tuple[str, float]], reason: str,
+                      leave_request_id: Optional[int] = None) -> List[Tuple[str, float]]:
+    """
+    Book the difference between what a request counted before and after a change
+
+    Approving posts +days, rejecting/cancelling/deleting an approved
+    request posts -days, and editing an approved request posts the
+    difference. The caller commits, and must hold a row lock on the leave
+    request so two transitions of the same request cannot both post.
+
+    Args:
+        db: Session (the ledger and balance writes join its transaction)
+        user_id / user_name: Owner of the leave request
+        before / after: counted_leave() of the request before and after
+        reason: Ledger reason, e.g. "approved", "revoked", "deleted"
+        leave_request_id: Request the entries belong to
+
+    Returns:
+        list: (leave type, signed days) entries that were posted
+    """
+    deltas = {}
+    if before is not None:
+        deltas[before[0]] = deltas.get(before[0], 0) - before[1]
+    if after is not None:
+        deltas[after[0]] = deltas.get(after[0], 0) + after[1]
+
+    posted = []
+    for leave_type, days in deltas.items():
+        if not days:
+            continue
+        db.execute(text("""
+            INSERT INTO leave_ledger (user_id, leave_request_id, leave_type, days, reason, created_at)
+            VALUES (:user_id, :leave_request_id, :leave_type, :days, :reason, now())
+        """), {"user_id": user_id, "leave_request_id": leave_request_id,
+               "leave_type": leave_type, "days": days, "reason": reason})
+        column = BALANCE_COLUMNS.get(leave_type)
+        if column is not None:
+            _add_used(db, user_id, user_name, column, days)
+        posted.append((leave_type, days))
+    return posted
+
+
+def _add_used(db: Session, user_id: int, user_name: str, column: str, days: float):
+    """
+    Atomically add days to a balance counter, creating the balance if missing
+
+    One upsert, so two first approvals for the same user can't both try
+    to create the row.
+    """
+    used = {"annual_used": 0, "sick_used": 0, column: days}
+    db.execute(text(f"""
+        INSERT INTO leave_balances
+            (user_id, user_name, annual_total, annual_used, sick_total, sick_used, created_at, updated_at)
+        VALUES (:user_id, :user_name, :annual_total, :annual_used, :sick_total, :sick_used, now(), now())
+        ON CONFLICT (user_id) DO UPDATE
+        SET {column} = leave_balances.{column} + EXCLUDED.{column}, updated_at = now()
+    """), {"user_id": user_id, "user_name": user_name, **used,
+           "annual_total": DEFAULT_ANNUAL_TOTAL, "sick_total": DEFAULT_SICK_TOTAL})
+
+
+# Balances are adjusted by the drift (not set to the total) so approvals
+# committed while this runs are not lost.
+RECONCILE_SQL = """
+WITH actual AS (
+    SELECT user_id,
+           coalesce(sum(days) FILTER (WHERE leave_type = 'annual'), 0) AS annual,
+           coalesce(sum(days) FILTER (WHERE leave_type = 'sick'), 0) AS sick
+    FROM leave_requests
+    WHERE status = 'approved'
+    GROUP BY user_id
+),
+drift AS (
+    SELECT b.user_id,
+           coalesce(a.annual, 0) - b.annual_used AS annual_delta,
+           coalesce(a.sick, 0) - b.sick_used AS sick_delta
+    FROM leave_balances b
+    LEFT JOIN actual a ON a.user_id = b.user_id
+    WHERE b.annual_used <> coalesce(a.annual, 0) OR b.sick_used <> coalesce(a.sick, 0)
+),
+adjusted AS (
+    UPDATE leave_balances b
+    SET annual_used = b.annual_used + d.annual_delta,
+        sick_used = b.sick_used + d.sick_delta,
+        updated_at = now()
+    FROM drift d
+    WHERE b.user_id = d.user_id
+    RETURNING b.user_id, d.annual_delta, d.sick_delta
+)
+INSERT INTO leave_ledger (user_id, leave_type, days, reason, created_at)
+SELECT user_id, 'annual', annual_delta, 'reconcile', now() FROM adjusted WHERE annual_delta <> 0
+UNION ALL
+SELECT user_id, 'sick', sick_delta, 'reconcile', now() FROM adjusted WHERE sick_delta <> 0
+RETURNING user_id, leave_type, days
+"""
+
+
+def reconcile_leave_balances(db: Session) -> List[dict]:
+    """
+    Correct balance counters from approved leave requests
+
+    Returns:
+        list: Adjustments made, as dicts with user_id, leave_type and days
+    """
+    adjustments = [dict(row) for row in db.execute(text(RECONCILE_SQL)).mappings()]
+    db.commit()
+    return adjustments
@@ -0,0 +1,155 @@
+"""
+Org chart hierarchy
+
+Walks users.line_manager with a WITH RECURSIVE query and returns nested
+subtrees with span-of-control counts. The recursion always covers the
+whole subtree (only ids, so it stays cheap) so total report counts are
+exact, while full user columns are joined only for nodes within the
+requested depth.
+
+Built trees are cached per (root, depth), at most ORG_CHART_CACHE_SIZE of
+them, and dropped whenever a session commits a change to the hierarchy
+or to a column the nodes show (see watch_user_changes). With
+ORG_CHART_CACHE_NOTIFY enabled the commit also NOTIFYs the other uvicorn
+workers (see app.utils.notify) so they drop theirs too; otherwise the TTL
+bounds their staleness.
+"""
+import os
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from app.utils.cache import TTLCache
+from app.utils.notify import listen, notify
+
+ORG_CHART_CACHE_TTL = float(os.getenv("ORG_CHART_CACHE_TTL", "300"))
+# Keys come from the request (root_id, depth), so the cache is size-bounded
+ORG_CHART_CACHE_SIZE = int(os.getenv("ORG_CHART_CACHE_SIZE", "256"))
+ORG_CHART_CACHE_NOTIFY = os.getenv("ORG_CHART_CACHE_NOTIFY", "false").lower() in ("1", "true", "yes", "on")
+ORG_CHART_CHANNEL = "org_chart_changed"
+
+org_chart_cache = TTLCache(ttl=ORG_CHART_CACHE_TTL, maxsize=ORG_CHART_CACHE_SIZE)
+
+# Columns included for each node; never passwords or contact details
+NODE_COLUMNS = ("id", "name", "position", "role", "status", "avatar_url", "line_manager")
+
+# Starting points: the requested user, or every user without a (valid) manager.
+# The path array stops the walk if line_manager data ever contains a cycle.
+ORG_CHART_SQL = """
+WITH RECURSIVE tree (id, line_manager, depth, path) AS (
+    SELECT u.id, u.line_manager, 0, ARRAY[u.id]
+    FROM users u
+    WHERE CASE WHEN CAST(:root_id AS INTEGER) IS NULL
+        THEN u.line_manager IS NULL
+             OR NOT EXISTS (SELECT 1 FROM users m WHERE m.id = u.line_manager)
+        ELSE u.id = :root_id
+    END
+    UNION ALL
+    SELECT c.id, c.line_manager, t.depth + 1, t.path || c.id
+    FROM users c
+    JOIN tree t ON c.line_manager = t.id
+    WHERE c.id <> ALL(t.path)
+)
+SELECT t.id AS node_id, t.line_manager AS manager_id, t.depth, {columns}
+FROM tree t
+LEFT JOIN users u ON u.id = t.id AND (CAST(:max_depth AS INTEGER) IS NULL OR t.depth <= :max_depth)
+ORDER BY t.depth, u.name, t.id
+""".format(columns=", ".join(f"u.{column}" for column in NODE_COLUMNS))
+
+
+def build_org_tree(rows: List[dict], max_depth: Optional[int]) -> List[dict]:
+    """
+    Assemble CTE rows into nested nodes with span-of-control counts
+
+    Args:
+        rows: Dicts with node_id, manager_id, depth and NODE_COLUMNS
+              (column values may be None beyond max_depth)
+        max_depth: Deepest level to include, None for the whole subtree
+
+    Returns:
+        list: Root nodes, each with children, direct_reports and total_reports
+    """
+    children: Dict[int, List[int]] = {}
+    depth_of: Dict[int, int] = {}
+    for row in rows:
+        if row["node_id"] in depth_of:
+            continue  # reached through two roots; keep the first (shallowest)
+        depth_of[row["node_id"]] = row["depth"]
+        if row["depth"] > 0:
+            children.setdefault(row["manager_id"], []).append(row["node_id"])
+
+    # Subtree sizes, deepest nodes first so children are counted before parents
+    total: Dict[int, int] = {}
+    for node_id in sorted(depth_of, key=depth_of.get, reverse=True):
+        total[node_id] = sum(1 + total[child] for child in children.get(node_id, []))
+
+    nodes: Dict[int, dict] = {}
+    roots = []
+    for row in rows:
+        node_id = row["node_id"]
+        if node_id in nodes or (max_depth is not None and row["depth"] > max_depth):
+            continue
+        node = {column: row[column] for column in NODE_COLUMNS}
+        node["depth"] = row["depth"]
+        node["direct_reports"] = len(children.get(node_id, []))
+        node["total_reports"] = total[node_id]
+        node["children"] = []
+        nodes[node_id] = node
+        if row["depth"] == 0:
+            roots.append(node)
+        else:
+            nodes[row["manager_id"]]["children"].append(node)
+    return roots
+
+
+def get_org_chart(db: Session, root_id: Optional[int] = None, max_depth: Optional[int] = None) -> List[dict]:
+    """Org chart below root_id (or from the top), cached until users change"""
+    def load():
+        result = db.execute(text(ORG_CHART_SQL), {"root_id": root_id, "max_depth": max_depth})
+        return build_org_tree([dict(row) for row in result.mappings()], max_depth)
+
+    return org_chart_cache.get_or_load((root_id, max_depth), load)
+
+
+def changes_org_chart(session: Session, obj) -> bool:
+    """Whether flushing this user changes a cached tree (logins and password rehashes don't)"""
+    if obj in session.new or obj in session.deleted:
+        return True
+    attrs = inspect(obj).attrs
+    return any(attrs[column].history.has_changes() for column in NODE_COLUMNS if column in attrs.keys())
+
+
+def watch_user_changes(*user_models):
+    """
+    Invalidate the org chart cache when a session commits user changes
+    that affect the tree: added or deleted users, or a changed
+    line_manager or other NODE_COLUMNS
+
+    Flushes only mark the session (and queue one NOTIFY for the other
+    workers on the same transaction); the cache is cleared after the
+    commit so a concurrent reader can't re-cache the pre-commit hierarchy.
+    """
+    @event.listens_for(Session, "after_flush")
+    def mark_user_changes(session, flush_context):
+        if session.info.get("org_chart_dirty"):
+            return
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, user_models) and changes_org_chart(session, obj):
+                session.info["org_chart_dirty"] = True
+                if ORG_CHART_CACHE_NOTIFY:
+                    notify(session.connection(), ORG_CHART_CHANNEL)
+                return
+
+    @event.listens_for(Session, "after_commit")
+    def invalidate_after_commit(session):
+        if session.info.pop("org_chart_dirty", False):
+            org_chart_cache.invalidate()
+
+    @event.listens_for(Session, "after_rollback")
+    def forget_after_rollback(session):
+        session.info.pop("org_chart_dirty", None)
+
+
+if ORG_CHART_CACHE_NOTIFY:
+    listen(ORG_CHART_CHANNEL, lambda payload: org_chart_cache.invalidate())
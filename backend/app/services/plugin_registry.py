@@ -0,0 +1,113 @@
+"""
+Plugin registry
+
+Loads every plugins/*/plugin.json once and serves the plugin list and
+asset paths from memory. The registry re-scans only when the mtime of
+the plugins directory, a plugin folder or a plugin.json changes (checked
+at most every `check_interval` seconds), or when reload() is called.
+"""
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PluginEntry:
+    """A configured plugin folder and its parsed manifest"""
+
+    def __init__(self, folder: str, directory: Path, manifest: dict, files: Dict[str, Path]):
+        self.folder = folder
+        self.directory = directory
+        self.manifest = manifest
+        self.files = files
+
+
+class PluginRegistry:
+    """In-memory index of plugin manifests keyed by folder name"""
+
+    def __init__(self, plugins_dir: Path, check_interval: float = 2.0):
+        self.plugins_dir = plugins_dir
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, PluginEntry] = {}
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self.loads = 0
+
+    def _scan_signature(self) -> Tuple:
+        """mtimes of the plugins dir, each plugin folder and each plugin.json"""
+        if not self.plugins_dir.exists():
+            return ()
+        parts = [self.plugins_dir.stat().st_mtime_ns]
+        for plugin_dir in sorted(self.plugins_dir.iterdir()):
+            if not plugin_dir.is_dir():
+                continue
+            plugin_json = plugin_dir / "plugin.json"
+            manifest_mtime = plugin_json.stat().st_mtime_ns if plugin_json.exists() else None
+            parts.append((plugin_dir.name, plugin_dir.stat().st_mtime_ns, manifest_mtime))
+        return tuple(parts)
+
+    def _load(self) -> Dict[str, PluginEntry]:
+        """Parse every plugin.json under plugins_dir"""
+        entries = {}
+        if not self.plugins_dir.exists():
+            logger.warning("PLUGINS_DIR %s does not exist", self.plugins_dir)
+            return entries
+
+        for plugin_dir in self.plugins_dir.iterdir():
+            if not plugin_dir.is_dir():
+                continue
+            plugin_json = plugin_dir / "plugin.json"
+            if not plugin_json.exists():
+                continue
+            try:
+                with open(plugin_json, 'r') as f:
+                    manifest = json.load(f)
+            except Exception as e:
+                logger.error("Error loading plugin %s: %s", plugin_dir.name, e)
+                continue
+
+            declared = manifest.get('files') or {}
+            files = {kind: plugin_dir / name for kind, name in declared.items() if isinstance(name, str)}
+            files.setdefault('html', plugin_dir / 'index.html')
+            entries[plugin_dir.name] = PluginEntry(plugin_dir.name, plugin_dir, manifest, files)
+        return entries
+
+    def reload(self) -> int:
+        """Force a full re-scan and return the number of plugins loaded"""
+        with self._lock:
+            self._signature = self._scan_signature()
+            self._entries = self._load()
+            self._checked_at = time.monotonic()
+            self.loads += 1
+            return len(self._entries)
+
+    def _refresh_if_changed(self):
+        """Re-scan when the on-disk signature differs from the loaded one"""
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return
+        signature = self._scan_signature()
+        with self._lock:
+            self._checked_at = now
+            if signature == self._signature:
+                return
+        self.reload()
+
+    def list_entries(self) -> List[PluginEntry]:
+        """All configured plugins"""
+        self._refresh_if_changed()
+        return list(self._entries.values())
+
+    def list_manifests(self) -> List[dict]:
+        """All parsed plugin.json documents"""
+        return [entry.manifest for entry in self.list_entries()]
+
+    def get(self, plugin_id: str) -> Optional[PluginEntry]:
+        """Look up a configured plugin by folder name"""
+        self._refresh_if_changed()
+        return self._entries.get(plugin_id)
@@ -0,0 +1,67 @@
+"""
+Settings cache with cross-worker invalidation
+
+Settings (task types, priorities, KPI data, ...) are read on every page
+load but change rarely, so lookups are served from an in-process TTL
+cache. Writers invalidate their own worker's cache directly; when
+SETTINGS_CACHE_NOTIFY is enabled they also publish the changed key on a
+Postgres NOTIFY channel (see app.utils.notify) so every other uvicorn
+worker drops it too.
+"""
+import os
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.utils.cache import TTLCache
+from app.utils.notify import listen, notify
+
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "60"))
+SETTINGS_CACHE_NOTIFY = os.getenv("SETTINGS_CACHE_NOTIFY", "false").lower() in ("1", "true", "yes", "on")
+SETTINGS_CHANNEL = "settings_changed"
+
+# Cache keys: ("key", <setting key>) for single rows, ALL_SETTINGS for the list
+ALL_SETTINGS = ("all",)
+
+settings_cache = TTLCache(ttl=SETTINGS_CACHE_TTL)
+
+
+def setting_key(key: str) -> tuple:
+    """Cache key for a single setting row"""
+    return ("key", key)
+
+
+def snapshot_setting(setting) -> Optional[dict]:
+    """Detach a Setting row into a plain dict that is safe to cache"""
+    if setting is None:
+        return None
+    return {
+        "id": setting.id,
+        "key": setting.key,
+        "value": setting.value,
+        "description": setting.description,
+        "updated_at": setting.updated_at,
+    }
+
+
+def publish_setting_change(db: Session, key: str):
+    """
+    Queue a NOTIFY for the changed key on the current transaction
+
+    Postgres only delivers the notification if the transaction commits,
+    so call this before db.commit().
+    """
+    if SETTINGS_CACHE_NOTIFY:
+        notify(db, SETTINGS_CHANNEL, key)
+
+
+def invalidate_setting(key: Optional[str] = None):
+    """Drop one setting (and the all-settings list) from this worker's cache"""
+    if key is None:
+        settings_cache.invalidate()
+    else:
+        settings_cache.invalidate(setting_key(key), ALL_SETTINGS)
+
+
+if SETTINGS_CACHE_NOTIFY:
+    listen(SETTINGS_CHANNEL, invalidate_setting)
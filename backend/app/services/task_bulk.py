@@ -0,0 +1,162 @@
+"""
+Bulk task operations
+
+Applies a batch of task creates, partial updates and deletes inside the
+caller's transaction with one statement per kind of change instead of one
+SELECT / UPDATE / COMMIT per task:
+
+- creates: a single multi-row INSERT ... RETURNING id
+- updates: one executemany UPDATE per distinct set of changed fields,
+  with the per-row values supplied through bindparam()
+- deletes: a single DELETE ... WHERE id IN (...) RETURNING id
+
+Functions work on the Core Table so they can be used with either copy of
+the Task model. apply_task_batch() runs a whole POST /api/tasks/bulk
+request and builds its per-item results.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Table, bindparam, delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.utils.instrumentation import timed_phase
+
+logger = logging.getLogger(__name__)
+
+# Prefix for bind parameter names; SQLAlchemy reserves the bare column
+# names for the automatic SET clause
+_BIND_PREFIX = "b_"
+
+
+def group_updates(updates: Sequence[dict]) -> Dict[FrozenSet[str], List[dict]]:
+    """
+    Group partial updates by the set of fields they change
+
+    Each group can be sent as one executemany UPDATE because every row in
+    it binds the same parameters.
+
+    Args:
+        updates: Dicts with an "id" key plus the fields to change
+
+    Returns:
+        dict: frozenset of field names -> list of update dicts
+    """
+    groups: Dict[FrozenSet[str], List[dict]] = {}
+    for item in updates:
+        fields = frozenset(key for key in item if key != "id")
+        groups.setdefault(fields, []).append(item)
+    return groups
+
+
+def bulk_create(db: Session, table: Table, rows: Sequence[dict]) -> List[int]:
+    """Insert rows in one multi-row INSERT and return their ids in input order"""
+    if not rows:
+        return []
+    stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    return [row.id for row in db.execute(stmt, list(rows))]
+
+
+def bulk_update(db: Session, table: Table, updates: Sequence[dict], touch: str = "updated_at") -> List[int]:
+    """
+    Apply partial updates to existing rows and return the ids that were found
+
+    The target rows are locked with SELECT ... FOR UPDATE first so missing
+    ids can be reported per item; the updates themselves are sent as one
+    executemany per field set.
+
+    Args:
+        db: Session whose transaction the changes join
+        table: Table to update
+        updates: Dicts with an "id" key plus the fields to change
+        touch: Timestamp column set to the same value for every updated row
+    """
+    if not updates:
+        return []
+
+    ids = {item["id"] for item in updates}
+    existing = set(db.execute(
+        select(table.c.id).where(table.c.id.in_(ids)).with_for_update()
+    ).scalars())
+
+    now = datetime.utcnow()
+    found = [item for item in updates if item["id"] in existing]
+    for fields, items in group_updates(found).items():
+        columns = set(fields)
+        if touch:
+            columns.add(touch)
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam(_BIND_PREFIX + "id"))
+            .values({column: bindparam(_BIND_PREFIX + column) for column in columns})
+        )
+        params = []
+        for item in items:
+            row = {_BIND_PREFIX + key: value for key, value in item.items()}
+            if touch:
+                row.setdefault(_BIND_PREFIX + touch, now)
+            params.append(row)
+        db.execute(stmt, params)
+
+    return sorted(existing)
+
+
+def bulk_delete(db: Session, table: Table, ids: Sequence[int]) -> List[int]:
+    """Delete rows by id in one statement and return the ids that existed"""
+    if not ids:
+        return []
+    stmt = delete(table).where(table.c.id.in_(set(ids))).returning(table.c.id)
+    return sorted(db.execute(stmt).scalars())
+
+
+def apply_task_batch(db: Session, table: Table, creates: Sequence[dict], updates: Sequence[dict],
+                     deletes: Sequence[int], atomic: bool = False) -> Dict[str, List[dict]]:
+    """
+    Apply creates, updates and deletes in the session's transaction
+
+    The caller commits. Updates and deletes of missing rows are reported
+    as "not_found" per item.
+
+    Returns:
+        dict: "created", "updated" and "deleted" lists of {index, id, status}
+
+    Raises:
+        HTTPException: 400 if a statement fails, 409 if atomic and any
+            target was missing; the transaction is rolled back in both cases
+    """
+    try:
+        with timed_phase("create"):
+            created_ids = bulk_create(db, table, creates)
+        with timed_phase("update"):
+            updated_ids = set(bulk_update(db, table, updates))
+        with timed_phase("delete"):
+            deleted_ids = set(bulk_delete(db, table, deletes))
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning("Bulk task operation failed: %s", getattr(e, "orig", e))
+        raise HTTPException(status_code=400, detail="Bulk task operation failed, no changes were applied")
+
+    result = {
+        "created": [{"index": i, "id": row_id, "status": "created"} for i, row_id in enumerate(created_ids)],
+        "updated": [
+            {"index": i, "id": item["id"], "status": "updated" if item["id"] in updated_ids else "not_found"}
+            for i, item in enumerate(updates)
+        ],
+        "deleted": [
+            {"index": i, "id": row_id, "status": "deleted" if row_id in deleted_ids else "not_found"}
+            for i, row_id in enumerate(deletes)
+        ],
+    }
+
+    missing = [item for item in result["updated"] + result["deleted"] if item["status"] == "not_found"]
+    if atomic and missing:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Some tasks were not found, no changes were applied",
+                    "not_found": sorted({item["id"] for item in missing})}
+        )
+    return result
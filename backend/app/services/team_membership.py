@@ -0,0 +1,75 @@
+"""
+Team membership
+
+Set-based membership changes: replacing a team's members is one DELETE of
+the members no longer listed plus one INSERT ... SELECT FROM users ... ON
+CONFLICT DO NOTHING, so unknown user ids are skipped and existing
+memberships (with their created_at) are kept without per-id lookups.
+
+Functions work on the Core Tables so they can be used with either copy of
+the Team models.
+"""
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Table, delete, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+MEMBERSHIP_CONSTRAINT = "unique_team_member"
+
+
+def group_roster(rows: Iterable[Tuple[Any, Optional[Any]]]) -> List[Tuple[Any, List[Any]]]:
+    """
+    Group (team, user) rows from a team/member outer join
+
+    Args:
+        rows: Rows ordered by team; user is None for a team without members
+
+    Returns:
+        list: (team, members) pairs in first-seen team order
+    """
+    roster = {}
+    for team, user in rows:
+        members = roster.setdefault(team.id, (team, []))[1]
+        if user is not None:
+            members.append(user)
+    return list(roster.values())
+
+
+def _insert_members(members: Table, users: Table, team_id: int, user_filter):
+    """INSERT ... SELECT of existing users, skipping current memberships"""
+    return (
+        pg_insert(members)
+        .from_select(["team_id", "user_id"], select(literal(team_id), users.c.id).where(user_filter))
+        .on_conflict_do_nothing(constraint=MEMBERSHIP_CONSTRAINT)
+    )
+
+
+def add_member(db: Session, members: Table, users: Table, team_id: int, user_id: int) -> Optional[int]:
+    """
+    Add one member
+
+    Returns:
+        int: The new membership id, or None if the user doesn't exist or
+            is already a member
+    """
+    stmt = _insert_members(members, users, team_id, users.c.id == user_id).returning(members.c.id)
+    return db.execute(stmt).scalar()
+
+
+def replace_members(db: Session, members: Table, users: Table, team_id: int,
+                    member_ids: Sequence[int]) -> Tuple[int, int]:
+    """
+    Make member_ids the team's members in two statements
+
+    Returns:
+        tuple: (added, removed) membership counts
+    """
+    member_ids = sorted(set(member_ids))
+    removed = db.execute(
+        delete(members).where(members.c.team_id == team_id, members.c.user_id.not_in(member_ids))
+    ).rowcount
+    added = len(db.execute(
+        _insert_members(members, users, team_id, users.c.id.in_(member_ids)).returning(members.c.user_id)
+    ).all())
+    return added, removed
@@ -0,0 +1,194 @@
+"""
+Tenant usage counters
+
+tenant_usage holds one row per tenant with its user, task and team counts
+and storage bytes (stored diagram_data size plus attachments). Database triggers
+(migration 012) keep it current with `counter = counter + delta` upserts
+on every insert and delete, so reading usage is a primary-key lookup
+instead of a COUNT(*) over each table.
+
+reconcile_tenant_usage() recomputes the totals in one statement and adds
+the drift to the counters (rather than overwriting them, which would lose
+changes committed while it runs). Run it nightly.
+
+The counters are only trustworthy once migration 012 has installed the
+triggers (create_all makes the table without them), so readers check
+usage_triggers_installed() and fall back to count_tenant_usage().
+"""
+import logging
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+BYTES_PER_MB = 1024 * 1024
+
+COUNTERS = ("users_count", "tasks_count", "teams_count", "storage_bytes")
+
+# Installed by migration 012 (attachments_usage_storage only where that table exists)
+USAGE_TRIGGERS = (
+    "users_usage_insert", "users_usage_delete", "users_usage_move",
+    "tasks_usage_insert", "tasks_usage_delete", "tasks_usage_move",
+    "teams_usage_insert", "teams_usage_delete", "teams_usage_move",
+    "diagrams_usage_storage",
+)
+
+TRIGGERS_INSTALLED_SQL = """
+SELECT count(DISTINCT tgname) = :expected FROM pg_trigger
+WHERE NOT tgisinternal AND tgname = ANY(:names)
+"""
+
+COUNT_USAGE_SQL = """
+SELECT (SELECT count(*) FROM users WHERE tenant_id = :tenant_id) AS users_count,
+       (SELECT count(*) FROM tasks WHERE tenant_id = :tenant_id) AS tasks_count,
+       (SELECT count(*) FROM teams WHERE tenant_id = :tenant_id) AS teams_count,
+       (SELECT coalesce(sum(pg_column_size(d.diagram_data)), 0)
+        FROM diagrams d JOIN users u ON u.id = d.created_by WHERE u.tenant_id = :tenant_id)
+       + {attachment_bytes} AS storage_bytes
+"""
+
+ATTACHMENT_BYTES = "(SELECT coalesce(sum(file_size), 0) FROM attachments WHERE tenant_id = :tenant_id)"
+
+ATTACHMENT_STORAGE_JOIN = """
+    LEFT JOIN (SELECT tenant_id, sum(file_size) AS bytes FROM attachments GROUP BY tenant_id) a
+        ON a.tenant_id = t.id
+"""
+
+RECONCILE_SQL = """
+WITH actual AS (
+    SELECT t.id AS tenant_id,
+           coalesce(u.n, 0) AS users_count,
+           coalesce(k.n, 0) AS tasks_count,
+           coalesce(m.n, 0) AS teams_count,
+           coalesce(d.bytes, 0) + {attachment_bytes} AS storage_bytes
+    FROM tenants t
+    LEFT JOIN (SELECT tenant_id, count(*) AS n FROM users GROUP BY tenant_id) u ON u.tenant_id = t.id
+    LEFT JOIN (SELECT tenant_id, count(*) AS n FROM tasks GROUP BY tenant_id) k ON k.tenant_id = t.id
+    LEFT JOIN (SELECT tenant_id, count(*) AS n FROM teams GROUP BY tenant_id) m ON m.tenant_id = t.id
+    LEFT JOIN (
+        SELECT owner.tenant_id, sum(pg_column_size(x.diagram_data)) AS bytes
+        FROM diagrams x JOIN users owner ON owner.id = x.created_by
+        GROUP BY owner.tenant_id
+    ) d ON d.tenant_id = t.id
+    {attachment_join}
+),
+drift AS (
+    SELECT a.tenant_id,
+           a.users_count - coalesce(c.users_count, 0) AS users_count,
+           a.tasks_count - coalesce(c.tasks_count, 0) AS tasks_count,
+           a.teams_count - coalesce(c.teams_count, 0) AS teams_count,
+           a.storage_bytes - coalesce(c.storage_bytes, 0) AS storage_bytes
+    FROM actual a
+    LEFT JOIN tenant_usage c ON c.tenant_id = a.tenant_id
+    WHERE c.tenant_id IS NULL
+       OR (a.users_count, a.tasks_count, a.teams_count, a.storage_bytes)
+          IS DISTINCT FROM (c.users_count, c.tasks_count, c.teams_count, c.storage_bytes)
+),
+adjusted AS (
+    INSERT INTO tenant_usage AS u
+        (tenant_id, users_count, tasks_count, teams_count, storage_bytes, updated_at, reconciled_at)
+    SELECT tenant_id, users_count, tasks_count, teams_count, storage_bytes, now(), now()
+    FROM drift
+    ORDER BY tenant_id
+    ON CONFLICT (tenant_id) DO UPDATE
+    SET users_count = u.users_count + EXCLUDED.users_count,
+        tasks_count = u.tasks_count + EXCLUDED.tasks_count,
+        teams_count = u.teams_count + EXCLUDED.teams_count,
+        storage_bytes = u.storage_bytes + EXCLUDED.storage_bytes,
+        updated_at = now(),
+        reconciled_at = now()
+    RETURNING tenant_id
+)
+SELECT d.tenant_id, d.users_count, d.tasks_count, d.teams_count, d.storage_bytes
+FROM drift d JOIN adjusted USING (tenant_id)
+ORDER BY d.tenant_id
+"""
+
+MARK_RECONCILED_SQL = "UPDATE tenant_usage SET reconciled_at = now()"
+
+
+def reconcile_sql(include_attachments: bool) -> str:
+    """RECONCILE_SQL, counting attachments only where the table exists"""
+    if include_attachments:
+        return RECONCILE_SQL.format(attachment_bytes="coalesce(a.bytes, 0)", attachment_join=ATTACHMENT_STORAGE_JOIN)
+    return RECONCILE_SQL.format(attachment_bytes="0", attachment_join="")
+
+
+def _has_attachments(db: Session) -> bool:
+    return bool(db.execute(text("SELECT to_regclass('attachments') IS NOT NULL")).scalar())
+
+
+# Once seen installed, the triggers are assumed to stay
+_triggers_installed = False
+
+
+def usage_triggers_installed(db: Session) -> bool:
+    """Whether migration 012's counter triggers exist (cached once they do)"""
+    global _triggers_installed
+    if not _triggers_installed:
+        _triggers_installed = bool(db.execute(
+            text(TRIGGERS_INSTALLED_SQL), {"names": list(USAGE_TRIGGERS), "expected": len(USAGE_TRIGGERS)}
+        ).scalar())
+    return _triggers_installed
+
+
+def count_tenant_usage(db: Session, tenant_id: int):
+    """
+    Count one tenant's usage from the tables themselves
+
+    Returns:
+        Row: users_count, tasks_count, teams_count and storage_bytes
+    """
+    attachment_bytes = ATTACHMENT_BYTES if _has_attachments(db) else "0"
+    return db.execute(text(COUNT_USAGE_SQL.format(attachment_bytes=attachment_bytes)), {"tenant_id": tenant_id}).one()
+
+
+def current_usage(db: Session, tenant_id: int, counters: Optional[object]):
+    """
+    The tenant's counters, or a fresh count when they can't be trusted
+
+    Missing triggers are logged as a warning, since the counters are stale
+    until migration 012 runs. A tenant nothing has been counted for yet
+    has no row, which is normal.
+    """
+    if not usage_triggers_installed(db):
+        logger.warning("tenant_usage triggers are missing; counting usage for tenant %s. "
+                       "Run alembic upgrade head and reconcile_tenant_usage.py", tenant_id)
+    elif counters is not None:
+        return counters
+    else:
+        logger.info("No tenant_usage row for tenant %s; counting usage", tenant_id)
+    return count_tenant_usage(db, tenant_id)
+
+
+def reconcile_tenant_usage(db: Session) -> List[dict]:
+    """
+    Correct the usage counters from the tables they count
+
+    Returns:
+        list: Adjustments made, as dicts with tenant_id and the delta per counter
+    """
+    adjustments = [dict(row) for row in db.execute(text(reconcile_sql(_has_attachments(db)))).mappings()]
+    db.execute(text(MARK_RECONCILED_SQL))
+    db.commit()
+    return adjustments
+
+
+def usage_summary(plan, usage: Optional[object]) -> dict:
+    """
+    Usage against plan limits, as shown on the billing page
+
+    Args:
+        plan: The tenant's plan
+        usage: Counters from current_usage()
+    """
+    counts = {counter: getattr(usage, counter, None) or 0 for counter in COUNTERS}
+    return {
+        "users": {"current": counts["users_count"], "limit": plan.max_users},
+        "tasks": {"current": counts["tasks_count"], "limit": plan.max_tasks},
+        "teams": {"current": counts["teams_count"], "limit": plan.max_teams},
+        "storage_mb": {"current": round(counts["storage_bytes"] / BYTES_PER_MB, 2), "limit": plan.max_storage_mb},
+        "projects": {"current": 0, "limit": plan.max_projects}
+    }
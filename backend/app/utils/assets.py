@@ -0,0 +1,255 @@
+"""
+Static asset serving with content-hash validators
+
+Plugin assets are served with a strong ETag derived from the file
+content, a Last-Modified header and a Cache-Control policy. Conditional
+requests (If-None-Match / If-Modified-Since) are answered with 304 so
+browsers only re-download a plugin bundle when it actually changed, and
+versioned URLs that embed the content hash can be cached as immutable.
+
+Text assets can be precompressed ahead of time (precompress_tree) into
+.gz / .br siblings; asset_response() then negotiates Accept-Encoding and
+streams the matching sibling without compressing per request.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+# Length of the hex content hash used in ETags and versioned URLs
+ASSET_HASH_LENGTH = 16
+
+# Versioned URLs never change content, everything else must revalidate
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Precompression settings
+COMPRESSIBLE_SUFFIXES = {'.js', '.css', '.html', '.json', '.svg', '.txt'}
+MIN_COMPRESS_SIZE = 1024
+# Content-Encoding -> sibling file suffix, in server preference order
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+logger = logging.getLogger(__name__)
+
+
+class AssetInfo:
+    """Validators for one file, valid while its mtime and size are unchanged"""
+
+    def __init__(self, path: Path, content_hash: str, mtime_ns: int, size: int, mtime: float):
+        self.path = path
+        self.content_hash = content_hash
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.mtime = mtime
+        self.etag = f'"{content_hash}"'
+        self.last_modified = formatdate(mtime, usegmt=True)
+
+
+_asset_cache: Dict[Path, AssetInfo] = {}
+_asset_cache_lock = threading.Lock()
+
+
+def get_asset_info(path: Path) -> AssetInfo:
+    """
+    Return content hash and validators for a file
+
+    The file is hashed once and re-hashed only when its mtime or size
+    changes, so steady-state requests cost a single stat().
+    """
+    stat = path.stat()
+    with _asset_cache_lock:
+        cached = _asset_cache.get(path)
+    if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+        return cached
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+
+    info = AssetInfo(
+        path,
+        digest.hexdigest()[:ASSET_HASH_LENGTH],
+        stat.st_mtime_ns,
+        stat.st_size,
+        stat.st_mtime
+    )
+    with _asset_cache_lock:
+        _asset_cache[path] = info
+    return info
+
+
+def is_asset_hash(value: str) -> bool:
+    """Check whether a path segment looks like a content hash we issued"""
+    return len(value) == ASSET_HASH_LENGTH and all(c in "0123456789abcdef" for c in value)
+
+
+def is_not_modified(request: Request, etag: str, info: AssetInfo) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against an asset"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(info.mtime) <= since.timestamp()
+
+    return False
+
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    """Compress data with the maximum ratio for the given encoding"""
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def available_encodings() -> List[str]:
+    """Encodings we can produce, in preference order"""
+    return [encoding for encoding in ENCODING_SUFFIXES if encoding != "br" or brotli is not None]
+
+
+def precompress_file(path: Path) -> List[str]:
+    """
+    Write .br / .gz siblings for one file if they are missing or stale
+
+    Siblings get the source file's mtime so freshness can be checked
+    with a single stat() at request time.
+
+    Returns:
+        list: Encodings that were (re)written
+    """
+    stat = path.stat()
+    if path.suffix.lower() not in COMPRESSIBLE_SUFFIXES or stat.st_size < MIN_COMPRESS_SIZE:
+        return []
+
+    data = None
+    written = []
+    for encoding in available_encodings():
+        variant = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+        if variant.exists() and variant.stat().st_mtime_ns == stat.st_mtime_ns:
+            continue
+        if data is None:
+            data = path.read_bytes()
+        compressed = _compress(encoding, data)
+        if len(compressed) >= len(data) * 0.9:
+            continue  # not worth a Content-Encoding
+        # Every uvicorn worker precompresses at startup; keep temp files apart
+        tmp = variant.with_name(f"{variant.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(compressed)
+        os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        tmp.replace(variant)
+        written.append(encoding)
+    return written
+
+
+def precompress_tree(root: Path) -> dict:
+    """
+    Precompress every compressible asset below root
+
+    Errors on individual files (e.g. a read-only mount) are logged and
+    skipped so startup never fails because of them.
+    """
+    stats = {"files": 0, "written": 0, "errors": 0}
+    if not root.exists():
+        return stats
+
+    for path in root.rglob("*"):
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+            continue
+        stats["files"] += 1
+        try:
+            stats["written"] += len(precompress_file(path))
+        except OSError as e:
+            stats["errors"] += 1
+            logger.warning("Could not precompress %s: %s", path, e)
+    return stats
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}"""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate_precompressed(request: Request, path: Path, info: AssetInfo) -> Tuple[Optional[str], Path]:
+    """
+    Pick a fresh precompressed sibling the client accepts
+
+    Returns:
+        tuple: (Content-Encoding or None, file to send)
+    """
+    if path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+        return None, path
+
+    accepted = parse_accept_encoding(request.headers.get("accept-encoding"))
+    for encoding, suffix in ENCODING_SUFFIXES.items():
+        if accepted.get(encoding, accepted.get("*", 0.0)) <= 0:
+            continue
+        variant = path.with_name(path.name + suffix)
+        try:
+            if variant.stat().st_mtime_ns == info.mtime_ns:
+                return encoding, variant
+        except FileNotFoundError:
+            continue
+    return None, path
+
+
+def asset_response(request: Request, path: Path, media_type: str, immutable: bool = False) -> Response:
+    """
+    Serve a file with ETag / Last-Modified / Cache-Control, or a 304
+
+    Args:
+        request: Incoming request (for conditional headers)
+        path: File to serve
+        media_type: Content-Type of the file
+        immutable: True for versioned URLs whose content can never change
+    """
+    info = get_asset_info(path)
+    encoding, send_path = negotiate_precompressed(request, path, info)
+
+    # Each encoded representation needs its own strong ETag
+    etag = info.etag if encoding is None else f'"{info.content_hash}-{ENCODING_SUFFIXES[encoding][1:]}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": info.last_modified,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    }
+    if path.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+        headers["Vary"] = "Accept-Encoding"
+
+    if is_not_modified(request, etag, info):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(send_path, media_type=media_type, headers=headers)
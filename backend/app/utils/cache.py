@@ -0,0 +1,139 @@
+"""
+In-process caching utilities
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with per-entry expiry
+
+    Values computed by get_or_load() are only stored if no invalidation
+    happened while they were being loaded, so a reader racing a writer
+    can't put a stale row back into the cache after it was invalidated.
+    With maxsize set, the least recently used entries are dropped beyond
+    it, for caches whose keys come from requests.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic, maxsize: Optional[int] = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling loader() on a miss
+
+        Args:
+            key: Cache key
+            loader: Zero-argument callable producing the value (may return None)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            if self.ttl > 0 and generation == self._generation:
+                self._entries[key] = (self._clock() + self.ttl, value)
+                self._entries.move_to_end(key)
+                if self.maxsize is not None:
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *keys: Hashable):
+        """Drop the given keys, or every entry when called without keys"""
+        with self._lock:
+            self._generation += 1
+            if keys:
+                for key in keys:
+                    self._entries.pop(key, None)
+            else:
+                self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl_seconds": self.ttl,
+            }
+
+
+
+class ExpiringLRUCache:
+    """
+    Thread-safe LRU cache whose entries each carry their own expiry time
+
+    For values that are valid until a known moment (e.g. a decoded token
+    until its exp), rather than for a fixed TTL after loading.
+    """
+
+    def __init__(self, maxsize: int, clock: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value for key, or None if missing or expired"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, expires_at: float):
+        """Store value until expires_at (same clock), evicting the least recently used entry"""
+        if self.maxsize <= 0 or expires_at <= self._clock():
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "maxsize": self.maxsize,
+            }
@@ -1,57 +1,163 @@
 """
 Email utilities
+
+SMTPConnection keeps one authenticated SMTP session open and reuses it
+for consecutive messages, reconnecting when the server has dropped it.
+Request handlers don't send mail themselves; they queue it with
+app.services.email_outbox and its background dispatcher sends it.
+
+EMAIL_BACKEND=log writes messages to the application log instead of
+sending them (the default when no SMTP credentials are set). To see real
+SMTP traffic locally, run a debugging server such as
+`python -m aiosmtpd -n -l localhost:1025` and set EMAIL_BACKEND=smtp,
+SMTP_SERVER=localhost, SMTP_PORT=1025, SMTP_STARTTLS=false.
 """
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import logging
 import os
+import smtplib
+import time
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
 
 # Email Configuration
-SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+SMTP_SERVER = os.getenv("SMTP_SERVER") or "smtp.gmail.com"
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_FROM = os.getenv("SMTP_FROM") or SMTP_USERNAME or "noreply@localhost"
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes", "on")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+# The pooled connection is closed after this many idle seconds
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "smtp" if SMTP_USERNAME and SMTP_PASSWORD else "log")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
 
-def send_email(to_email: str, subject: str, body: str) -> bool:
-    """
-    Send email using SMTP
-
-    Args:
-        to_email: Recipient email address
-        subject: Email subject
-        body: Email body (HTML supported)
-
-    Returns:
-        bool: True if successful, False otherwise
-    """
-    try:
-        # For development: just print the email content
-        if not SMTP_USERNAME or not SMTP_PASSWORD:
-            print(f"\n{'='*50}")
-            print(f"📧 EMAIL (Development Mode)")
-            print(f"{'='*50}")
-            print(f"To: {to_email}")
-            print(f"Subject: {subject}")
-            print(f"\n{body}")
-            print(f"{'='*50}\n")
-            return True
-
-        # Production: send actual email
-        msg = MIMEMultipart()
-        msg['From'] = SMTP_USERNAME
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'html'))
-
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        server.send_message(msg)
-        server.quit()
+def build_message(to_email: str, subject: str, body: str, sender: str = SMTP_FROM) -> EmailMessage:
+    """HTML email ready for SMTPConnection.send()"""
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.set_content(body, subtype="html")
+    return message
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """True for errors retrying will not fix, e.g. a rejected recipient or malformed message"""
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, ValueError)):
         return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False  # fixed by correcting the credentials, not by the message
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+def is_connection_failure(error: Exception) -> bool:
+    """True if the server could not be reached, as opposed to it rejecting one message"""
+    return isinstance(error, OSError) and not isinstance(
+        error, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+    )
+
+
+class SMTPConnection:
+    """One reusable, authenticated SMTP session"""
+
+    def __init__(self, host: str = SMTP_SERVER, port: int = SMTP_PORT, username: str = SMTP_USERNAME,
+                 password: str = SMTP_PASSWORD, starttls: bool = SMTP_STARTTLS,
+                 timeout: float = SMTP_TIMEOUT, idle_timeout: float = SMTP_IDLE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.connects = 0
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        self.connects += 1
+        return smtp
+
+    def send(self, message: EmailMessage):
+        """Send one message, connecting first if needed"""
+        self._deliver(lambda smtp: smtp.send_message(message))
+
+    def send_raw(self, sender: str, recipient: str, data: bytes):
+        """Send an already serialized message (CRLF line endings)"""
+        self._deliver(lambda smtp: smtp.sendmail(sender, [recipient], data))
+
+    def _deliver(self, deliver: Callable[[smtplib.SMTP], object]):
+        """
+        Run deliver on the pooled session
+
+        A pooled connection the server has closed in the meantime is
+        replaced once; any other error is raised to the caller.
+        """
+        self.close_if_idle()
+        reused = self._smtp is not None
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            deliver(self._smtp)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            raise
+        except OSError:
+            self.close()
+            if not reused:
+                raise
+            self._smtp = self._connect()
+            deliver(self._smtp)
+        finally:
+            self._last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+
+    def close(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+
+class LogTransport:
+    """Development stand-in for SMTPConnection that logs messages instead"""
+
+    def send(self, message: EmailMessage):
+        logger.info("Email to %s: %s\n%s", message["To"], message["Subject"], message.get_content())
+
+    def send_raw(self, sender: str, recipient: str, data: bytes):
+        self.send(message_from_bytes(data, policy=policy.default))
+
+    def close_if_idle(self):
+        pass
+
+    def close(self):
+        pass
+
 
-    except Exception as e:
-        print(f"Failed to send email: {str(e)}")
-        return False
+def create_transport():
+    """Transport selected by EMAIL_BACKEND"""
+    if EMAIL_BACKEND == "log":
+        return LogTransport()
+    return SMTPConnection()
@@ -0,0 +1,150 @@
+"""
+Precompiled email templates
+
+Templates are files in app/templates/email named <name>.<locale>.html:
+a "Subject: ..." line, a blank line, then the HTML body with
+{{ placeholder }} slots. load() compiles each one once, at startup: the
+headers that are the same for every recipient (From, Subject, MIME
+headers) are serialized, and the literal parts of the body are
+quoted-printable encoded, each ending in a soft line break so they can
+be joined with separately encoded values. Rendering a message then only
+escapes and encodes the placeholder values (e.g. a name and a link) and
+joins bytes.
+"""
+import html
+import logging
+import os
+import re
+import threading
+from email import quoprimime
+from email.header import Header
+from email.utils import formatdate, make_msgid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.email import SMTP_FROM
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATES_DIR = Path(os.getenv(
+    "EMAIL_TEMPLATES_DIR", str(Path(__file__).resolve().parent.parent / "templates" / "email")
+))
+EMAIL_DEFAULT_LOCALE = os.getenv("EMAIL_DEFAULT_LOCALE", "th")
+
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+CRLF = b"\r\n"
+
+
+def _encode_fragment(text: str) -> bytes:
+    """Quoted-printable encode part of a body, ending in a soft line break"""
+    if not text:
+        return b""
+    # quoprimime works on one character per byte; 75 leaves room for the "="
+    raw = text.replace("\r\n", "\n").encode("utf-8").decode("latin-1")
+    return quoprimime.body_encode(raw, maxlinelen=75, eol="\r\n").encode("ascii") + b"=" + CRLF
+
+
+def normalize_locale(locale: Optional[str]) -> str:
+    return (locale or "").strip().lower().replace("_", "-")
+
+
+class EmailTemplate:
+    """One template in one locale, compiled for cheap rendering"""
+
+    def __init__(self, name: str, locale: str, source: str, sender: str = SMTP_FROM):
+        first_line, _, body = source.partition("\n")
+        if not first_line.lower().startswith("subject:"):
+            raise ValueError(f"Email template {name}.{locale} must start with a Subject: line")
+        self.name = name
+        self.locale = locale
+        self.sender = sender
+        self.subject = first_line.split(":", 1)[1].strip()
+
+        parts = PLACEHOLDER.split(body.lstrip("\n"))
+        self._literals: List[str] = parts[0::2]
+        self.placeholders: Tuple[str, ...] = tuple(parts[1::2])
+        self._encoded_literals = [_encode_fragment(literal) for literal in self._literals]
+
+        charset = "us-ascii" if self.subject.isascii() else "utf-8"
+        subject = Header(self.subject, charset, header_name="Subject").encode(linesep="\r\n")
+        self._headers = b"".join([
+            b"From: " + sender.encode("ascii") + CRLF,
+            b"Subject: " + subject.encode("ascii") + CRLF,
+            b"MIME-Version: 1.0" + CRLF,
+            b'Content-Type: text/html; charset="utf-8"' + CRLF,
+            b"Content-Transfer-Encoding: quoted-printable" + CRLF,
+        ])
+        self._msgid_domain = sender.rpartition("@")[2] or "localhost"
+
+    def render_html(self, **values) -> str:
+        """Body with the placeholders filled in (values are HTML-escaped)"""
+        out = [self._literals[0]]
+        for slot, literal in zip(self.placeholders, self._literals[1:]):
+            out.append(html.escape(str(values[slot])))
+            out.append(literal)
+        return "".join(out)
+
+    def render_message(self, recipient: str, **values) -> bytes:
+        """Complete RFC 5322 message for one recipient, ready for SMTP DATA"""
+        if "\r" in recipient or "\n" in recipient:
+            raise ValueError("Invalid recipient address")
+        out = [
+            self._headers,
+            b"To: " + recipient.encode("ascii") + CRLF,
+            b"Date: " + formatdate().encode("ascii") + CRLF,
+            b"Message-ID: " + make_msgid(domain=self._msgid_domain).encode("ascii") + CRLF,
+            CRLF,
+            self._encoded_literals[0],
+        ]
+        for slot, encoded_literal in zip(self.placeholders, self._encoded_literals[1:]):
+            out.append(_encode_fragment(html.escape(str(values[slot]))))
+            out.append(encoded_literal)
+        return b"".join(out)
+
+
+class EmailTemplateRegistry:
+    """Compiled templates by (name, locale), loaded from a directory"""
+
+    def __init__(self, directory: Path = EMAIL_TEMPLATES_DIR, default_locale: str = EMAIL_DEFAULT_LOCALE,
+                 sender: str = SMTP_FROM):
+        self.directory = Path(directory)
+        self.default_locale = normalize_locale(default_locale)
+        self.sender = sender
+        self._lock = threading.Lock()
+        self._templates: Optional[Dict[Tuple[str, str], EmailTemplate]] = None
+
+    def load(self) -> Dict[Tuple[str, str], EmailTemplate]:
+        """(Re)compile every template in the directory"""
+        templates = {}
+        for path in sorted(self.directory.glob("*.html")):
+            name, _, locale = path.stem.rpartition(".")
+            if not name:
+                logger.warning("Skipping email template without a locale: %s", path.name)
+                continue
+            locale = normalize_locale(locale)
+            templates[(name, locale)] = EmailTemplate(name, locale, path.read_text(encoding="utf-8"), self.sender)
+        with self._lock:
+            self._templates = templates
+        return templates
+
+    def get(self, name: str, locale: Optional[str] = None) -> EmailTemplate:
+        """
+        Template for the closest locale: exact ("th-th"), then language
+        ("th"), then the default locale
+
+        Raises:
+            KeyError: If the template has no variant for any of them
+        """
+        templates = self._templates
+        if templates is None:
+            templates = self.load()
+
+        locale = normalize_locale(locale)
+        for candidate in (locale, locale.split("-")[0], self.default_locale):
+            template = templates.get((name, candidate))
+            if template is not None:
+                return template
+        raise KeyError(f"No email template {name!r} for locale {locale or self.default_locale!r}")
+
+
+email_templates = EmailTemplateRegistry()
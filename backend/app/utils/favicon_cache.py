@@ -0,0 +1,184 @@
+"""
+Content-addressed on-disk favicon cache
+
+Icons are stored under the SHA-256 of their bytes with an extension
+derived from the sniffed image format, so identical icons (every page of
+a site) are stored once and a cached file never changes, which lets the
+serving route mark responses immutable. The directory is bounded by
+FAVICON_CACHE_MAX_BYTES; the least recently used icons are evicted first,
+except icons still referenced (by a bookmark), whose URLs must keep
+working.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+FAVICON_CACHE_DIR = Path(os.getenv(
+    "FAVICON_CACHE_DIR", str(Path(__file__).resolve().parents[2] / "favicon_cache")
+))
+FAVICON_CACHE_MAX_BYTES = int(os.getenv("FAVICON_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+# Larger responses are not icons we want to keep
+FAVICON_MAX_BYTES = int(os.getenv("FAVICON_MAX_BYTES", str(100 * 1024)))
+
+# Eviction frees space down to this fraction of the limit so it runs rarely
+EVICT_TARGET_RATIO = 0.9
+# Access times are refreshed at most this often to avoid a write per hit
+TOUCH_INTERVAL = 24 * 3600
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "ico": "image/x-icon",
+    "gif": "image/gif",
+    "jpg": "image/jpeg",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+}
+
+CACHE_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}\.(?:" + "|".join(MEDIA_TYPES) + r")$")
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """Image format from the leading bytes (declared content types are unreliable)"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if data.startswith(b"\x00\x00\x01\x00"):
+        return "ico"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    head = data[:512].lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return "svg"
+    return None
+
+
+class FaviconCache:
+    """
+    Size-bounded directory of icons named <sha256>.<ext>
+
+    referenced_names, when set, is called with cache names before evicting
+    and returns those still in use; they are never evicted.
+    """
+
+    def __init__(self, directory: Path = FAVICON_CACHE_DIR, max_bytes: int = FAVICON_CACHE_MAX_BYTES,
+                 referenced_names: Optional[Callable[[Iterable[str]], Set[str]]] = None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.referenced_names = referenced_names
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+
+    def _scan_total(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        if not self.directory.is_dir():
+            return []
+        return [entry for entry in self.directory.iterdir() if CACHE_NAME_PATTERN.match(entry.name)]
+
+    def store(self, data: bytes) -> Optional[str]:
+        """
+        Store an icon and return its cache name, or None if it is not an image
+
+        Args:
+            data: Raw response body
+
+        Returns:
+            str: "<sha256>.<ext>", usable with path_for()
+        """
+        image_type = sniff_image_type(data)
+        if image_type is None or len(data) > FAVICON_MAX_BYTES:
+            return None
+        name = f"{hashlib.sha256(data).hexdigest()}.{image_type}"
+        path = self.directory / name
+
+        with self._lock:
+            if path.exists():
+                os.utime(path)
+                return name
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write then rename so readers never see a partial file
+            tmp_path = path.with_name(f".{name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+            if self._total is None:
+                self._total = self._scan_total()
+            else:
+                self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict(keep=name)
+        return name
+
+    def _evict(self, keep: str):
+        """Delete least recently used unreferenced icons until below the target size"""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # removed by another worker
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        # Re-sync with the directory, which other workers also write to
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        keep_names = {keep}
+        if self.referenced_names is not None:
+            try:
+                keep_names |= self.referenced_names([entry.name for _, _, entry in entries])
+            except Exception:
+                # Deleting an icon a bookmark still shows is worse than going over the limit
+                logger.exception("Cannot tell which favicons are referenced; not evicting")
+                self._total = total
+                return
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= target:
+                break
+            if entry.name in keep_names:
+                continue
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total = total
+        if total > target:
+            logger.warning("Favicon cache holds %d bytes of referenced icons, above its %d byte limit",
+                           total, self.max_bytes)
+        else:
+            logger.info("Evicted favicons down to %d bytes", total)
+
+    def path_for(self, name: str) -> Optional[Path]:
+        """File for a cache name, or None if the name is invalid or evicted"""
+        if not CACHE_NAME_PATTERN.match(name):
+            return None
+        path = self.directory / name
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        # Keep recently served icons at the back of the eviction order
+        if time.time() - mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return path
+
+
+def media_type_for(name: str) -> str:
+    """Content-Type for a cache name"""
+    return MEDIA_TYPES[name.rsplit(".", 1)[1]]
+
+
+favicon_cache = FaviconCache()
@@ -0,0 +1,154 @@
+"""
+Process pool for password hashing
+
+bcrypt deliberately burns ~250 ms of CPU per call. Running it on request
+threads lets a login burst occupy the whole threadpool and compete with
+every other endpoint for CPU, so hashing and verification run in a small
+pool of worker processes instead.
+
+The pool accepts at most HASH_POOL_MAX_PENDING calls (running + queued);
+beyond that run()/run_sync() raise HashPoolFull straight away, which the
+API turns into 429 so clients back off instead of piling up. Each call's
+queue wait and compute time are recorded in Prometheus histograms.
+"""
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from app.utils.instrumentation import timed_phase
+from app.utils.metrics import (
+    PASSWORD_HASH_IN_FLIGHT,
+    PASSWORD_HASH_REJECTED,
+    PASSWORD_HASH_SECONDS,
+    PASSWORD_HASH_WAIT_SECONDS,
+)
+
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", str(HASH_POOL_WORKERS * 8)))
+HASH_POOL_TIMEOUT = float(os.getenv("HASH_POOL_TIMEOUT", "10"))
+
+
+class HashPoolFull(Exception):
+    """Too many hashing calls are already pending"""
+
+
+class HashPoolTimeout(Exception):
+    """A hashing call did not finish within the pool timeout"""
+
+
+def _timed_call(fn: Callable, args: tuple) -> Tuple[Any, float]:
+    """Run fn in the worker process and report its CPU-bound duration"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _warm_up() -> None:
+    """Import-only task used to start the workers ahead of the first login"""
+
+
+class HashingPool:
+    """Bounded ProcessPoolExecutor for CPU-heavy password operations"""
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, max_pending: int = HASH_POOL_MAX_PENDING,
+                 timeout: float = HASH_POOL_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs threads is unsafe
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def start(self):
+        """Start the worker processes now rather than on the first call"""
+        executor = self._get_executor()
+        for future in [executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, operation: str, fn: Callable, args: tuple) -> concurrent.futures.Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                PASSWORD_HASH_REJECTED.labels(operation=operation).inc()
+                raise HashPoolFull(f"{self._pending} password operations pending")
+            self._pending += 1
+        PASSWORD_HASH_IN_FLIGHT.inc()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        PASSWORD_HASH_IN_FLIGHT.dec()
+
+    def _record(self, operation: str, started: float, outcome: Tuple[Any, float]) -> Any:
+        result, compute_seconds = outcome
+        PASSWORD_HASH_SECONDS.labels(operation=operation).observe(compute_seconds)
+        PASSWORD_HASH_WAIT_SECONDS.labels(operation=operation).observe(
+            max(0.0, time.perf_counter() - started - compute_seconds)
+        )
+        return result
+
+    async def run(self, operation: str, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in a worker process without blocking the event loop
+
+        Args:
+            operation: Metric label, e.g. "verify" or "hash"
+            fn: Module-level (picklable) function
+            *args: Picklable arguments
+
+        Raises:
+            HashPoolFull: If max_pending calls are already pending
+            HashPoolTimeout: If the call did not finish within the timeout
+        """
+        started = time.perf_counter()
+        with timed_phase("hash"):
+            future = self._submit(operation, fn, args)
+            try:
+                outcome = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            except asyncio.TimeoutError:
+                raise HashPoolTimeout(f"{operation} did not finish within {self.timeout}s")
+        return self._record(operation, started, outcome)
+
+    def run_sync(self, operation: str, fn: Callable, *args) -> Any:
+        """run() for sync endpoints; the calling thread waits without using CPU"""
+        started = time.perf_counter()
+        with timed_phase("hash"):
+            future = self._submit(operation, fn, args)
+            try:
+                outcome = future.result(self.timeout)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise HashPoolTimeout(f"{operation} did not finish within {self.timeout}s")
+        return self._record(operation, started, outcome)
+
+
+hashing_pool = HashingPool()
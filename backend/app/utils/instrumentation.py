@@ -0,0 +1,254 @@
+"""
+Structured logging and request timing
+
+- configure_logging() installs a queue-backed root handler so log records
+  are formatted and written by a background thread, never on the request
+  path. LOG_FORMAT=json emits one JSON object per line.
+- RequestTimingMiddleware times every request, aggregates per-route and
+  per-phase durations in timing_registry and returns them to the browser
+  in a Server-Timing header.
+- timed_phase() measures a block inside a handler (query, commit, ...)
+  and attributes it to the current request.
+- DEBUG records are only emitted for a sampled fraction of requests
+  (LOG_DEBUG_SAMPLE_RATE) so debug logging can stay on in production.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimer:
+    """Accumulated phase durations for one request"""
+
+    def __init__(self, sampled: bool):
+        self.started = time.perf_counter()
+        self.sampled = sampled
+        self.phases: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current_timer: contextvars.ContextVar[Optional[RequestTimer]] = contextvars.ContextVar(
+    "request_timer", default=None
+)
+
+
+class TimingStats:
+    """Count / total / max of durations keyed by (route, phase)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], list] = {}
+
+    def record(self, route: str, phase: str, seconds: float):
+        with self._lock:
+            entry = self._stats.get((route, phase))
+            if entry is None:
+                self._stats[(route, phase)] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    def snapshot(self) -> dict:
+        """{route: {phase: {count, avg_ms, max_ms}}}"""
+        with self._lock:
+            items = [(key, list(value)) for key, value in self._stats.items()]
+        result: Dict[str, dict] = {}
+        for (route, phase), (count, total, maximum) in sorted(items):
+            result.setdefault(route, {})[phase] = {
+                "count": count,
+                "avg_ms": round(total / count * 1000, 3),
+                "max_ms": round(maximum * 1000, 3),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+timing_registry = TimingStats()
+
+
+@contextmanager
+def timed_phase(phase: str):
+    """Time a block and attribute it to the current request (no-op outside one)"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(phase, time.perf_counter() - start)
+
+
+def debug_sampled() -> bool:
+    """True if DEBUG logging is enabled for the current request"""
+    timer = _current_timer.get()
+    return timer is None or timer.sampled
+
+
+class SampledDebugFilter(logging.Filter):
+    """Drop DEBUG records from requests that were not sampled"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or debug_sampled()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None):
+    """
+    Route all logging through a queue drained by a background thread
+
+    Safe to call more than once; only the first call installs handlers.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SampledDebugFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def route_template(scope: dict) -> str:
+    """Path template of the matched route (e.g. /api/tasks/{task_id})"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _server_timing(timer: RequestTimer, total: float) -> bytes:
+    parts = [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in timer.phases.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware timing each HTTP request
+
+    Records total and per-phase durations under the route template,
+    adds a Server-Timing header and logs one structured line per request
+    (INFO when slow or failed, otherwise sampled DEBUG).
+    """
+
+    def __init__(self, app, sample_rate: float = LOG_DEBUG_SAMPLE_RATE,
+                 slow_request_ms: float = LOG_SLOW_REQUEST_MS, registry: TimingStats = timing_registry):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer(sampled=random.random() < self.sample_rate)
+        token = _current_timer.set(timer)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(timer, timer.elapsed())))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            total = timer.elapsed()
+            _current_timer.reset(token)
+            route = route_template(scope)
+            self.registry.record(route, "total", total)
+            for phase, seconds in timer.phases.items():
+                self.registry.record(route, phase, seconds)
+
+            duration_ms = round(total * 1000, 3)
+            if status >= 500 or duration_ms >= self.slow_request_ms:
+                level = logging.INFO
+            elif timer.sampled:
+                level = logging.DEBUG
+            else:
+                level = None
+            if level is not None and logger.isEnabledFor(level):
+                logger.log(level, "request", extra={
+                    "method": scope["method"],
+                    "route": route,
+                    "status": status,
+                    "duration_ms": duration_ms,
+                    "phases_ms": {phase: round(seconds * 1000, 3) for phase, seconds in timer.phases.items()},
+                })
@@ -0,0 +1,255 @@
+"""
+JSON Patch (RFC 6902) support
+
+apply_patch() applies add / remove / replace / move / copy / test
+operations to a parsed JSON document in place; make_patch() computes a
+patch turning one document into another.
+"""
+import copy
+from typing import Any, List, Tuple
+
+
+class JsonPatchError(ValueError):
+    """The patch is malformed or cannot be applied to the document"""
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer (RFC 6901) into unescaped reference tokens"""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _list_index(container: list, token: str, allow_end: bool) -> int:
+    """Resolve an array token to an index ('-' means one past the end)"""
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    limit = len(container) + (1 if allow_end else 0)
+    if index >= limit:
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _resolve_parent(document: Any, tokens: List[str]) -> Tuple[Any, str]:
+    """Walk to the container holding the last token"""
+    current = document
+    for token in tokens[:-1]:
+        if isinstance(current, dict):
+            if token not in current:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            current = current[token]
+        elif isinstance(current, list):
+            current = current[_list_index(current, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return current, tokens[-1]
+
+
+def get_value(document: Any, pointer: str) -> Any:
+    """Value at a JSON Pointer"""
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        return document
+    parent, token = _resolve_parent(document, tokens)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_list_index(parent, token, allow_end=False)]
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+
+def _add(document: Any, pointer: str, value: Any) -> Any:
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        return value
+    parent, token = _resolve_parent(document, tokens)
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, token, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Path not found: {pointer}")
+    return document
+
+
+def _remove(document: Any, pointer: str) -> Tuple[Any, Any]:
+    """Remove the value at pointer, returning (document, removed value)"""
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        raise JsonPatchError("Cannot remove the document root")
+    parent, token = _resolve_parent(document, tokens)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return document, parent.pop(token)
+    if isinstance(parent, list):
+        return document, parent.pop(_list_index(parent, token, allow_end=False))
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+
+def apply_patch(document: Any, patch: List[dict]) -> Any:
+    """
+    Apply a JSON Patch to a document
+
+    The document is modified in place; callers that need the original
+    on failure must parse or copy it first.
+
+    Args:
+        document: Parsed JSON document
+        patch: List of RFC 6902 operation objects
+
+    Returns:
+        The patched document (a new object only if the root was replaced)
+
+    Raises:
+        JsonPatchError: If an operation is malformed or does not apply
+    """
+    for operation in patch:
+        if not isinstance(operation, dict):
+            raise JsonPatchError("Each patch operation must be an object")
+        op = operation.get("op")
+        path = operation.get("path")
+        if not isinstance(path, str):
+            raise JsonPatchError(f"Operation {op!r} is missing 'path'")
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation {op!r} is missing 'value'")
+        if op in ("move", "copy") and not isinstance(operation.get("from"), str):
+            raise JsonPatchError(f"Operation {op!r} is missing 'from'")
+
+        if op == "add":
+            document = _add(document, path, operation["value"])
+        elif op == "remove":
+            document, _ = _remove(document, path)
+        elif op == "replace":
+            if not parse_pointer(path):
+                document = operation["value"]
+            else:
+                document, _ = _remove(document, path)
+                document = _add(document, path, operation["value"])
+        elif op == "move":
+            source = operation["from"]
+            if path.startswith(source + "/"):
+                raise JsonPatchError("Cannot move a value into one of its children")
+            document, value = _remove(document, source)
+            document = _add(document, path, value)
+        elif op == "copy":
+            document = _add(document, path, copy.deepcopy(get_value(document, operation["from"])))
+        elif op == "test":
+            if get_value(document, path) != operation["value"]:
+                raise JsonPatchError(f"Test failed at {path}")
+        else:
+            raise JsonPatchError(f"Unknown patch operation: {op!r}")
+    return document
+
+
+def _escape(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _keyed_ids(items: list):
+    """Ids of a list of objects that all carry a unique str/int "id", else None"""
+    ids = []
+    for item in items:
+        if not isinstance(item, dict) or "id" not in item:
+            return None
+        key = item["id"]
+        if isinstance(key, bool) or not isinstance(key, (str, int)):
+            return None
+        ids.append(key)
+    return ids if len(set(ids)) == len(ids) else None
+
+
+def _diff_keyed(source: list, target: list, target_ids: list, path: str) -> List[dict]:
+    """Diff arrays of objects matched on "id": remove, then add/move into place"""
+    patch = []
+    wanted = set(target_ids)
+    for index in range(len(source) - 1, -1, -1):
+        if source[index]["id"] not in wanted:
+            patch.append({"op": "remove", "path": f"{path}/{index}"})
+
+    current = [item for item in source if item["id"] in wanted]
+    ids = [item["id"] for item in current]
+    present = set(ids)
+    for index, item in enumerate(target):
+        child = f"{path}/{index}"
+        if index < len(ids) and ids[index] == item["id"]:
+            patch.extend(make_patch(current[index], item, child))
+        elif item["id"] in present:
+            old = ids.index(item["id"], index)
+            patch.append({"op": "move", "from": f"{path}/{old}", "path": child})
+            ids.insert(index, ids.pop(old))
+            current.insert(index, current.pop(old))
+            patch.extend(make_patch(current[index], item, child))
+        else:
+            patch.append({"op": "add", "path": child, "value": copy.deepcopy(item)})
+            ids.insert(index, item["id"])
+            current.insert(index, item)
+    return patch
+
+
+def _diff_positional(source: list, target: list, path: str) -> List[dict]:
+    """Diff arrays by position after trimming the unchanged head and tail"""
+    common = min(len(source), len(target))
+    head = 0
+    while head < common and not make_patch(source[head], target[head]):
+        head += 1
+    tail = 0
+    while tail < common - head and not make_patch(source[-1 - tail], target[-1 - tail]):
+        tail += 1
+
+    source_end, target_end = len(source) - tail, len(target) - tail
+    patch = []
+    for index in range(head, min(source_end, target_end)):
+        patch.extend(make_patch(source[index], target[index], f"{path}/{index}"))
+    # Remove from the end so the remaining indices stay valid
+    for index in range(source_end - 1, target_end - 1, -1):
+        patch.append({"op": "remove", "path": f"{path}/{index}"})
+    for index in range(source_end, target_end):
+        patch.append({"op": "add", "path": f"{path}/{index}", "value": copy.deepcopy(target[index])})
+    return patch
+
+
+def make_patch(source: Any, target: Any, path: str = "") -> List[dict]:
+    """
+    Compute a JSON Patch that turns source into target
+
+    Objects are diffed key by key. Arrays of objects with unique ids
+    (shapes, connections) are matched on "id", so inserting, removing or
+    reordering one item costs one operation however many follow it; other
+    arrays are diffed by position after skipping their unchanged head and
+    tail. Small edits to a large document therefore yield a small patch.
+    Inputs are not modified.
+    """
+    if type(source) is not type(target):
+        return [{"op": "replace", "path": path, "value": copy.deepcopy(target)}]
+
+    if isinstance(source, dict):
+        patch = []
+        for key, value in source.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in target:
+                patch.append({"op": "remove", "path": child})
+            else:
+                patch.extend(make_patch(value, target[key], child))
+        for key, value in target.items():
+            if key not in source:
+                patch.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": copy.deepcopy(value)})
+        return patch
+
+    if isinstance(source, list):
+        target_ids = _keyed_ids(target)
+        if target_ids is not None and _keyed_ids(source) is not None:
+            return _diff_keyed(source, target, target_ids, path)
+        return _diff_positional(source, target, path)
+
+    if source != target:
+        return [{"op": "replace", "path": path, "value": copy.deepcopy(target)}]
+    return []
@@ -0,0 +1,173 @@
+"""
+Prometheus metrics
+
+MetricsMiddleware records request counts by status, latency histograms
+and in-flight requests per route template; instrument_engine() hooks
+SQLAlchemy's before/after_cursor_execute events to count and time SQL
+statements and attribute them to the current request. render_metrics()
+produces the Prometheus text exposition served at /metrics.
+
+With several uvicorn workers set PROMETHEUS_MULTIPROC_DIR to a shared,
+empty directory so /metrics aggregates every worker.
+"""
+import contextvars
+import os
+import time
+import weakref
+from typing import Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.instrumentation import route_template
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+registry = CollectorRegistry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status",
+    ["method", "route", "status"], registry=registry,
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served",
+    ["method"], registry=registry, multiprocess_mode="livesum",
+)
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request", "SQL statements executed while serving a request",
+    ["method", "route"], buckets=QUERY_COUNT_BUCKETS, registry=registry,
+)
+DB_STATEMENTS = Counter(
+    "db_statements_total", "SQL statements executed",
+    ["engine"], registry=registry,
+)
+DB_STATEMENT_LATENCY = Histogram(
+    "db_statement_duration_seconds", "SQL statement execution time",
+    ["engine"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds", "CPU time of password hashing calls in the hashing pool",
+    ["operation"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "password_hash_wait_seconds", "Time password hashing calls waited for a pool worker",
+    ["operation"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Password hashing calls rejected because the pool was full",
+    ["operation"], registry=registry,
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight", "Password hashing calls running or queued",
+    registry=registry, multiprocess_mode="livesum",
+)
+
+EMAILS_DISPATCHED = Counter(
+    "emails_dispatched_total", "Outbound email send attempts by outcome (sent, retry, failed)",
+    ["outcome"], registry=registry,
+)
+
+
+class RequestQueries:
+    """Number of SQL statements issued by one request"""
+
+    def __init__(self):
+        self.count = 0
+
+
+_current_queries: contextvars.ContextVar[Optional[RequestQueries]] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+# Connection.info key holding the start times of executing statements
+_STARTED_KEY = "metrics_statement_started"
+
+_instrumented_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def instrument_engine(engine: Engine, name: str):
+    """
+    Count and time every statement executed on an engine
+
+    For an AsyncEngine pass async_engine.sync_engine.
+    """
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+
+    statements = DB_STATEMENTS.labels(engine=name)
+    latency = DB_STATEMENT_LATENCY.labels(engine=name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+        statements.inc()
+        queries = _current_queries.get()
+        if queries is not None:
+            queries.count += 1
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get(_STARTED_KEY)
+        if started:
+            latency.observe(time.perf_counter() - started.pop())
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request metrics under the route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        queries = RequestQueries()
+        token = _current_queries.set(queries)
+        in_progress = HTTP_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+            _current_queries.reset(token)
+            route = route_template(scope)
+            HTTP_REQUESTS.labels(method=method, route=route, status=str(status)).inc()
+            HTTP_LATENCY.labels(method=method, route=route).observe(duration)
+            DB_STATEMENTS_PER_REQUEST.labels(method=method, route=route).observe(queries.count)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus text exposition for this worker (or all workers in multiprocess mode)"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        aggregate = CollectorRegistry()
+        multiprocess.MultiProcessCollector(aggregate)
+        return generate_latest(aggregate), CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
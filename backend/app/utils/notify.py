@@ -0,0 +1,117 @@
+"""
+Cross-worker cache invalidation over Postgres LISTEN/NOTIFY
+
+Each uvicorn worker keeps in-process caches (settings, org chart). A
+writer publishes on a channel with notify() inside its transaction;
+Postgres delivers the notification to every listening connection only if
+that transaction commits. One background thread per worker LISTENs on
+every registered channel and calls the channel's handler with the
+payload.
+
+Handlers are also called with None after (re)connecting, since anything
+may have changed while the worker was not listening.
+"""
+import logging
+import select
+import threading
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+# channel -> handler(payload or None)
+_handlers: Dict[str, Callable[[Optional[str]], None]] = {}
+
+
+def listen(channel: str, handler: Callable[[Optional[str]], None]):
+    """Call handler for notifications on channel (register before starting the listener)"""
+    _handlers[channel] = handler
+
+
+def notify(connection, channel: str, payload: str = ""):
+    """
+    Queue a NOTIFY on the current transaction of a Session or Connection
+
+    Postgres only delivers it if the transaction commits, so call this
+    before committing.
+    """
+    connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+class NotifyListener(threading.Thread):
+    """Background thread that LISTENs on the registered channels"""
+
+    def __init__(self, database_url: str, handlers: Dict[str, Callable[[Optional[str]], None]],
+                 poll_interval: float = 1.0, retry_interval: float = 5.0):
+        super().__init__(name="notify-listener", daemon=True)
+        # psycopg2 wants a plain libpq URI
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.handlers = dict(handlers)
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Ask the listener to exit after its current poll"""
+        self._stop_event.set()
+
+    def dispatch(self, channel: str, payload: Optional[str]):
+        handler = self.handlers.get(channel)
+        if handler is None:
+            return
+        try:
+            handler(payload or None)
+        except Exception:
+            logger.exception("Handler for %s notifications failed", channel)
+
+    def run(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    for channel in self.handlers:
+                        cursor.execute(f'LISTEN "{channel}"')
+
+                for channel in self.handlers:
+                    self.dispatch(channel, None)
+
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        self.dispatch(notification.channel, notification.payload)
+            except psycopg2.Error as e:
+                logger.warning("Notify listener disconnected: %s", e)
+                self._stop_event.wait(self.retry_interval)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+_listener: Optional[NotifyListener] = None
+
+
+def start_notify_listener(database_url: str):
+    """Start this worker's listener if any channel is registered"""
+    global _listener
+    if not _handlers or _listener is not None:
+        return
+    _listener = NotifyListener(database_url, _handlers)
+    _listener.start()
+
+
+def stop_notify_listener():
+    """Stop the listener if it is running"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,59 @@
+"""
+Keyset (cursor) pagination utilities
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(updated_at: datetime, row_id: int) -> str:
+    """
+    Encode an (updated_at, id) position into an opaque cursor string
+
+    Args:
+        updated_at: Sort timestamp of the last row on the page
+        row_id: Primary key of the last row on the page
+
+    Returns:
+        str: URL-safe cursor token
+    """
+    payload = json.dumps([updated_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(updated_at), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_keyset(query, updated_at_column, id_column, cursor: Optional[str]):
+    """
+    Order a query newest-first on (updated_at, id) and seek past the cursor
+
+    The seek uses a row-value comparison so Postgres can start the index
+    scan at the cursor position instead of skipping rows, keeping page
+    latency flat no matter how deep the cursor goes.
+    """
+    if cursor:
+        updated_at, row_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(updated_at_column, id_column) < tuple_(updated_at, row_id)
+        )
+    return query.order_by(updated_at_column.desc(), id_column.desc())
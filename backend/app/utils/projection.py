@@ -0,0 +1,101 @@
+"""
+Sparse field projection for list endpoints
+
+List routes accept `fields=id,title,status`. parse_fields() validates the
+names against the route's response schema, projected_columns() turns them
+into the columns to SELECT, and projected_response() serializes the rows
+as-is, skipping response_model validation of the omitted fields. Fields
+the full response converts (e.g. with a "before" validator) need the same
+conversion passed in `converters` so both responses agree.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Always returned so clients can address the rows they asked for
+ALWAYS_INCLUDED = ("id",)
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel], model) -> Optional[Dict[str, str]]:
+    """
+    Validate a comma-separated fields parameter
+
+    Names may be given as attribute names or as the schema's JSON alias
+    (e.g. readinessChecklist). Only fields of the response schema that map
+    to a model column can be requested.
+
+    Args:
+        fields: Raw query parameter (None or empty for "all fields")
+        schema: Response schema of the route
+        model: ORM model queried by the route
+
+    Returns:
+        dict: attribute name -> output key, in request order, or None
+
+    Raises:
+        HTTPException: 400 if a name is not a selectable field
+    """
+    if not fields:
+        return None
+
+    # Accepted spelling (attribute name or alias) -> attribute name
+    by_key: Dict[str, str] = {}
+    for name, info in schema.model_fields.items():
+        if hasattr(model, name):
+            by_key[name] = name
+            if info.alias:
+                by_key[info.alias] = name
+    output_of = {name: schema.model_fields[name].alias or name for name in by_key.values()}
+
+    selected = {name: output_of[name] for name in ALWAYS_INCLUDED if name in output_of}
+    unknown = []
+    for raw in fields.split(","):
+        requested = raw.strip()
+        if not requested:
+            continue
+        name = by_key.get(requested)
+        if name is None:
+            unknown.append(requested)
+        else:
+            selected.setdefault(name, output_of[name])
+
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(output_of.values()))}"
+        )
+    return selected
+
+
+def projected_columns(model, selected: Dict[str, str], extra: Iterable[str] = ()) -> List:
+    """Model columns for the selected fields plus any the query itself needs"""
+    names = list(selected)
+    names += [name for name in extra if name not in selected]
+    return [getattr(model, name) for name in names]
+
+
+def project_rows(rows: Iterable, selected: Dict[str, str],
+                 converters: Optional[Dict[str, Callable[[Any], Any]]] = None) -> List[dict]:
+    """Plain dicts holding only the selected fields, keyed by output name"""
+    converters = {name: convert for name, convert in (converters or {}).items() if name in selected}
+    projected = []
+    for row in rows:
+        values = {output: getattr(row, name) for name, output in selected.items()}
+        for name, convert in converters.items():
+            values[selected[name]] = convert(values[selected[name]])
+        projected.append(values)
+    return projected
+
+
+def projected_response(rows: Iterable, selected: Dict[str, str], headers: Optional[dict] = None,
+                       converters: Optional[Dict[str, Callable[[Any], Any]]] = None) -> JSONResponse:
+    """
+    JSON response for projected rows, bypassing response_model validation
+
+    converters maps attribute names to the conversion the response schema
+    applies to them.
+    """
+    return JSONResponse(content=jsonable_encoder(project_rows(rows, selected, converters)), headers=headers)
@@ -3,19 +3,28 @@ Authentication utilities for Planning Tool
 Handles password hashing, JWT tokens, etc.
 """
 
+import hashlib
+import os
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.cache import ExpiringLRUCache
+
+# Password hashing; hashes with a different cost are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # JWT Configuration
 SECRET_KEY = "your-secret-key-change-this-in-production"  # TODO: Move to env var
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Verified tokens kept in memory (per worker) until they expire
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
 
 class Token(BaseModel):
     access_token: str
@@ -23,6 +32,12 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    user_id: Optional[int] = None
+    tenant_id: Optional[int] = None
+    name: Optional[str] = None
+    role: Optional[str] = None
+    tenant_role: Optional[str] = None
+    exp: Optional[int] = None
 
 class UserRegister(BaseModel):
     name: str
@@ -40,10 +55,25 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password, also returning a new hash if the stored one uses outdated settings"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+def access_token_claims(user) -> dict:
+    """Claims identifying a user in their access token, enough to authorize without a DB lookup"""
+    return {
+        "sub": user.email,
+        "user_id": user.id,
+        "tenant_id": user.tenant_id,
+        "name": user.name,
+        "role": user.role,
+        "tenant_role": user.tenant_role,
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -62,6 +92,39 @@ def decode_access_token(token: str) -> Optional[TokenData]:
         email: str = payload.get("sub")
         if email is None:
             return None
-        return TokenData(email=email)
+        return TokenData(
+            email=email,
+            user_id=payload.get("user_id"),
+            tenant_id=payload.get("tenant_id"),
+            name=payload.get("name"),
+            role=payload.get("role"),
+            tenant_role=payload.get("tenant_role"),
+            exp=payload.get("exp"),
+        )
     except JWTError:
         return None
+
+token_cache = ExpiringLRUCache(TOKEN_CACHE_SIZE)
+bearer_scheme = HTTPBearer(auto_error=False)
+
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> TokenData:
+    """
+    FastAPI dependency returning the caller's identity from their bearer token
+
+    The identity comes from the token's claims, so no database lookup is
+    made. Verified tokens are cached by digest until their exp, so repeat
+    requests with the same token skip the signature check as well.
+    """
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+
+    key = hashlib.sha256(credentials.credentials.encode()).digest()
+    user = token_cache.get(key)
+    if user is None:
+        user = decode_access_token(credentials.credentials)
+        # Tokens issued before user_id was embedded need a fresh login
+        if user is None or user.user_id is None or user.exp is None:
+            raise HTTPException(status_code=401, detail="Invalid or expired token",
+                                headers={"WWW-Authenticate": "Bearer"})
+        token_cache.set(key, user, user.exp)
+    return user
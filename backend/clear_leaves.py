@@ -18,6 +18,11 @@ def clear_all_leaves():
             connection.commit()
             print(f"✅ Deleted all leave requests")
 
+            # Balances are totals of the ledger, so clear it as well
+            connection.execute(text("DELETE FROM leave_ledger;"))
+            connection.commit()
+            print(f"✅ Cleared the leave ledger")
+
             # Reset leave balances (set used to 0)
             result = connection.execute(text("""
                 UPDATE leave_balances
@@ -0,0 +1,39 @@
+"""
+Precompress plugin assets
+
+Writes .br and .gz siblings next to every compressible plugin asset so the
+backend can serve them without compressing per request. The backend also
+does this at startup (PLUGIN_PRECOMPRESS=true); run this script as a build
+step when the plugins directory is mounted read-only in production.
+
+Usage: python precompress_plugins.py [PLUGINS_DIR]
+"""
+
+import sys
+from pathlib import Path
+
+from app.utils.assets import available_encodings, precompress_tree
+
+def default_plugins_dir() -> Path:
+    """Same lookup as main.py: /plugins in Docker, ../plugins locally"""
+    if Path("/plugins").exists():
+        return Path("/plugins")
+    return Path(__file__).parent.parent / "plugins"
+
+if __name__ == "__main__":
+    plugins_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else default_plugins_dir()
+
+    print("=" * 60)
+    print(f"Precompressing plugin assets in {plugins_dir}")
+    print(f"Encodings: {', '.join(available_encodings())}")
+    print("=" * 60)
+
+    if not plugins_dir.exists():
+        print(f"❌ Plugins directory not found: {plugins_dir}")
+        sys.exit(1)
+
+    stats = precompress_tree(plugins_dir)
+    print(f"✅ Checked {stats['files']} files, wrote {stats['written']} compressed variants")
+    if stats["errors"]:
+        print(f"⚠️  {stats['errors']} files could not be precompressed (see warnings above)")
+        sys.exit(1)
@@ -0,0 +1,130 @@
+"""
+Tests for static asset validators and conditional responses
+"""
+import gzip
+import os
+
+from starlette.requests import Request
+
+from app.utils.assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    asset_response,
+    available_encodings,
+    get_asset_info,
+    is_asset_hash,
+    precompress_file,
+    precompress_tree,
+)
+
+
+def make_request(headers=None):
+    """Build a bare GET request with the given headers"""
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+
+def test_asset_hash_follows_content(tmp_path):
+    """Test the ETag changes with the file content"""
+    path = tmp_path / "script.js"
+    path.write_text("console.log(1)")
+    first = get_asset_info(path)
+    assert is_asset_hash(first.content_hash)
+    assert first.etag == f'"{first.content_hash}"'
+
+    path.write_text("console.log(22)")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert get_asset_info(path).content_hash != first.content_hash
+
+
+def test_matching_etag_returns_304(tmp_path):
+    """Test If-None-Match with the current ETag short-circuits"""
+    path = tmp_path / "style.css"
+    path.write_text("body {}")
+    etag = get_asset_info(path).etag
+
+    response = asset_response(make_request({"If-None-Match": etag}), path, "text/css")
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_stale_etag_returns_file(tmp_path):
+    """Test a different ETag gets the full body with validators"""
+    path = tmp_path / "style.css"
+    path.write_text("body {}")
+
+    response = asset_response(make_request({"If-None-Match": '"deadbeef"'}), path, "text/css")
+    assert response.status_code == 200
+    assert response.headers["etag"] == get_asset_info(path).etag
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_if_modified_since(tmp_path):
+    """Test If-Modified-Since is honoured when no ETag is sent"""
+    path = tmp_path / "index.html"
+    path.write_text("<html></html>")
+    last_modified = get_asset_info(path).last_modified
+
+    response = asset_response(make_request({"If-Modified-Since": last_modified}), path, "text/html")
+    assert response.status_code == 304
+
+
+def test_immutable_cache_control(tmp_path):
+    """Test versioned responses are marked immutable"""
+    path = tmp_path / "script.js"
+    path.write_text("1")
+
+    response = asset_response(make_request(), path, "application/javascript", immutable=True)
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+
+def test_is_asset_hash():
+    """Test only issued hash formats are recognised as versions"""
+    assert is_asset_hash("0123456789abcdef")
+    assert not is_asset_hash("lib")
+    assert not is_asset_hash("0123456789ABCDEF")
+
+
+def test_precompress_and_negotiate(tmp_path):
+    """Test siblings are written once and served by Accept-Encoding"""
+    path = tmp_path / "script.js"
+    path.write_text("console.log('planning tool');\n" * 200)
+
+    assert precompress_tree(tmp_path)["written"] == len(available_encodings())
+    assert precompress_tree(tmp_path)["written"] == 0  # already fresh
+
+    response = asset_response(make_request({"Accept-Encoding": "gzip, deflate"}), path, "application/javascript")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert str(response.path) == str(path) + ".gz"
+    assert gzip.decompress((tmp_path / "script.js.gz").read_bytes()) == path.read_bytes()
+
+
+def test_identity_when_not_accepted(tmp_path):
+    """Test clients without gzip/br get the original file"""
+    path = tmp_path / "style.css"
+    path.write_text("body { color: red; }\n" * 200)
+    precompress_tree(tmp_path)
+
+    response = asset_response(make_request({"Accept-Encoding": "gzip;q=0"}), path, "text/css")
+    assert "content-encoding" not in response.headers
+    assert str(response.path) == str(path)
+
+
+def test_stale_variant_is_ignored(tmp_path):
+    """Test a sibling older than its source is not served"""
+    path = tmp_path / "style.css"
+    path.write_text("body { color: red; }\n" * 200)
+    precompress_tree(tmp_path)
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    response = asset_response(make_request({"Accept-Encoding": "gzip, br"}), path, "text/css")
+    assert "content-encoding" not in response.headers
+
+
+def test_small_files_are_not_precompressed(tmp_path):
+    """Test tiny files are left alone"""
+    path = tmp_path / "tiny.js"
+    path.write_text("1")
+    assert precompress_file(path) == []
@@ -0,0 +1,71 @@
+"""
+Tests for access token claims and the get_current_user dependency
+"""
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import auth
+from auth import TokenData, access_token_claims, create_access_token, get_current_user
+
+USER = SimpleNamespace(id=7, email="ann@example.com", name="Ann", role="admin", tenant_id=3, tenant_role="owner")
+
+
+@pytest.fixture
+def client():
+    auth.token_cache.clear()
+    app = FastAPI()
+
+    @app.get("/me", response_model=TokenData)
+    async def me(user: TokenData = Depends(get_current_user)):
+        return user
+
+    return TestClient(app)
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_claims_identify_user_without_lookup(client):
+    """Test the dependency returns the identity embedded in the token"""
+    token = create_access_token(access_token_claims(USER), timedelta(minutes=5))
+    response = client.get("/me", headers=bearer(token))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user_id"] == 7
+    assert body["tenant_id"] == 3
+    assert body["email"] == "ann@example.com"
+    assert body["role"] == "admin"
+    assert body["tenant_role"] == "owner"
+
+
+def test_verified_token_is_cached(client, monkeypatch):
+    """Test a repeat request with the same token skips decoding"""
+    token = create_access_token(access_token_claims(USER), timedelta(minutes=5))
+    calls = []
+    decode = auth.decode_access_token
+    monkeypatch.setattr(auth, "decode_access_token", lambda t: calls.append(t) or decode(t))
+
+    for _ in range(3):
+        assert client.get("/me", headers=bearer(token)).status_code == 200
+    assert len(calls) == 1
+    assert auth.token_cache.stats()["hits"] == 2
+
+
+def test_rejects_missing_invalid_and_expired_tokens(client):
+    """Test requests without a valid, unexpired token get 401"""
+    expired = create_access_token(access_token_claims(USER), timedelta(seconds=-1))
+    tampered = create_access_token(access_token_claims(USER), timedelta(minutes=5))[:-2] + "xx"
+    legacy = create_access_token({"sub": USER.email, "name": USER.name}, timedelta(minutes=5))
+
+    assert client.get("/me").status_code == 401
+    for token in (expired, tampered, legacy):
+        response = client.get("/me", headers=bearer(token))
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+    assert auth.token_cache.stats()["entries"] == 0
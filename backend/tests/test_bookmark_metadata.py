@@ -0,0 +1,234 @@
+"""
+Tests for bookmark favicon / metadata fetching and the favicon cache
+"""
+import asyncio
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from sqlalchemy import Column, Integer, Text, create_engine, insert
+from sqlalchemy.orm import DeclarativeBase, Session
+
+import app.services.bookmark_metadata as bookmark_metadata
+from app.services.bookmark_metadata import (
+    FAVICON_ROUTE,
+    FetchError,
+    HttpFetcher,
+    fetch_bookmark_metadata,
+    parse_page_metadata,
+    referenced_favicons,
+)
+from app.utils.favicon_cache import FaviconCache, sniff_image_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+ICO = b"\x00\x00\x01\x00" + b"\x01" * 32
+
+PAGE = (
+    '<html><head><title>\n  Planning &amp; Tools </title>'
+    '<meta property="og:description" content="og text">'
+    '<meta name="description" content="Plan   your work">'
+    '<link rel="apple-touch-icon" href="/touch.png">'
+    '<link rel="Shortcut Icon" href="/static/icon.png">'
+    '</head><body><title>not this</title></body></html>'
+)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the sites bookmarks point at"""
+
+    routes = {
+        "/page": (200, "text/html; charset=utf-8", PAGE.encode()),
+        "/static/icon.png": (200, "application/octet-stream", PNG),
+        "/favicon.ico": (200, "image/x-icon", ICO),
+        "/plain": (200, "text/plain", b"hello"),
+    }
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/moved":
+            self.send_response(301)
+            self.send_header("Location", "/page")
+            self.end_headers()
+            return
+        status, content_type, body = self.routes.get(self.path, (404, "text/plain", b"missing"))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="module")
+def stand_in_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def fetch_metadata(url, cache, **fetcher_options):
+    async def run():
+        fetcher = HttpFetcher(**fetcher_options)
+        try:
+            return await fetch_bookmark_metadata(fetcher, cache, url)
+        finally:
+            await fetcher.aclose()
+
+    return asyncio.run(run())
+
+
+def test_parse_page_metadata():
+    """Test title, description and icon preference order"""
+    metadata = parse_page_metadata(PAGE, "https://example.com/docs/page")
+    assert metadata.title == "Planning & Tools"
+    assert metadata.description == "Plan your work"
+    assert metadata.icon_urls == [
+        "https://example.com/static/icon.png",
+        "https://example.com/touch.png",
+        "https://example.com/favicon.ico",
+    ]
+
+
+def test_parse_page_without_head():
+    """Test pages without metadata still fall back to /favicon.ico"""
+    metadata = parse_page_metadata("<p>hi", "https://example.com/a/b")
+    assert metadata.title is None and metadata.description is None
+    assert metadata.icon_urls == ["https://example.com/favicon.ico"]
+
+
+def test_sniff_image_type():
+    """Test formats are detected from content, not declared types"""
+    assert sniff_image_type(PNG) == "png"
+    assert sniff_image_type(ICO) == "ico"
+    assert sniff_image_type(b'<?xml version="1.0"?><svg xmlns="x"/>') == "svg"
+    assert sniff_image_type(b"<html>not an icon</html>") is None
+
+
+def test_fetch_from_stand_in_server(stand_in_server, tmp_path):
+    """Test a redirected page yields its metadata and a cached icon"""
+    cache = FaviconCache(tmp_path)
+    metadata = fetch_metadata(f"{stand_in_server}/moved", cache, allow_private_networks=True)
+    assert metadata["title"] == "Planning & Tools"
+    assert metadata["description"] == "Plan your work"
+    name = metadata["favicon"][len(FAVICON_ROUTE):]
+    assert name.endswith(".png")
+    assert cache.path_for(name).read_bytes() == PNG
+
+
+def test_non_html_page_uses_site_favicon(stand_in_server, tmp_path):
+    """Test non-HTML pages fall back to /favicon.ico"""
+    metadata = fetch_metadata(f"{stand_in_server}/plain", FaviconCache(tmp_path), allow_private_networks=True)
+    assert metadata["title"] is None
+    assert metadata["favicon"].endswith(".ico")
+
+
+def test_private_addresses_refused(stand_in_server):
+    """Test the default fetcher will not reach internal addresses"""
+    async def run():
+        fetcher = HttpFetcher()
+        try:
+            await fetcher.fetch(f"{stand_in_server}/page", 1024)
+        finally:
+            await fetcher.aclose()
+
+    with pytest.raises(FetchError):
+        asyncio.run(run())
+
+
+def test_connects_to_the_address_that_was_checked(monkeypatch):
+    """Test a host that rebinds to a private address after the check can't be reached there"""
+    answers = [["93.184.216.34"], ["127.0.0.1"]]
+    lookups = []
+
+    async def rebinding_resolver(host, port):
+        lookups.append((host, port))
+        return answers[len(lookups) - 1]
+
+    sent = []
+
+    def handler(request):
+        sent.append((request.url.host, request.headers["host"], request.extensions.get("sni_hostname")))
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=b"<title>x</title>")
+
+    monkeypatch.setattr(bookmark_metadata, "_resolve", rebinding_resolver)
+
+    async def run():
+        fetcher = HttpFetcher(transport=httpx.MockTransport(handler))
+        try:
+            page = await fetcher.fetch("https://rebind.example/page", 1024)
+            with pytest.raises(FetchError):
+                await fetcher.fetch("https://rebind.example/page", 1024)
+            return page
+        finally:
+            await fetcher.aclose()
+
+    page = asyncio.run(run())
+    # One lookup per request, and the request went to the checked address
+    assert lookups == [("rebind.example", 443), ("rebind.example", 443)]
+    assert sent == [("93.184.216.34", "rebind.example", "rebind.example")]
+    assert page.url == "https://rebind.example/page"
+
+
+def test_cache_is_content_addressed(tmp_path):
+    """Test identical icons share one file and non-images are rejected"""
+    cache = FaviconCache(tmp_path)
+    assert cache.store(PNG) == cache.store(PNG)
+    assert len(list(tmp_path.iterdir())) == 1
+    assert cache.store(b"<html></html>") is None
+    assert cache.path_for("../etc/passwd") is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test the oldest icons are removed once the size limit is exceeded"""
+    cache = FaviconCache(tmp_path, max_bytes=100)
+    old = cache.store(PNG + b"old")
+    os.utime(tmp_path / old, (1, 1))
+    middle = cache.store(PNG + b"mid")
+    os.utime(tmp_path / middle, (2, 2))
+    new = cache.store(PNG + b"new")
+    # Three ~43 byte icons exceed 100; dropping the oldest gets below 90
+    assert cache.path_for(old) is None
+    assert cache.path_for(middle) is not None
+    assert cache.path_for(new) is not None
+
+
+def test_cache_keeps_referenced_icons(tmp_path):
+    """Test icons a bookmark still shows survive eviction even when oldest"""
+    class Base(DeclarativeBase):
+        pass
+
+    class IconBookmark(Base):
+        __tablename__ = "bookmarks"
+        id = Column(Integer, primary_key=True)
+        favicon = Column(Text)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    cache = FaviconCache(tmp_path, max_bytes=100,
+                         referenced_names=referenced_favicons(lambda: Session(engine), IconBookmark))
+    shown = cache.store(PNG + b"old")
+    os.utime(tmp_path / shown, (1, 1))
+    with Session(engine) as session:
+        session.execute(insert(IconBookmark).values(favicon=FAVICON_ROUTE + shown))
+        session.commit()
+    unused = cache.store(PNG + b"mid")
+    os.utime(tmp_path / unused, (2, 2))
+    new = cache.store(PNG + b"new")
+    assert cache.path_for(shown) is not None
+    assert cache.path_for(unused) is None
+    assert cache.path_for(new) is not None
+
+
+def test_cache_does_not_evict_when_references_unknown(tmp_path):
+    """Test a failing reference lookup leaves every icon in place"""
+    def unavailable(names):
+        raise RuntimeError("database down")
+
+    cache = FaviconCache(tmp_path, max_bytes=100, referenced_names=unavailable)
+    names = [cache.store(PNG + suffix) for suffix in (b"a", b"b", b"c")]
+    assert all(cache.path_for(name) is not None for name in names)
@@ -0,0 +1,53 @@
+"""
+Tests for bookmark full-text search query building
+"""
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models import Bookmark
+from app.services.bookmark_search import MAX_QUERY_TERMS, build_search_query, to_prefix_tsquery
+
+
+def compile_query(query):
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_prefix_tsquery_matches_every_word():
+    """Test each word becomes a lowercase prefix term"""
+    assert to_prefix_tsquery("React Hoo") == "react:* & hoo:*"
+
+
+def test_prefix_tsquery_drops_tsquery_syntax():
+    """Test operators in user input cannot reach to_tsquery"""
+    assert to_prefix_tsquery("c++ & (rust | go):*") == "c:* & rust:* & go:*"
+    assert to_prefix_tsquery("!!& |") is None
+    assert to_prefix_tsquery("") is None
+    assert to_prefix_tsquery(None) is None
+
+
+def test_prefix_tsquery_limits_terms():
+    """Test very long queries are truncated"""
+    terms = to_prefix_tsquery(" ".join(f"w{i}" for i in range(20))).split(" & ")
+    assert len(terms) == MAX_QUERY_TERMS
+
+
+def test_text_query_is_ranked():
+    """Test a text query filters on the vector and orders by rank"""
+    sql = compile_query(build_search_query(Bookmark, q="react"))
+    assert "bookmarks.search_vector @@ to_tsquery" in sql
+    assert "ORDER BY ts_rank_cd(" in sql
+
+
+def test_filters_without_text_query():
+    """Test tag containment and filters apply without a text query"""
+    sql = compile_query(build_search_query(Bookmark, tags=["db"], category="Dev", user_id=1))
+    assert "to_tsquery" not in sql
+    assert "bookmarks.tags @> CAST(" in sql
+    assert "bookmarks.category = " in sql
+    assert "bookmarks.user_id = " in sql
+    assert "ORDER BY bookmarks.created_at DESC, bookmarks.id DESC" in sql
+
+
+def test_search_vector_is_deferred():
+    """Test plain bookmark loads do not select the generated column"""
+    assert "search_vector" not in compile_query(select(Bookmark))
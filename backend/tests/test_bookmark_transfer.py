@@ -0,0 +1,110 @@
+"""
+Tests for bookmark NDJSON import / export helpers
+"""
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Index, Integer, String, create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from app.models import Bookmark
+from app.services.bookmark_transfer import (
+    EXPORT_COLUMNS,
+    MAX_REPORTED_ERRORS,
+    ImportResult,
+    _export_line,
+    commit_bookmark,
+    dedup_conflict_target,
+    iter_ndjson_lines,
+)
+
+
+def collect_lines(chunks):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [item async for item in iter_ndjson_lines(stream())]
+
+    return asyncio.run(collect())
+
+
+def test_lines_split_across_chunks():
+    """Test lines are reassembled regardless of chunk boundaries"""
+    lines = collect_lines([b'{"a"', b': 1}\n{"b": 2}\n', b'{"c": 3}'])
+    assert lines == [(1, b'{"a": 1}'), (2, b'{"b": 2}'), (3, b'{"c": 3}')]
+
+
+def test_blank_lines_skipped_but_counted():
+    """Test blank lines are skipped while line numbers stay accurate"""
+    lines = collect_lines([b'{"a": 1}\n\n  \r\n{"b": 2}\n'])
+    assert [number for number, _ in lines] == [1, 4]
+
+
+def test_errors_reported_up_to_limit():
+    """Test only the first errors are listed but all are counted"""
+    result = ImportResult()
+    for line in range(MAX_REPORTED_ERRORS + 5):
+        result.add_error(line, "bad")
+    summary = result.to_dict()
+    assert summary["failed"] == MAX_REPORTED_ERRORS + 5
+    assert len(summary["errors"]) == MAX_REPORTED_ERRORS
+
+
+def test_export_line_is_json():
+    """Test an export row becomes one JSON line with ISO timestamps"""
+    created = datetime(2026, 1, 2, 3, 4, 5)
+    row = (1, "ไทย", "https://example.com", None, None, "Dev", ["a"], None, created, created)
+    line = _export_line(row)
+    assert line.endswith("\n") and line.count("\n") == 1
+    data = json.loads(line)
+    assert list(data) == list(EXPORT_COLUMNS)
+    assert data["title"] == "ไทย"
+    assert data["created_at"] == "2026-01-02T03:04:05"
+
+
+def test_conflict_target_matches_unique_index():
+    """Test ON CONFLICT infers the (user_id, category, md5(url)) unique index"""
+    stmt = pg_insert(Bookmark).values(title="t", url="u").on_conflict_do_nothing(
+        index_elements=dedup_conflict_target(Bookmark)
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (user_id, category, md5(url)) DO NOTHING" in sql
+    index = next(i for i in Bookmark.__table__.indexes if i.name == "idx_bookmarks_user_category_url")
+    assert index.unique
+
+
+def test_same_url_in_another_category_is_saved_but_not_twice_in_one():
+    """Test commit_bookmark allows other categories and answers 409 for a repeat"""
+    class Base(DeclarativeBase):
+        pass
+
+    class SavedBookmark(Base):
+        __tablename__ = "bookmarks"
+        id = Column(Integer, primary_key=True)
+        url = Column(String, nullable=False)
+        category = Column(String)
+        user_id = Column(Integer)
+        __table_args__ = (Index("idx_bookmarks_user_category_url", "user_id", "category", "url", unique=True),)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as db:
+        for category in ("Reading", "Work"):
+            db.add(SavedBookmark(url="https://a.test", category=category, user_id=1))
+            commit_bookmark(db)
+
+        db.add(SavedBookmark(url="https://a.test", category="Work", user_id=1))
+        with pytest.raises(HTTPException) as exc:
+            commit_bookmark(db)
+        assert exc.value.status_code == 409
+
+        # Rolled back, so the session is usable and nothing was lost
+        assert db.query(SavedBookmark).count() == 2
@@ -0,0 +1,112 @@
+"""
+Tests for the in-process TTL and expiring LRU caches
+"""
+from app.utils.cache import ExpiringLRUCache, TTLCache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_maxsize_drops_least_recently_used():
+    """Test a bounded cache keeps only the most recently used keys"""
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: None)  # hit: a becomes most recent
+    cache.get_or_load("c", lambda: 3)
+    assert cache.stats()["entries"] == 2
+    assert cache.get_or_load("a", lambda: "reloaded") == 1
+    assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+
+
+def test_cache_hit_skips_loader():
+    """Test a second lookup is served from the cache"""
+    cache = TTLCache(ttl=60)
+    calls = []
+    loader = lambda: calls.append(1) or "value"
+
+    assert cache.get_or_load("k", loader) == "value"
+    assert cache.get_or_load("k", loader) == "value"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_caches_missing_rows():
+    """Test a None result is cached like any other value"""
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    cache.get_or_load("missing", lambda: calls.append(1))
+    cache.get_or_load("missing", lambda: calls.append(1))
+    assert len(calls) == 1
+
+
+def test_cache_entries_expire():
+    """Test entries are reloaded after the TTL"""
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.get_or_load("k", lambda: "old")
+
+    clock.now = 11
+    assert cache.get_or_load("k", lambda: "new") == "new"
+
+
+def test_invalidate_single_key_and_all():
+    """Test explicit invalidation of one key and of everything"""
+    cache = TTLCache(ttl=60)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+
+    cache.invalidate("a")
+    assert cache.get_or_load("a", lambda: 10) == 10
+    assert cache.get_or_load("b", lambda: 20) == 2
+
+    cache.invalidate()
+    assert cache.get_or_load("b", lambda: 20) == 20
+
+
+def test_invalidate_during_load_discards_result():
+    """Test a value loaded across an invalidation is not stored"""
+    cache = TTLCache(ttl=60)
+
+    def stale_loader():
+        cache.invalidate("k")  # a writer commits while we are reading
+        return "stale"
+
+    assert cache.get_or_load("k", stale_loader) == "stale"
+    assert cache.get_or_load("k", lambda: "fresh") == "fresh"
+
+
+def test_lru_entries_expire_at_their_own_time():
+    """Test each entry is dropped once its expiry passes"""
+    clock = FakeClock()
+    cache = ExpiringLRUCache(maxsize=10, clock=clock)
+    cache.set("short", 1, expires_at=10)
+    cache.set("long", 2, expires_at=100)
+    cache.set("expired", 3, expires_at=0)
+
+    clock.now = 50
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert cache.get("expired") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    """Test a full cache drops the entry read longest ago"""
+    cache = ExpiringLRUCache(maxsize=2, clock=FakeClock())
+    cache.set("a", 1, expires_at=100)
+    cache.set("b", 2, expires_at=100)
+    assert cache.get("a") == 1
+    cache.set("c", 3, expires_at=100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
@@ -0,0 +1,96 @@
+"""
+Tests for database engine configuration and pool telemetry
+"""
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.utils.database import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    get_async_database_url,
+    get_async_engine_options,
+    get_engine_options,
+    get_pool_status,
+)
+
+
+class FakeConnection:
+    """Minimal DBAPI connection for exercising the pool"""
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_engine_options_defaults(monkeypatch):
+    """Test pool defaults when nothing is configured"""
+    for name in ("DB_POOL_SIZE", "DB_MAX_OVERFLOW", "DB_POOL_PRE_PING",
+                 "DB_STATEMENT_TIMEOUT_MS", "DB_IDLE_IN_TRANSACTION_TIMEOUT_MS"):
+        monkeypatch.delenv(name, raising=False)
+
+    options = get_engine_options("postgresql://localhost/test")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 5
+    assert options["max_overflow"] == 10
+    assert options["pool_pre_ping"] is True
+    assert "connect_args" not in options
+
+
+def test_engine_options_from_env(monkeypatch):
+    """Test pool and server timeout settings are read from the environment"""
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "5000")
+    monkeypatch.setenv("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", "60000")
+
+    options = get_engine_options("postgresql://localhost/test")
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is False
+    assert options["connect_args"]["options"] == (
+        "-c statement_timeout=5000 -c idle_in_transaction_session_timeout=60000"
+    )
+
+
+def test_pool_records_checkouts_and_timeouts():
+    """Test the instrumented pool counts waits and timeouts"""
+    pool = InstrumentedQueuePool(FakeConnection, pool_size=1, max_overflow=0, timeout=0.01)
+
+    conn = pool.connect()
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+    conn.close()
+
+    stats = pool.stats.snapshot()
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] >= 0.01
+
+
+def test_pool_status_reports_configured_overflow():
+    """Test pool status reads max_overflow from the options the pool was built with"""
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_size=2, max_overflow=3)
+    status = get_pool_status(engine)
+    assert (status["size"], status["max_overflow"], status["checked_out"]) == (2, 3, 0)
+    # dispose() rebuilds the pool with the same settings
+    engine.dispose()
+    assert get_pool_status(engine)["max_overflow"] == 3
+
+
+def test_async_database_url():
+    """Test the asyncpg URL is derived from the psycopg2 URL"""
+    url = get_async_database_url("postgresql://postgres:secret@db:5432/planning_tool")
+    assert url == "postgresql+asyncpg://postgres:secret@db:5432/planning_tool"
+
+
+def test_async_engine_options_use_server_settings(monkeypatch):
+    """Test timeouts are passed to asyncpg as server settings"""
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "5000")
+    monkeypatch.delenv("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", raising=False)
+
+    options = get_async_engine_options()
+    assert options["poolclass"] is InstrumentedAsyncQueuePool
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
@@ -0,0 +1,245 @@
+"""
+Tests for the pooled SMTP connection and the email outbox dispatcher
+"""
+import smtplib
+import socketserver
+import threading
+from email import message_from_bytes, policy
+
+import pytest
+
+from app.services.email_outbox import EmailDispatcher, enqueue_template_email, retry_delay
+from app.utils.email import SMTPConnection, build_message, is_connection_failure, is_permanent_failure
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: no TLS, no auth"""
+
+    def reply(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 stand-in ready")
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 stand-in")
+            elif verb == "RCPT" and "bounce@" in command:
+                self.reply("550 no such user")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                lines = []
+                for data in self.rfile:
+                    if data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data)
+                self.server.messages.append(b"".join(lines))
+                self.reply("250 queued")
+                if self.server.drop_after_message:
+                    return
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInSMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.drop_after_message = False
+
+
+@pytest.fixture
+def smtp_server():
+    server = StandInSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def connection_to(server) -> SMTPConnection:
+    return SMTPConnection("127.0.0.1", server.server_address[1], username="", password="", starttls=False, timeout=5)
+
+
+def test_connection_is_reused(smtp_server):
+    """Test consecutive messages share one SMTP session"""
+    connection = connection_to(smtp_server)
+    for n in range(3):
+        connection.send(build_message("ann@example.com", f"Hello {n}", "<p>hi</p>", sender="app@example.com"))
+    connection.close()
+
+    assert smtp_server.connections == 1
+    assert connection.connects == 1
+    assert len(smtp_server.messages) == 3
+    assert b"Subject: Hello 2" in smtp_server.messages[2]
+
+
+def test_dropped_connection_is_replaced(smtp_server):
+    """Test a pooled session closed by the server is reopened transparently"""
+    smtp_server.drop_after_message = True
+    connection = connection_to(smtp_server)
+    connection.send(build_message("ann@example.com", "One", "<p>1</p>", sender="app@example.com"))
+    connection.send(build_message("ann@example.com", "Two", "<p>2</p>", sender="app@example.com"))
+
+    assert connection.connects == 2
+    assert len(smtp_server.messages) == 2
+
+
+def test_rejected_recipient_is_permanent(smtp_server):
+    """Test a 5xx recipient rejection is not retried and keeps the session usable"""
+    connection = connection_to(smtp_server)
+    with pytest.raises(smtplib.SMTPRecipientsRefused) as error:
+        connection.send(build_message("bounce@example.com", "Nope", "<p>x</p>", sender="app@example.com"))
+    assert is_permanent_failure(error.value)
+    assert not is_connection_failure(error.value)
+
+    connection.send(build_message("ann@example.com", "Yes", "<p>y</p>", sender="app@example.com"))
+    assert connection.connects == 1
+
+
+def test_retry_delay_backs_off_exponentially():
+    """Test the wait doubles per attempt up to the cap"""
+    delays = [retry_delay(n) for n in range(1, 10)]
+    assert delays[:3] == [30, 60, 120]
+    assert max(delays) == 3600
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Returns queued rows for the claim and records the status updates"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append((sql, params))
+        return FakeResult(self.rows if "RETURNING" in sql else [])
+
+    def commit(self):
+        pass
+
+    def params_for(self, prefix):
+        return [params for sql, params in self.statements if sql.startswith(prefix)]
+
+
+class FakeTransport:
+    def __init__(self, errors):
+        self.errors = errors
+        self.sent = []
+
+    def send(self, message):
+        error = self.errors.get(message["To"])
+        if error is not None:
+            raise error
+        self.sent.append(message["To"])
+
+    def send_raw(self, sender, recipient, data):
+        error = self.errors.get(recipient)
+        if error is not None:
+            raise error
+        self.sent.append(data)
+
+
+def queued(*recipients, attempts=1):
+    return [{"id": n, "recipient": r, "subject": "s", "body": "b", "attempts": attempts}
+            for n, r in enumerate(recipients, start=1)]
+
+
+def test_dispatch_marks_sent_retry_and_failed():
+    """Test each message is marked sent, rescheduled or given up on"""
+    db = FakeSession(queued("ok@example.com", "later@example.com", "bounce@example.com"))
+    transport = FakeTransport({
+        "later@example.com": smtplib.SMTPDataError(451, b"try later"),
+        "bounce@example.com": smtplib.SMTPRecipientsRefused({"bounce@example.com": (550, b"no")}),
+    })
+    dispatcher = EmailDispatcher(lambda: db, batch_size=10)
+
+    assert dispatcher.dispatch_batch(transport) == 3
+    assert transport.sent == ["ok@example.com"]
+    assert db.params_for("UPDATE email_outbox SET status = 'sent'") == [{"ids": [1]}]
+    failures = db.params_for("UPDATE email_outbox SET status = :status")[0]
+    assert [(f["id"], f["status"]) for f in failures] == [(2, "pending"), (3, "failed")]
+
+
+def test_unreachable_server_defers_rest_of_batch():
+    """Test a connection failure reschedules the batch uncounted and never gives up"""
+    db = FakeSession(queued("a@example.com", "b@example.com", attempts=6))
+    transport = FakeTransport({"a@example.com": ConnectionRefusedError(111, "refused")})
+    dispatcher = EmailDispatcher(lambda: db, batch_size=10, max_attempts=6)
+
+    dispatcher.dispatch_batch(transport)
+    assert transport.sent == []
+    assert dispatcher.server_unreachable
+    failures = db.params_for("UPDATE email_outbox SET status = :status")[0]
+    assert [(f["status"], f["refund"]) for f in failures] == [("pending", 1), ("pending", 1)]
+
+
+def test_outage_mid_batch_counts_only_messages_tried():
+    """Test messages before the outage keep their outcome and the rest are refunded"""
+    db = FakeSession(queued("ok@example.com", "later@example.com", "down@example.com", "c@example.com",
+                            attempts=6))
+    transport = FakeTransport({
+        "later@example.com": smtplib.SMTPDataError(451, b"try later"),
+        "down@example.com": smtplib.SMTPServerDisconnected("gone"),
+    })
+    dispatcher = EmailDispatcher(lambda: db, batch_size=10, max_attempts=6)
+
+    dispatcher.dispatch_batch(transport)
+    assert transport.sent == ["ok@example.com"]
+    failures = db.params_for("UPDATE email_outbox SET status = :status")[0]
+    assert [(f["id"], f["status"], f["refund"]) for f in failures] == [
+        (2, "failed", 0), (3, "pending", 1), (4, "pending", 1)
+    ]
+
+
+def test_template_email_queued_with_values_only():
+    """Test a template email stores the template, locale and values, not a body"""
+    db = FakeSession([])
+    enqueue_template_email(db, "ann@example.com", "password_reset", {"name": "Ann", "link": "https://x"}, "en-GB")
+    params = db.statements[0][1]
+    assert (params["template"], params["locale"], params["body"]) == ("password_reset", "en", None)
+    assert params["subject"] == "Reset your password - Planning Tool"
+
+    with pytest.raises(KeyError):
+        enqueue_template_email(db, "ann@example.com", "password_reset", {"name": "Ann"})
+
+
+def test_dispatch_renders_template_emails():
+    """Test queued template emails are rendered from the compiled template"""
+    row = {"id": 1, "recipient": "ann@example.com", "subject": "s", "body": None, "attempts": 1,
+           "template": "password_reset", "locale": "en", "context": {"name": "Ann", "link": "https://x/r"}}
+    transport = FakeTransport({})
+    EmailDispatcher(lambda: FakeSession([row])).dispatch_batch(transport)
+
+    assert len(transport.sent) == 1
+    message = message_from_bytes(transport.sent[0], policy=policy.default)
+    assert message["To"] == "ann@example.com"
+    assert "Hi Ann," in message.get_content()
@@ -0,0 +1,66 @@
+"""
+Tests for precompiled email templates
+"""
+from email import message_from_bytes, policy
+
+import pytest
+
+from app.utils.email_templates import EmailTemplate, EmailTemplateRegistry, email_templates
+
+SOURCE = "Subject: Hello - Planning Tool\n\n<p>Hi {{ name }},</p>\n<a href=\"{{link}}\">{{ link }}</a>\n"
+
+
+def parse(raw: bytes):
+    return message_from_bytes(raw, policy=policy.default)
+
+
+def test_render_html_escapes_values():
+    """Test placeholder values are HTML-escaped and literals kept as is"""
+    template = EmailTemplate("hello", "en", SOURCE, sender="app@example.com")
+    assert template.placeholders == ("name", "link", "link")
+    assert template.render_html(name="<Ann>", link="https://x/?a=1&b=2") == (
+        '<p>Hi &lt;Ann&gt;,</p>\n<a href="https://x/?a=1&amp;b=2">https://x/?a=1&amp;b=2</a>\n'
+    )
+
+
+def test_render_message_matches_html():
+    """Test the precompiled MIME message decodes to the rendered HTML"""
+    template = email_templates.get("password_reset", "th")
+    values = {"name": "สมชาย", "link": "https://app.example.com/reset-password?token=" + "x" * 120}
+    message = parse(template.render_message("ann@example.com", **values))
+
+    assert message["To"] == "ann@example.com"
+    assert message["Subject"] == "รีเซ็ตรหัสผ่าน - Planning Tool"
+    assert message["Content-Transfer-Encoding"] == "quoted-printable"
+    assert message["Message-ID"] and message["Date"]
+    assert message.get_content().replace("\r\n", "\n") == template.render_html(**values)
+
+
+def test_message_lines_stay_short():
+    """Test quoted-printable joins keep every body line within 76 characters"""
+    template = email_templates.get("password_reset", "en")
+    raw = template.render_message("ann@example.com", name="A" * 200, link="https://x/" + "y" * 300)
+    body = raw.split(b"\r\n\r\n", 1)[1]
+    assert max(len(line) for line in body.split(b"\r\n")) <= 76
+
+
+def test_rejects_header_injection():
+    """Test a recipient cannot add headers"""
+    template = EmailTemplate("hello", "en", SOURCE, sender="app@example.com")
+    with pytest.raises(ValueError):
+        template.render_message("ann@example.com\r\nBcc: eve@example.com", name="A", link="L")
+
+
+def test_locale_fallback(tmp_path):
+    """Test exact locale, then language, then the default locale is used"""
+    (tmp_path / "hello.en.html").write_text(SOURCE, encoding="utf-8")
+    (tmp_path / "hello.th.html").write_text(SOURCE.replace("Hello", "สวัสดี"), encoding="utf-8")
+    (tmp_path / "hello.pt-br.html").write_text(SOURCE.replace("Hello", "Olá"), encoding="utf-8")
+    registry = EmailTemplateRegistry(tmp_path, default_locale="th", sender="app@example.com")
+
+    assert registry.get("hello", "pt_BR").locale == "pt-br"
+    assert registry.get("hello", "en-US").locale == "en"
+    assert registry.get("hello", "fr").locale == "th"
+    assert registry.get("hello").locale == "th"
+    with pytest.raises(KeyError):
+        registry.get("missing")
@@ -0,0 +1,59 @@
+"""
+Tests for the password hashing process pool
+"""
+import asyncio
+import time
+
+import pytest
+from passlib.context import CryptContext
+
+import auth
+from app.utils.hashing import HashingPool, HashPoolFull, HashPoolTimeout
+
+# Cheap hashes keep the tests fast; the pool does not care about the cost
+LOW_COST = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = HashingPool(workers=1, max_pending=2, timeout=10)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_run_sync_hashes_in_worker(pool):
+    hashed = pool.run_sync("hash", auth.get_password_hash, "secret")
+    assert LOW_COST.verify("secret", hashed)
+    assert hashed.startswith(f"$2b${auth.BCRYPT_ROUNDS:02d}$")
+
+
+def test_run_verifies_and_flags_outdated_hash(pool):
+    stored = LOW_COST.hash("secret")
+    valid, new_hash = asyncio.run(pool.run("verify", auth.verify_and_update_password, "secret", stored))
+    assert valid
+    assert new_hash.startswith(f"$2b${auth.BCRYPT_ROUNDS:02d}$")
+
+    valid, new_hash = asyncio.run(pool.run("verify", auth.verify_and_update_password, "wrong", stored))
+    assert not valid
+    assert new_hash is None
+
+
+def test_rejects_beyond_max_pending(pool):
+    running = [pool._submit("test", time.sleep, (0.5,)) for _ in range(2)]
+    with pytest.raises(HashPoolFull):
+        pool.run_sync("test", time.sleep, 0)
+    for future in running:
+        future.result()
+    time.sleep(0.05)
+    assert pool.pending == 0
+    pool.run_sync("test", time.sleep, 0)
+
+
+def test_timeout():
+    pool = HashingPool(workers=1, max_pending=2, timeout=0.2)
+    try:
+        with pytest.raises(HashPoolTimeout):
+            asyncio.run(pool.run("test", time.sleep, 2))
+    finally:
+        pool.shutdown()
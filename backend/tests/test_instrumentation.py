@@ -0,0 +1,91 @@
+"""
+Tests for structured logging and request timing
+"""
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.instrumentation import (
+    JsonFormatter,
+    RequestTimingMiddleware,
+    SampledDebugFilter,
+    TimingStats,
+    timed_phase,
+)
+
+
+def make_app(registry: TimingStats, sample_rate: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestTimingMiddleware, sample_rate=sample_rate, registry=registry)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        with timed_phase("query"):
+            pass
+        with timed_phase("query"):
+            pass
+        return {"id": item_id}
+
+    return app
+
+
+def test_json_formatter_includes_extra_fields():
+    """Test extra= fields are emitted alongside the message"""
+    record = logging.LogRecord("planning", logging.INFO, __file__, 1, "request %s", ("done",), None)
+    record.route = "/api/tasks"
+    record.duration_ms = 1.5
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "request done"
+    assert payload["level"] == "INFO"
+    assert payload["route"] == "/api/tasks"
+    assert payload["duration_ms"] == 1.5
+
+
+def test_middleware_records_route_template_and_phases():
+    """Test timings are keyed by route template and exposed via Server-Timing"""
+    registry = TimingStats()
+    client = TestClient(make_app(registry))
+
+    response = client.get("/items/1")
+    client.get("/items/2")
+
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("query;dur=")
+    stats = registry.snapshot()["/items/{item_id}"]
+    assert stats["total"]["count"] == 2
+    assert stats["query"]["count"] == 2
+
+
+def test_debug_records_dropped_for_unsampled_requests():
+    """Test the sampling filter drops DEBUG only inside unsampled requests"""
+    captured = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            captured.append(record)
+
+    handler = Capture()
+    handler.addFilter(SampledDebugFilter())
+    log = logging.getLogger("test.sampling")
+    log.setLevel(logging.DEBUG)
+    log.addHandler(handler)
+
+    app = FastAPI()
+    app.add_middleware(RequestTimingMiddleware, sample_rate=0.0, registry=TimingStats())
+
+    @app.get("/")
+    def index():
+        log.debug("hidden")
+        log.warning("shown")
+        return {}
+
+    try:
+        TestClient(app).get("/")
+        log.debug("outside a request")
+    finally:
+        log.removeHandler(handler)
+
+    assert [record.getMessage() for record in captured] == ["shown", "outside a request"]
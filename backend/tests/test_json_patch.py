@@ -0,0 +1,132 @@
+"""
+Tests for JSON Patch and diagram shape deltas
+"""
+import copy
+import random
+
+import pytest
+
+from app.services.diagrams import shape_delta_to_patch
+from app.utils.json_patch import JsonPatchError, apply_patch, make_patch
+
+
+def test_apply_rfc6902_operations():
+    """Test add/remove/replace/move/copy/test on objects and arrays"""
+    document = {"shapes": [{"id": "a"}, {"id": "b"}], "meta": {"zoom": 1}}
+    patched = apply_patch(document, [
+        {"op": "add", "path": "/shapes/1", "value": {"id": "x"}},
+        {"op": "add", "path": "/shapes/-", "value": {"id": "c"}},
+        {"op": "remove", "path": "/shapes/0"},
+        {"op": "replace", "path": "/meta/zoom", "value": 2},
+        {"op": "copy", "from": "/meta", "path": "/saved"},
+        {"op": "move", "from": "/saved/zoom", "path": "/zoom"},
+        {"op": "test", "path": "/zoom", "value": 2},
+        {"op": "add", "path": "/a~1b", "value": True},
+    ])
+
+    assert patched == {
+        "shapes": [{"id": "x"}, {"id": "b"}, {"id": "c"}],
+        "meta": {"zoom": 2},
+        "saved": {},
+        "zoom": 2,
+        "a/b": True,
+    }
+
+
+@pytest.mark.parametrize("operation", [
+    {"op": "remove", "path": "/missing"},
+    {"op": "replace", "path": "/list/5", "value": 1},
+    {"op": "add", "path": "/list/01", "value": 1},
+    {"op": "test", "path": "/list/0", "value": 2},
+    {"op": "move", "from": "/list", "path": "/list/0"},
+    {"op": "frobnicate", "path": "/list"},
+    {"op": "add", "path": "list", "value": 1},
+])
+def test_invalid_operations_raise(operation):
+    """Test malformed or inapplicable operations are rejected"""
+    with pytest.raises(JsonPatchError):
+        apply_patch({"list": [1]}, [operation])
+
+
+def test_shape_delta_translates_to_patch():
+    """Test upserts match on id, deletes go highest index first"""
+    document = {"shapes": [{"id": "a"}, {"id": "b"}, {"id": "c"}], "connections": []}
+    patch = shape_delta_to_patch(
+        document,
+        upsert=[{"id": "b", "x": 1}, {"id": "d"}],
+        delete=["a", "c", "unknown"],
+        connections=[{"from": 0, "to": 1}],
+    )
+
+    assert patch == [
+        {"op": "replace", "path": "/shapes/1", "value": {"id": "b", "x": 1}},
+        {"op": "add", "path": "/shapes/-", "value": {"id": "d"}},
+        {"op": "remove", "path": "/shapes/2"},
+        {"op": "remove", "path": "/shapes/0"},
+        {"op": "add", "path": "/connections", "value": [{"from": 0, "to": 1}]},
+    ]
+    assert apply_patch(document, patch)["shapes"] == [{"id": "b", "x": 1}, {"id": "d"}]
+
+
+def test_shape_delta_on_malformed_documents():
+    """Test null shapes start a new list and non-object documents are rejected"""
+    document = {"shapes": None}
+    patch = shape_delta_to_patch(document, upsert=[{"id": "a"}], delete=["a"])
+    assert apply_patch(document, patch)["shapes"] == [{"id": "a"}]
+
+    for bad in (["not", "an", "object"], {"shapes": "oops"}):
+        with pytest.raises(ValueError):
+            shape_delta_to_patch(bad, upsert=[{"id": "a"}], delete=[])
+
+
+def test_make_patch_round_trip():
+    """Test a computed patch turns source into target without touching either"""
+    source = {"shapes": [{"id": "a", "x": 1}, {"id": "b"}], "tags": [1, 2, 3], "a/b": 1, "meta": {}}
+    target = {"shapes": [{"id": "a", "x": 2}, {"id": "b"}, {"id": "c"}], "tags": [1], "meta": [], "new": None}
+    original = copy.deepcopy(source)
+
+    patch = make_patch(source, target)
+    assert {"op": "replace", "path": "/shapes/0/x", "value": 2} in patch
+    assert {"op": "remove", "path": "/a~1b"} in patch
+    assert apply_patch(copy.deepcopy(source), patch) == target
+    assert source == original
+    assert make_patch(target, target) == []
+
+
+def test_make_patch_distinguishes_types():
+    """Test equal-comparing values of different JSON types are still replaced"""
+    assert make_patch({"v": 1}, {"v": True}) == [{"op": "replace", "path": "/v", "value": True}]
+
+
+def test_make_patch_insert_at_front_is_one_operation():
+    """Test inserting a shape at index 0 doesn't shift-replace every later shape"""
+    source = {"shapes": [{"id": f"s{n}", "x": n} for n in range(50)]}
+    target = {"shapes": [{"id": "new", "x": -1}] + copy.deepcopy(source["shapes"])}
+
+    assert make_patch(source, target) == [{"op": "add", "path": "/shapes/0", "value": {"id": "new", "x": -1}}]
+    assert make_patch(target, source) == [{"op": "remove", "path": "/shapes/0"}]
+    assert make_patch([1, 2, 3], [0, 1, 2, 3]) == [{"op": "add", "path": "/0", "value": 0}]
+
+
+def test_make_patch_moves_reordered_items():
+    """Test a reordered shape is moved and its own edits diffed in place"""
+    source = {"shapes": [{"id": "a"}, {"id": "b"}, {"id": "c", "x": 1}]}
+    target = {"shapes": [{"id": "c", "x": 2}, {"id": "a"}, {"id": "b"}]}
+    patch = make_patch(source, target)
+
+    assert patch == [
+        {"op": "move", "from": "/shapes/2", "path": "/shapes/0"},
+        {"op": "replace", "path": "/shapes/0/x", "value": 2},
+    ]
+    assert apply_patch(copy.deepcopy(source), patch) == target
+
+
+def test_make_patch_random_array_edits_round_trip():
+    """Test keyed and positional array diffs always reproduce the target"""
+    rng = random.Random(7)
+    for _ in range(300):
+        pool = [{"id": n, "v": rng.randint(0, 3)} for n in range(8)]
+        source = rng.sample(pool, rng.randint(0, 8))
+        target = [dict(item, v=rng.randint(0, 3)) for item in rng.sample(pool, rng.randint(0, 8))]
+        for a, b in ((source, target), ([i["v"] for i in source], [i["v"] for i in target])):
+            assert apply_patch(copy.deepcopy(a), make_patch(a, b)) == b
@@ -0,0 +1,43 @@
+"""
+Tests for leave calendar helpers
+"""
+from datetime import date, datetime
+
+from app.services.leave_calendar import LEAVE_CALENDAR_SQL, TEAM_FILTER, build_calendar, leave_period
+
+
+def test_period_from_dates_list():
+    """Test the local dates chosen in the UI define the period"""
+    period = leave_period(
+        ["2026-03-04", "2026-03-02T00:00:00.000Z"],
+        datetime(2026, 3, 1, 17, 0), datetime(2026, 3, 4, 16, 59),
+    )
+    assert (period.lower, period.upper, period.bounds) == (date(2026, 3, 2), date(2026, 3, 4), "[]")
+
+
+def test_period_falls_back_to_timestamps():
+    """Test requests without usable dates use start_date / end_date"""
+    period = leave_period(["not a date"], datetime(2026, 3, 3, 9), datetime(2026, 3, 5, 18))
+    assert (period.lower, period.upper) == (date(2026, 3, 3), date(2026, 3, 5))
+    assert leave_period(None, datetime(2026, 3, 3), datetime(2026, 3, 3)).lower == date(2026, 3, 3)
+
+
+def test_calendar_lists_every_day():
+    """Test each day in the range appears, with the people out that day"""
+    rows = [
+        {"day": date(2026, 3, 2), "leave_request_id": 1, "user_id": 7, "user_name": "Ann"},
+        {"day": date(2026, 3, 2), "leave_request_id": 2, "user_id": 8, "user_name": "Bob"},
+    ]
+    days = build_calendar(rows, date(2026, 3, 1), date(2026, 3, 3))
+    assert [day["date"] for day in days] == [date(2026, 3, 1), date(2026, 3, 2), date(2026, 3, 3)]
+    assert days[0]["out"] == [] and days[2]["out"] == []
+    assert [entry["user_name"] for entry in days[1]["out"]] == ["Ann", "Bob"]
+    assert "day" not in days[1]["out"][0]
+
+
+def test_calendar_query_uses_range_overlap():
+    """Test the calendar query filters with the indexed overlap operator"""
+    sql = LEAVE_CALENDAR_SQL.format(team_filter=TEAM_FILTER)
+    assert "r.period && daterange(:start, :end, '[]')" in sql
+    assert r"x ~ '^\d{4}-\d{2}-\d{2}'" in sql
+    assert "team_members" in sql
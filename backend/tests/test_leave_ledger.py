@@ -0,0 +1,132 @@
+"""
+Tests for leave ledger postings
+"""
+import threading
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.services.leave_ledger import counted_leave, post_leave_change
+
+
+class FakeResult:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+
+class RecordingSession:
+    """Records executed statements; balance updates hit an existing row"""
+
+    def __init__(self, balance_exists=True):
+        self.balance_exists = balance_exists
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append((sql, params))
+        return FakeResult(1 if self.balance_exists else 0)
+
+    def ledger_days(self):
+        return [(p["leave_type"], p["days"], p["reason"]) for sql, p in self.statements
+                if sql.startswith("INSERT INTO leave_ledger")]
+
+
+def test_only_approved_requests_count():
+    """Test pending, rejected and zero-day requests count nothing"""
+    assert counted_leave("approved", "annual", 2) == ("annual", 2)
+    assert counted_leave("pending", "annual", 2) is None
+    assert counted_leave("rejected", "sick", 1) is None
+    assert counted_leave("approved", "annual", 0) is None
+
+
+def test_approval_posts_days_atomically():
+    """Test approving books +days with an in-place counter update"""
+    db = RecordingSession()
+    post_leave_change(db, 1, "A", None, ("annual", 2), "approved", 10)
+    assert db.ledger_days() == [("annual", 2, "approved")]
+    upserts = [sql for sql, _ in db.statements if sql.startswith("INSERT INTO leave_balances")]
+    assert len(upserts) == 1
+    assert "ON CONFLICT (user_id) DO UPDATE SET annual_used = leave_balances.annual_used + EXCLUDED.annual_used" \
+        in upserts[0]
+
+
+def test_edit_posts_only_the_difference():
+    """Test changing an approved request books the delta per leave type"""
+    db = RecordingSession()
+    post_leave_change(db, 1, "A", ("annual", 2), ("annual", 1.5), "changed")
+    assert db.ledger_days() == [("annual", -0.5, "changed")]
+
+    db = RecordingSession()
+    post_leave_change(db, 1, "A", ("annual", 2), ("sick", 2), "changed")
+    assert db.ledger_days() == [("annual", -2, "changed"), ("sick", 2, "changed")]
+
+
+def test_no_change_posts_nothing():
+    """Test re-approving or editing unrelated fields leaves the ledger alone"""
+    db = RecordingSession()
+    assert post_leave_change(db, 1, "A", ("annual", 2), ("annual", 2), "changed") == []
+    assert post_leave_change(db, 1, "A", None, None, "approved") == []
+    assert db.statements == []
+
+
+def test_untracked_types_only_reach_the_ledger():
+    """Test personal/unpaid leave is recorded without a balance counter"""
+    db = RecordingSession()
+    post_leave_change(db, 1, "A", None, ("unpaid", 3), "approved")
+    assert db.ledger_days() == [("unpaid", 3, "approved")]
+    assert not any("leave_balances" in sql for sql, _ in db.statements)
+
+
+def test_missing_balance_is_created():
+    """Test the first posting for a user creates their balance row"""
+    db = RecordingSession(balance_exists=False)
+    post_leave_change(db, 1, "A", None, ("sick", 0.5), "approved")
+    inserts = [params for sql, params in db.statements if sql.startswith("INSERT INTO leave_balances")]
+    assert inserts and inserts[0]["sick_used"] == 0.5 and inserts[0]["annual_used"] == 0
+
+
+def test_concurrent_first_approvals_share_one_balance(tmp_path):
+    """Test two first approvals for a user without a balance both add to one row"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'leave.db'}", connect_args={"timeout": 10})
+
+    @event.listens_for(engine, "connect")
+    def add_now(dbapi_connection, _):
+        dbapi_connection.create_function("now", 0, lambda: "2026-01-01 00:00:00")
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE leave_balances (
+                id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL UNIQUE, user_name TEXT,
+                annual_total REAL, annual_used REAL, sick_total REAL, sick_used REAL,
+                created_at TEXT, updated_at TEXT)
+        """))
+        conn.execute(text("""
+            CREATE TABLE leave_ledger (
+                id INTEGER PRIMARY KEY, user_id INTEGER, leave_request_id INTEGER,
+                leave_type TEXT, days REAL, reason TEXT, created_at TEXT)
+        """))
+
+    first = Session(engine)
+    post_leave_change(first, 7, "New", None, ("annual", 2), "approved", 1)
+
+    errors = []
+
+    def approve_second():
+        try:
+            with Session(engine) as second:
+                post_leave_change(second, 7, "New", None, ("annual", 1.5), "approved", 2)
+                second.commit()
+        except Exception as e:
+            errors.append(e)
+
+    # The second approval waits on the first transaction, then adds to its row
+    thread = threading.Thread(target=approve_second)
+    thread.start()
+    first.commit()
+    first.close()
+    thread.join()
+
+    assert errors == []
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT annual_used, sick_used FROM leave_balances WHERE user_id = 7")).all()
+    assert [tuple(row) for row in rows] == [(3.5, 0)]
@@ -0,0 +1,66 @@
+"""
+Tests for Prometheus metrics
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.utils.metrics import MetricsMiddleware, instrument_engine, registry, render_metrics
+
+engine = create_engine("sqlite://")
+instrument_engine(engine, "test")
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    return app
+
+
+def sample(name: str, **labels) -> float:
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_recorded_by_route_template():
+    """Test requests are counted per route template and status"""
+    client = TestClient(make_app())
+    labels = {"method": "GET", "route": "/metrics-test/{item_id}"}
+    before = sample("http_requests_total", status="200", **labels)
+    before_404 = sample("http_requests_total", method="GET", route="unmatched", status="404")
+
+    client.get("/metrics-test/1")
+    client.get("/metrics-test/2")
+    client.get("/missing")
+
+    assert sample("http_requests_total", status="200", **labels) == before + 2
+    assert sample("http_requests_total", method="GET", route="unmatched", status="404") == before_404 + 1
+    assert sample("http_request_duration_seconds_count", **labels) >= 2
+    assert sample("http_requests_in_progress", method="GET") == 0
+
+
+def test_sql_statements_attributed_to_request():
+    """Test before_cursor_execute counts statements per request"""
+    client = TestClient(make_app())
+    labels = {"method": "GET", "route": "/metrics-test/{item_id}"}
+    before_sum = sample("db_statements_per_request_sum", **labels)
+    before_total = sample("db_statements_total", engine="test")
+
+    client.get("/metrics-test/1")
+
+    assert sample("db_statements_per_request_sum", **labels) == before_sum + 2
+    assert sample("db_statements_total", engine="test") == before_total + 2
+
+
+def test_render_metrics_text_format():
+    """Test the exposition is Prometheus text format"""
+    body, content_type = render_metrics()
+    assert content_type.startswith("text/plain")
+    assert b"# TYPE http_request_duration_seconds histogram" in body
@@ -0,0 +1,27 @@
+"""
+Tests for LISTEN/NOTIFY cache invalidation dispatch
+"""
+from app.utils.notify import NotifyListener
+
+
+def test_dispatch_routes_payload_to_channel_handler():
+    """Test each channel's handler gets its payload, with empty payloads as None"""
+    calls = []
+    listener = NotifyListener("postgresql://localhost/db", {
+        "settings_changed": lambda payload: calls.append(("settings", payload)),
+        "org_chart_changed": lambda payload: calls.append(("org_chart", payload)),
+    })
+
+    listener.dispatch("settings_changed", "task_types")
+    listener.dispatch("org_chart_changed", "")
+    listener.dispatch("unknown", "x")
+    assert calls == [("settings", "task_types"), ("org_chart", None)]
+
+
+def test_failing_handler_does_not_stop_the_listener():
+    """Test an exception in one handler is logged instead of raised"""
+    def broken(payload):
+        raise RuntimeError("boom")
+
+    listener = NotifyListener("postgresql://localhost/db", {"org_chart_changed": broken})
+    listener.dispatch("org_chart_changed", None)
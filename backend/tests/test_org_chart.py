@@ -0,0 +1,87 @@
+"""
+Tests for org chart tree assembly
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, create_engine
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from app.services.org_chart import NODE_COLUMNS, build_org_tree, changes_org_chart
+
+
+def row(node_id, manager_id, depth, name=None):
+    values = {column: None for column in NODE_COLUMNS}
+    if name is not None:
+        values.update(id=node_id, name=name, line_manager=manager_id)
+    values.update(node_id=node_id, manager_id=manager_id, depth=depth)
+    return values
+
+
+def test_build_tree_with_span_counts():
+    """Test nodes are nested and carry direct/total report counts"""
+    rows = [
+        row(1, None, 0, "CEO"),
+        row(2, 1, 1, "CTO"),
+        row(3, 1, 1, "CFO"),
+        row(4, 2, 2, "Engineer"),
+    ]
+
+    (root,) = build_org_tree(rows, None)
+    assert root["name"] == "CEO"
+    assert root["direct_reports"] == 2
+    assert root["total_reports"] == 3
+    cto = root["children"][0]
+    assert cto["name"] == "CTO"
+    assert cto["total_reports"] == 1
+    assert cto["children"][0]["depth"] == 2
+
+
+def test_depth_limit_keeps_full_counts():
+    """Test nodes below max_depth are dropped but still counted"""
+    rows = [
+        row(1, None, 0, "CEO"),
+        row(2, 1, 1, "CTO"),
+        row(4, 2, 2),
+        row(5, 4, 3),
+    ]
+
+    (root,) = build_org_tree(rows, 1)
+    cto = root["children"][0]
+    assert cto["children"] == []
+    assert cto["direct_reports"] == 1
+    assert cto["total_reports"] == 2
+    assert root["total_reports"] == 3
+
+
+def test_only_hierarchy_and_shown_columns_invalidate():
+    """Test logins don't clear the org chart but new users and manager changes do"""
+    class Base(DeclarativeBase):
+        pass
+
+    class ChartUser(Base):
+        __tablename__ = "users"
+        id = Column(Integer, primary_key=True)
+        name = Column(String)
+        line_manager = Column(Integer)
+        password_hash = Column(String)
+        last_login = Column(DateTime)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = ChartUser(name="A", password_hash="old")
+        session.add(user)
+        assert changes_org_chart(session, user)
+        session.commit()
+
+        user.last_login = datetime(2026, 1, 1)
+        user.password_hash = "rehashed"
+        assert not changes_org_chart(session, user)
+        session.commit()
+
+        user.line_manager = 2
+        assert changes_org_chart(session, user)
+        session.commit()
+
+        session.delete(user)
+        assert changes_org_chart(session, user)
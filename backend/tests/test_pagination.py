@@ -0,0 +1,41 @@
+"""
+Tests for keyset pagination utilities
+"""
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models import Task
+from app.utils.pagination import encode_cursor, decode_cursor, apply_keyset
+
+
+def test_cursor_round_trip():
+    """Test a cursor decodes back to the same position"""
+    updated_at = datetime(2026, 1, 14, 9, 30, 15, 123456)
+    cursor = encode_cursor(updated_at, 42)
+    assert decode_cursor(cursor) == (updated_at, 42)
+
+
+def test_cursor_is_url_safe():
+    """Test cursors can be passed as query parameters unescaped"""
+    cursor = encode_cursor(datetime(2026, 1, 14), 999999)
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+
+
+def test_invalid_cursor_rejected():
+    """Test malformed cursors raise a 400"""
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
+
+
+def test_apply_keyset_seeks_past_cursor():
+    """Test the seek predicate and ordering are applied"""
+    cursor = encode_cursor(datetime(2026, 1, 14), 7)
+    query = apply_keyset(select(Task), Task.updated_at, Task.id, cursor)
+    sql = str(query.compile(dialect=postgresql.dialect()))
+
+    assert "(tasks.updated_at, tasks.id) < (" in sql
+    assert "ORDER BY tasks.updated_at DESC, tasks.id DESC" in sql
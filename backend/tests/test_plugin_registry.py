@@ -0,0 +1,76 @@
+"""
+Tests for the plugin registry
+"""
+import json
+import os
+
+from app.services.plugin_registry import PluginRegistry
+
+
+def write_plugin(plugins_dir, folder, manifest):
+    """Create a plugin folder with a plugin.json"""
+    plugin_dir = plugins_dir / folder
+    plugin_dir.mkdir(exist_ok=True)
+    (plugin_dir / "plugin.json").write_text(json.dumps(manifest))
+    return plugin_dir
+
+
+def test_registry_loads_manifests_and_paths(tmp_path):
+    """Test manifests and declared files are indexed by folder name"""
+    write_plugin(tmp_path, "kpi", {"id": "kpi", "files": {"script": "script.js", "style": "style.css"}})
+    (tmp_path / "unconfigured").mkdir()
+
+    registry = PluginRegistry(tmp_path)
+    assert [m["id"] for m in registry.list_manifests()] == ["kpi"]
+
+    entry = registry.get("kpi")
+    assert entry.files["script"] == tmp_path / "kpi" / "script.js"
+    assert entry.files["html"] == tmp_path / "kpi" / "index.html"
+    assert registry.get("unconfigured") is None
+
+
+def test_registry_skips_invalid_manifest(tmp_path):
+    """Test a broken plugin.json does not hide other plugins"""
+    write_plugin(tmp_path, "good", {"id": "good", "files": {}})
+    bad_dir = tmp_path / "bad"
+    bad_dir.mkdir()
+    (bad_dir / "plugin.json").write_text("{not json")
+
+    registry = PluginRegistry(tmp_path)
+    assert [m["id"] for m in registry.list_manifests()] == ["good"]
+
+
+def test_registry_does_not_rescan_when_unchanged(tmp_path):
+    """Test repeated lookups are served from memory"""
+    write_plugin(tmp_path, "kpi", {"id": "kpi", "files": {}})
+    registry = PluginRegistry(tmp_path, check_interval=0)
+
+    registry.list_manifests()
+    registry.list_manifests()
+    registry.get("kpi")
+    assert registry.loads == 1
+
+
+def test_registry_picks_up_manifest_changes(tmp_path):
+    """Test editing plugin.json triggers a reload"""
+    plugin_dir = write_plugin(tmp_path, "kpi", {"id": "kpi", "name": "Old", "files": {}})
+    registry = PluginRegistry(tmp_path, check_interval=0)
+    assert registry.get("kpi").manifest["name"] == "Old"
+
+    manifest_path = plugin_dir / "plugin.json"
+    manifest_path.write_text(json.dumps({"id": "kpi", "name": "New", "files": {}}))
+    stat = manifest_path.stat()
+    os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert registry.get("kpi").manifest["name"] == "New"
+    assert registry.loads == 2
+
+
+def test_registry_explicit_reload(tmp_path):
+    """Test reload() picks up new plugins regardless of check interval"""
+    registry = PluginRegistry(tmp_path, check_interval=3600)
+    assert registry.list_manifests() == []
+
+    write_plugin(tmp_path, "hr", {"id": "hr", "files": {}})
+    assert registry.reload() == 1
+    assert registry.get("hr") is not None
@@ -0,0 +1,69 @@
+"""
+Tests for sparse field projection
+"""
+import json
+from typing import List, Optional
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+
+from app.models import Task
+from app.utils.projection import parse_fields, projected_columns, projected_response
+
+
+class TaskSchema(BaseModel):
+    id: int
+    title: str
+    status: str
+    readiness_checklist: Optional[List[dict]] = Field(None, alias='readinessChecklist')
+    subtask_count: int = 0  # computed, not a column
+
+
+class Row:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+def test_no_fields_means_full_response():
+    """Test an absent or empty parameter disables projection"""
+    assert parse_fields(None, TaskSchema, Task) is None
+    assert parse_fields("", TaskSchema, Task) is None
+
+
+def test_fields_accept_names_and_aliases():
+    """Test id is always included and aliases map back to attributes"""
+    selected = parse_fields("title, readinessChecklist,title", TaskSchema, Task)
+    assert selected == {"id": "id", "title": "title", "readiness_checklist": "readinessChecklist"}
+    assert parse_fields("readiness_checklist", TaskSchema, Task)["readiness_checklist"] == "readinessChecklist"
+
+
+def test_unknown_and_non_column_fields_rejected():
+    """Test fields outside the schema or without a column are a 400"""
+    with pytest.raises(HTTPException) as exc_info:
+        parse_fields("title,password_hash,subtask_count", TaskSchema, Task)
+    assert exc_info.value.status_code == 400
+    assert "password_hash, subtask_count" in exc_info.value.detail
+
+
+def test_projected_columns_and_response():
+    """Test extra query columns are selected but only requested ones returned"""
+    selected = parse_fields("status", TaskSchema, Task)
+    columns = projected_columns(Task, selected, extra=("updated_at", "id"))
+    assert [column.key for column in columns] == ["id", "status", "updated_at"]
+
+    response = projected_response([Row(id=1, status="todo", updated_at=None)], selected)
+    assert json.loads(response.body) == [{"id": 1, "status": "todo"}]
+
+
+def test_converters_match_the_full_response():
+    """Test converted fields come out as the full response schema returns them"""
+    selected = parse_fields("readinessChecklist", TaskSchema, Task)
+    rows = [Row(id=1, readiness_checklist=[{"done": True}]), Row(id=2, readiness_checklist=None)]
+    response = projected_response(rows, selected, converters={
+        "readiness_checklist": json.dumps, "title": str.upper,
+    })
+    assert json.loads(response.body) == [
+        {"id": 1, "readinessChecklist": '[{"done": true}]'},
+        {"id": 2, "readinessChecklist": "null"},
+    ]
@@ -0,0 +1,119 @@
+"""
+Tests for bulk task operations
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, event, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+from app.services.task_bulk import apply_task_batch, bulk_create, bulk_delete, bulk_update, group_updates
+
+OLD = datetime(2020, 1, 1)
+
+metadata = MetaData()
+tasks = Table(
+    "tasks", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", String(500), nullable=False, default="Untitled"),
+    Column("status", String(50), default="todo"),
+    Column("updated_at", DateTime),
+)
+
+
+def test_group_updates_by_field_set():
+    """Test updates changing the same fields share one executemany group"""
+    groups = group_updates([
+        {"id": 1, "status": "done"},
+        {"id": 2, "title": "Renamed", "priority": "low"},
+        {"id": 3, "status": "in_progress"},
+        {"id": 4, "priority": "low", "title": "Other"},
+    ])
+
+    assert len(groups) == 2
+    assert [item["id"] for item in groups[frozenset({"status"})]] == [1, 3]
+    assert [item["id"] for item in groups[frozenset({"title", "priority"})]] == [2, 4]
+
+
+def test_empty_batches_skip_the_database():
+    """Test empty operation lists do not touch the session"""
+    table = Task.__table__
+    assert bulk_create(None, table, []) == []
+    assert bulk_update(None, table, []) == []
+    assert bulk_delete(None, table, []) == []
+
+
+@pytest.fixture
+def db():
+    """In-memory session with a cut-down tasks table"""
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    session = Session(engine)
+    session.execute(insert(tasks), [
+        {"id": n, "title": f"Task {n}", "status": "todo", "updated_at": OLD} for n in (1, 2, 3)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def rows(session):
+    return {row.id: row for row in session.execute(select(tasks).order_by(tasks.c.id))}
+
+
+def test_create_returns_ids_in_input_order(db):
+    """Test the multi-row INSERT returns one id per row, in the order given"""
+    ids = bulk_create(db, tasks, [{"title": "C"}, {"title": "A"}, {"title": "B"}])
+    assert len(ids) == 3
+    assert [rows(db)[task_id].title for task_id in ids] == ["C", "A", "B"]
+
+
+def test_update_binds_per_row_values_and_touches_updated_at(db):
+    """Test each row gets its own values and updated_at is set for all of them"""
+    executed = []
+    event.listen(db.get_bind(), "before_execute",
+                 lambda conn, clause, multiparams, params, options: executed.append((clause, multiparams)))
+
+    found = bulk_update(db, tasks, [{"id": 1, "status": "done"}, {"id": 3, "status": "in_progress"}])
+    assert found == [1, 3]
+    updates = [(clause, multiparams) for clause, multiparams in executed if clause.is_update]
+    assert len(updates) == 1, "expected one executemany UPDATE"
+    clause, multiparams = updates[0]
+    assert str(clause) == (
+        "UPDATE tasks SET status=:b_status, updated_at=:b_updated_at WHERE tasks.id = :b_id"
+    )
+    assert [sorted(params) for params in multiparams] == [["b_id", "b_status", "b_updated_at"]] * 2
+
+    after = rows(db)
+    assert (after[1].status, after[2].status, after[3].status) == ("done", "todo", "in_progress")
+    assert after[1].updated_at > OLD and after[1].updated_at == after[3].updated_at
+    assert after[2].updated_at == OLD
+
+
+def test_update_and_delete_report_only_existing_ids(db):
+    """Test missing ids are left out of the results so callers can report them"""
+    assert bulk_update(db, tasks, [{"id": 2, "title": "X"}, {"id": 99, "title": "Y"}]) == [2]
+    assert bulk_delete(db, tasks, [3, 98]) == [3]
+    assert sorted(rows(db)) == [1, 2]
+
+
+def test_apply_batch_reports_not_found(db):
+    """Test per-item results mark missing update and delete targets"""
+    result = apply_task_batch(db, tasks, [{"title": "New"}], [{"id": 1, "status": "done"}, {"id": 50}], [2, 60])
+    assert [item["status"] for item in result["created"]] == ["created"]
+    assert [(item["id"], item["status"]) for item in result["updated"]] == [(1, "updated"), (50, "not_found")]
+    assert [(item["id"], item["status"]) for item in result["deleted"]] == [(2, "deleted"), (60, "not_found")]
+
+
+def test_atomic_batch_with_missing_targets_rolls_back(db):
+    """Test atomic mode raises 409 and leaves every row unchanged"""
+    with pytest.raises(HTTPException) as error:
+        apply_task_batch(db, tasks, [{"title": "New"}], [{"id": 1, "status": "done"}], [2, 60], atomic=True)
+
+    assert error.value.status_code == 409
+    assert error.value.detail["not_found"] == [60]
+    after = rows(db)
+    assert sorted(after) == [1, 2, 3]
+    assert after[1].status == "todo"
@@ -0,0 +1,74 @@
+"""
+Tests for set-based team membership changes
+"""
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.team import TeamMember
+from app.models.user import User
+from app.services.team_membership import add_member, group_roster, replace_members
+
+MEMBERS = TeamMember.__table__
+USERS = User.__table__
+
+
+class FakeResult:
+    def __init__(self, rows, rowcount=0):
+        self.rows = rows
+        self.rowcount = rowcount
+
+    def scalar(self):
+        return self.rows[0][0] if self.rows else None
+
+    def all(self):
+        return self.rows
+
+
+class RecordingSession:
+    """Compiles each statement for PostgreSQL and returns canned results in order"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        compiled = statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+        self.statements.append(" ".join(str(compiled).split()))
+        return self.results.pop(0)
+
+
+def test_roster_groups_members_under_their_team():
+    """Test join rows become one entry per team, keeping teams without members"""
+    design, ops, empty = (SimpleNamespace(id=n) for n in (1, 2, 3))
+    ann, bob, cat = (SimpleNamespace(name=name) for name in ("Ann", "Bob", "Cat"))
+    roster = group_roster([(design, ann), (design, bob), (ops, cat), (empty, None)])
+
+    assert [(team.id, [user.name for user in members]) for team, members in roster] == [
+        (1, ["Ann", "Bob"]), (2, ["Cat"]), (3, [])
+    ]
+
+
+def test_replace_members_is_one_delete_and_one_insert_select():
+    """Test replacing members issues exactly two set-based statements"""
+    db = RecordingSession(FakeResult([], rowcount=2), FakeResult([(5,), (7,)]))
+    assert replace_members(db, MEMBERS, USERS, 3, [7, 5, 7, 9]) == (2, 2)
+
+    delete_sql, insert_sql = db.statements
+    assert delete_sql == (
+        "DELETE FROM team_members WHERE team_members.team_id = 3 AND (team_members.user_id NOT IN (5, 7, 9))"
+    )
+    # created_at comes from the model's Python default, bound at execution
+    assert insert_sql.startswith("INSERT INTO team_members (team_id, user_id, created_at) SELECT 3 AS anon_1, users.id")
+    assert "WHERE users.id IN (5, 7, 9)" in insert_sql
+    assert "ON CONFLICT ON CONSTRAINT unique_team_member DO NOTHING RETURNING team_members.user_id" in insert_sql
+
+
+def test_add_existing_member_is_a_no_op():
+    """Test adding a current member hits the conflict clause and reports no new row"""
+    db = RecordingSession(FakeResult([]))
+    assert add_member(db, MEMBERS, USERS, 3, 5) is None
+    assert "ON CONFLICT ON CONSTRAINT unique_team_member DO NOTHING" in db.statements[0]
+
+    db = RecordingSession(FakeResult([(42,)]))
+    assert add_member(db, MEMBERS, USERS, 3, 5) == 42
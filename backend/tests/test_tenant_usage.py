@@ -0,0 +1,123 @@
+"""
+Tests for tenant usage counters
+"""
+from types import SimpleNamespace
+
+import app.services.tenant_usage as tenant_usage
+from app.services.tenant_usage import current_usage, reconcile_sql, reconcile_tenant_usage, usage_summary
+
+PLAN = SimpleNamespace(max_users=3, max_tasks=100, max_teams=1, max_storage_mb=100, max_projects=1)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows
+
+    def mappings(self):
+        return self.rows
+
+
+class FakeSession:
+    """Answers the attachments check and returns the queued drift rows"""
+
+    def __init__(self, drift, has_attachments=False):
+        self.drift = drift
+        self.has_attachments = has_attachments
+        self.statements = []
+        self.committed = False
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        if "to_regclass" in sql:
+            return FakeResult(self.has_attachments)
+        return FakeResult(self.drift if sql.startswith("WITH actual") else [])
+
+    def commit(self):
+        self.committed = True
+
+
+def test_usage_summary_reports_counters_and_storage():
+    """Test counters are reported against plan limits, storage in MB"""
+    usage = SimpleNamespace(users_count=2, tasks_count=40, teams_count=1, storage_bytes=3 * 1024 * 1024 + 524288)
+    summary = usage_summary(PLAN, usage)
+    assert summary["users"] == {"current": 2, "limit": 3}
+    assert summary["tasks"] == {"current": 40, "limit": 100}
+    assert summary["storage_mb"] == {"current": 3.5, "limit": 100}
+
+
+def test_usage_summary_without_counters_row():
+    """Test a tenant with nothing counted yet reports zero usage"""
+    summary = usage_summary(PLAN, None)
+    assert {key: value["current"] for key, value in summary.items()} == {
+        "users": 0, "tasks": 0, "teams": 0, "storage_mb": 0, "projects": 0
+    }
+
+
+def test_reconcile_counts_attachments_only_when_present():
+    """Test attachment sizes are part of storage only where the table exists"""
+    assert "attachments" not in reconcile_sql(False)
+    assert "FROM attachments" in reconcile_sql(True)
+    for include in (False, True):
+        sql = reconcile_sql(include)
+        assert "{attachment" not in sql
+        assert "u.users_count + EXCLUDED.users_count" in sql
+
+
+def test_reconcile_applies_drift_and_commits():
+    """Test drift rows are returned and every counter is stamped reconciled"""
+    drift = [{"tenant_id": 1, "users_count": 0, "tasks_count": -7, "teams_count": 0, "storage_bytes": 0}]
+    db = FakeSession(drift, has_attachments=True)
+    assert reconcile_tenant_usage(db) == drift
+    assert "FROM attachments" in db.statements[1]
+    assert db.statements[2] == "UPDATE tenant_usage SET reconciled_at = now()"
+    assert db.committed
+
+
+class UsageSession:
+    """Answers the trigger and attachments checks and the per-tenant count"""
+
+    def __init__(self, triggers_installed):
+        self.triggers_installed = triggers_installed
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        if "pg_trigger" in sql:
+            return SimpleNamespace(scalar=lambda: self.triggers_installed)
+        if "to_regclass" in sql:
+            return SimpleNamespace(scalar=lambda: False)
+        counted = SimpleNamespace(users_count=2, tasks_count=5, teams_count=1, storage_bytes=0)
+        return SimpleNamespace(one=lambda: counted)
+
+
+def test_current_usage_reads_counters_when_triggers_installed(monkeypatch):
+    """Test the counters row is used as is once the triggers exist"""
+    monkeypatch.setattr(tenant_usage, "_triggers_installed", False)
+    counters = SimpleNamespace(users_count=9, tasks_count=9, teams_count=9, storage_bytes=9)
+    db = UsageSession(triggers_installed=True)
+    assert current_usage(db, 1, counters) is counters
+    # Cached: the catalog isn't queried again
+    assert current_usage(db, 1, counters) is counters
+    assert len(db.statements) == 1
+
+
+def test_current_usage_counts_without_counters(monkeypatch, caplog):
+    """Test a missing row or missing triggers fall back to counting"""
+    caplog.set_level("INFO", logger=tenant_usage.__name__)
+    for triggers_installed, counters, logged in (
+        (True, None, "No tenant_usage row for tenant 7"),
+        (False, SimpleNamespace(users_count=0), "triggers are missing; counting usage for tenant 7"),
+    ):
+        monkeypatch.setattr(tenant_usage, "_triggers_installed", False)
+        db = UsageSession(triggers_installed)
+        caplog.clear()
+        usage = current_usage(db, 7, counters)
+        assert usage_summary(PLAN, usage)["tasks"] == {"current": 5, "limit": 100}
+        assert "tenant_id = :tenant_id" in db.statements[-1]
+        assert "attachments" not in db.statements[-1]
+        assert logged in caplog.text
@@ -50,6 +50,11 @@ document.addEventListener('DOMContentLoaded', () => {
         body: JSON.stringify(bookmark)
       });
 
+      if (response.status === 409) {
+        showMessage('ℹ️ Already in Bookmarks', 'success');
+        return;
+      }
+
       if (!response.ok) {
         throw new Error(`Failed to save bookmark: ${response.status}`);
       }
@@ -14,6 +14,11 @@ export interface PluginMetadata {
     style: string;
     component?: string;
   };
+  // Content-hashed URLs served with immutable caching
+  assets?: {
+    script?: string;
+    style?: string;
+  };
   requirements?: string[];
 }
 
@@ -102,7 +107,7 @@ export async function loadPluginFiles(plugin: PluginMetadata): Promise<void> {
       const link = document.createElement('link');
       link.id = linkId;
       link.rel = 'stylesheet';
-      link.href = `${baseUrl}/${plugin.id}/style`;
+      link.href = plugin.assets?.style ?? `${baseUrl}/${plugin.id}/style`;
       document.head.appendChild(link);
     }
   }
@@ -114,7 +119,7 @@ export async function loadPluginFiles(plugin: PluginMetadata): Promise<void> {
       return new Promise((resolve, reject) => {
         const script = document.createElement('script');
         script.id = scriptId;
-        script.src = `${baseUrl}/${plugin.id}/script`;
+        script.src = plugin.assets?.script ?? `${baseUrl}/${plugin.id}/script`;
         script.async = true;
         script.onload = () => resolve();
         script.onerror = () => reject(new Error(`Failed to load plugin script: ${plugin.id}`));
@@ -7586,6 +7586,8 @@ async function addTabToBookmarks(tab, category = 'Uncategorized') {
 
       // Refresh bookmarks list
       loadBookmarks();
+    } else if (response.status === 409) {
+      showNotification(`ℹ️ "${tab.title}" อยู่ใน ${category} แล้ว`, 'info');
     } else {
       showNotification('❌ ไม่สามารถเพิ่ม bookmark ได้', 'error');
     }
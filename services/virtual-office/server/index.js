@@ -812,6 +812,29 @@ app.get('/api/bookmarks', async (req, res) => {
   }
 });
 
+// Proxy to Planning Tool Backend API - cached bookmark favicons
+app.get('/api/favicons/:name', async (req, res) => {
+  try {
+    const backendUrl = process.env.BACKEND_URL || 'http://localhost:8002';
+    const headers = {};
+    if (req.headers['if-none-match']) {
+      headers['If-None-Match'] = req.headers['if-none-match'];
+    }
+    const response = await fetch(`${backendUrl}/api/favicons/${encodeURIComponent(req.params.name)}`, { headers });
+
+    for (const header of ['content-type', 'cache-control', 'etag', 'last-modified', 'content-security-policy', 'x-content-type-options']) {
+      const value = response.headers.get(header);
+      if (value) {
+        res.set(header, value);
+      }
+    }
+    res.status(response.status).send(Buffer.from(await response.arrayBuffer()));
+  } catch (error) {
+    console.error('❌ Error fetching favicon from backend:', error.message);
+    res.status(502).end();
+  }
+});
+
 // Proxy to Planning Tool Backend API - POST bookmark (for Chrome Extension)
 app.post('/api/bookmarks', async (req, res) => {
   try {
@@ -828,6 +851,11 @@ app.post('/api/bookmarks', async (req, res) => {
       timeout: 5000
     });
 
+    // Already saved in this category: pass the 409 through
+    if (response.status === 409) {
+      return res.status(409).json(await response.json());
+    }
+
     if (!response.ok) {
       throw new Error(`Backend responded with status: ${response.status}`);
     }